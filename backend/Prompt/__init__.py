@@ -1 +1 @@
-from Prompt.prompt import linkedin_post_prompt, improve_user_query, summarize_text_query
\ No newline at end of file
+from Prompt.prompt import linkedin_post_prompt, improve_user_query, summarize_text_query, reduce_summaries_query, revise_post_query
\ No newline at end of file
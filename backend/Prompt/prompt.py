@@ -102,4 +102,48 @@ Text to summarize:
 summarize_text_query = PromptTemplate(
     template=summarize_text,
     input=["text"]
-)
\ No newline at end of file
+)
+
+reduce_summaries = """
+You will be given summaries of consecutive parts of one longer document.
+
+Your task: Combine them into a single clear and concise summary of the whole document in less than 200 words.
+
+Rules:
+- Preserve the key facts, main ideas, and critical details.
+- Merge points that appear in several parts instead of repeating them.
+- Keep the summary easy to read and well-structured.
+- Do not add any new information or opinions.
+
+Summaries of the document parts:
+{summaries}
+"""
+
+reduce_summaries_query = PromptTemplate(
+    template=reduce_summaries,
+    input_variables=["summaries"]
+)
+
+revise_post = """
+You will be given a LinkedIn post and feedback from its author.
+
+Your task: Apply the feedback to the post.
+
+Rules:
+- Change only what the feedback asks for, keep everything else as it is.
+- Do not add new facts, figures, sources or claims.
+- Do NOT use markdown for bolding (e.g., do not use asterisks like **text**).
+- Never ask for opinions or invite others to share their experiences, unless the feedback asks for it.
+- Output only the revised post, without any comment.
+
+Post:
+{post}
+
+Feedback:
+{feedback}
+"""
+
+revise_post_query = PromptTemplate(
+    template=revise_post,
+    input_variables=["post", "feedback"]
+)
@@ -1,17 +1,66 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from typing import Literal
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
 import uuid
-from main import graph
+from main import compile_graph
+from kv import KV_URL
+from session_store import SessionStore, open_checkpointer, session_registry
+from search_cache import get_search_cache
+from page_store import get_page_store
+from llm_cache import llm_cache_stats
+from outbox import get_outbox, get_publisher
+from scheduler import get_scheduler
+from telemetry import get_logger, render_metrics, session_id_var, stats_collector
+from cassettes import cassette
+from linkedin_script import known_account
 from langchain_core.messages import HumanMessage
 import uvicorn
 
-sessions = {}
+# "memory" (default), "sqlite" for checkpoints that survive restarts and are shared
+# by the workers of one host, or "kv" for a Redis-compatible server shared by hosts.
+# Sessions are registered in the same backend.
+CHECKPOINTER_BACKEND = os.getenv("CHECKPOINTER_BACKEND", "memory")
+CHECKPOINTER_PATH = os.getenv("CHECKPOINTER_PATH", ".cache/checkpoints.sqlite")
+SESSIONS_PATH = os.getenv("SESSIONS_PATH", ".cache/sessions.sqlite")
+KV_URL = os.getenv("KV_URL", KV_URL)
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "1000"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+# Default number of graph threads a /generate/batch request runs at once
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+# Built by the lifespan on the configured checkpointer, so importing this module opens nothing
+graph = None
+sessions = None
+log = get_logger("api")
+
+# Read at scrape time; the stores are opened by the first scrape that asks for them
+stats_collector.register("search_cache", lambda: get_search_cache().stats())
+stats_collector.register("page_store", lambda: get_page_store().stats())
+stats_collector.register("llm_cache", llm_cache_stats)
+stats_collector.register("publisher", lambda: get_publisher().stats())
+stats_collector.register("scheduler", lambda: get_scheduler().stats())
+stats_collector.register("sessions", lambda: sessions.stats() if sessions is not None else {})
+stats_collector.register("cassette", cassette.stats)
 
 class GenerateRequest(BaseModel):
     query: str
     url: str
     temperature: float = 0.7
 
+class BatchGenerateRequest(BaseModel):
+    items: list[GenerateRequest]
+    max_concurrency: int | None = None
+
 class EditRequest(BaseModel):
     user_feedback: str
     session_id: str
@@ -19,29 +68,117 @@ class EditRequest(BaseModel):
 class PostRequest(BaseModel):
     session_id: str
     user_feedback: str
+    # Publish later instead of right away; naive datetimes are read as server local time
+    publish_at: datetime | None = None
+    # LinkedIn account to publish as, one of LINKEDIN_ACCOUNTS; the account of the environment by default
+    account: str | None = None
+
+class ResolveRequest(BaseModel):
+    # What a check of the LinkedIn account found: "published" or "failed"
+    status: Literal["published", "failed"]
+    post_id: str | None = None
+
+# Graph nodes whose start/end is reported on the streaming endpoints
+STREAMED_NODES = {"improve_input", "prefetch", "tools", "agent", "revise"}
+# Tags of the LLM calls that write the post, streamed as tokens
+DRAFT_TAGS = {"draft", "revise"}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global graph, sessions
+    async with open_checkpointer(CHECKPOINTER_BACKEND, CHECKPOINTER_PATH, KV_URL) as checkpointer:
+        graph = compile_graph(checkpointer)
+        registry = session_registry(CHECKPOINTER_BACKEND, SESSIONS_PATH, KV_URL)
+        sessions = SessionStore(checkpointer, ttl=SESSION_TTL, max_sessions=MAX_SESSIONS, registry=registry)
+        sweeper = asyncio.create_task(sessions.run_sweeper(SESSION_SWEEP_INTERVAL))
+        publisher, scheduler = get_publisher(), get_scheduler()
+        await publisher.start()
+        await scheduler.start()
+        yield
+        await scheduler.stop()
+        await publisher.stop()
+        sweeper.cancel()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def worker_id_header(request: Request, call_next):
+    # Tells which worker process served the request when running with --workers
+    response = await call_next(request)
+    response.headers["X-Worker-Id"] = str(os.getpid())
+    return response
+
+async def require_session(session_id: str) -> None:
+    if not await sessions.touch(session_id):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+
+def initial_state(query: str, url: str = "") -> dict:
+    return {
+        "messages": [HumanMessage(content=f"Initial topic: {query}")],
+        "topic": query,
+        "url": url,
+        "feedback": "No feedback yet.",
+        "tool_results": "No tools result"
+    }
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-app = FastAPI()
+async def stream_graph(graph_input, config: dict, session_id: str, new_session: bool = False):
+    """
+    Runs the graph and yields server-sent events: node progress, draft tokens
+    as the main LLM or a light revision produces them, and the final post once
+    the graph pauses. When the run fails the stream ends with an `error`
+    event instead, and a `new_session` is removed again.
+    """
+    yield sse("session", {"session_id": session_id})
+    try:
+        async for event in graph.astream_events(graph_input, config=config, version="v2"):
+            kind = event["event"]
+            name = event["name"]
+            node = event.get("metadata", {}).get("langgraph_node")
+            if kind in ("on_chain_start", "on_chain_end") and name in STREAMED_NODES and name == node:
+                yield sse("node", {"node": name, "status": "start" if kind == "on_chain_start" else "end"})
+            elif kind == "on_chat_model_stream" and DRAFT_TAGS.intersection(event.get("tags", [])):
+                token = event["data"]["chunk"].content
+                if token:
+                    yield sse("token", {"text": token})
+    except Exception as e:
+        # The response has started, so the client only learns about the failure from the stream
+        log.exception("Streamed run failed")
+        if new_session:
+            await sessions.remove(session_id)
+        yield sse("error", {"session_id": session_id, "detail": str(e)})
+        return
+    except BaseException:
+        if new_session:
+            await sessions.remove(session_id)
+        raise
+    snapshot = await graph.aget_state(config)
+    result = snapshot.values
+    yield sse("done", {"session_id": session_id, "generated_post": result.get("generated_post", "")})
 
 @app.post("/generate")
 async def generate_post(req: GenerateRequest):
-    print(req)
     req = req.dict()
     session_id = str(uuid.uuid4())
+    session_id_var.set(session_id)
+    log.info("Generate request", extra={"query": req["query"], "url": req["url"]})
+    cassette.record_request("/generate", req, session_id)
     config = {"configurable":{"thread_id": session_id}}
 
-    initial_input = {
-        "messages": [HumanMessage(content=f"Initial topic: {req['query']}")],
-        "topic": req["query"],
-        "feedback": "No feedback yet.",
-        "tool_results": "No tools result"
-    }
+    initial_input = initial_state(req["query"], req["url"])
 
-    result = graph.invoke(initial_input, config=config)
+    await sessions.create(session_id)
+    try:
+        result = await graph.ainvoke(initial_input, config=config)
+    except BaseException:
+        # Also on cancellation: nobody learns the id of a session whose first run did not finish
+        await sessions.remove(session_id)
+        raise
     generated_post = result.get("generated_post", "")
     logs = ["Post generated successfully"]
 
-    sessions[session_id] = {"config": config, "state": result}
-
     return {
         "session_id": session_id,
         "logs": logs,
@@ -51,14 +188,17 @@ async def generate_post(req: GenerateRequest):
 @app.post("/edit")
 async def edit_state(req: EditRequest):
     req = req.dict()
-    print(req)
     user_feedback = req["user_feedback"]
     is_approved = "approve" in user_feedback.lower()
     session_id = req["session_id"]
+    session_id_var.set(session_id)
+    log.info("Edit request", extra={"feedback": user_feedback})
+    cassette.record_request("/edit", req, session_id)
+    await require_session(session_id)
     config = {"configurable":{"thread_id": session_id}}
 
     # Update the state of the graph in the checkpointer
-    graph.update_state(
+    await graph.aupdate_state(
             config,
             {"feedback": user_feedback, "ready_to_post": is_approved},
         )
@@ -67,27 +207,223 @@ async def edit_state(req: EditRequest):
     # We pass `None` as the input because the checkpointer already has the state.
     # is_approved = "approve" in user_feedback.lower()
     initial_input = None
-    result = graph.invoke(initial_input, config=config)
+    result = await graph.ainvoke(initial_input, config=config)
     return { "state" : "result",
                  "generated_post": result["generated_post"]}
 
+@app.post("/generate/batch")
+async def generate_batch(req: BatchGenerateRequest):
+    """
+    Runs one graph thread per item, at most `max_concurrency` at a time, and
+    streams one JSON line per item as soon as it completes.
+    """
+    log.info("Batch request", extra={"items": len(req.items)})
+    limit = asyncio.Semaphore(max(1, req.max_concurrency or BATCH_MAX_CONCURRENCY))
+
+    async def run_item(index: int, item: GenerateRequest) -> dict:
+        async with limit:
+            session_id = str(uuid.uuid4())
+            # Each item runs in its own task, so the session id stays with its logs
+            session_id_var.set(session_id)
+            # Recorded as single requests, a replay runs them through /generate
+            cassette.record_request("/generate", item.dict(), session_id)
+            config = {"configurable":{"thread_id": session_id}}
+            await sessions.create(session_id)
+            try:
+                result = await graph.ainvoke(initial_state(item.query, item.url), config=config)
+            except Exception as e:
+                log.exception("Batch item failed", extra={"index": index})
+                await sessions.remove(session_id)
+                return {"index": index, "query": item.query, "error": str(e)}
+            return {
+                "index": index,
+                "query": item.query,
+                "session_id": session_id,
+                "generated_post": result.get("generated_post", ""),
+            }
+
+    async def results():
+        tasks = [asyncio.create_task(run_item(i, item)) for i, item in enumerate(req.items)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.post("/generate/stream")
+async def generate_post_stream(req: GenerateRequest):
+    session_id = str(uuid.uuid4())
+    session_id_var.set(session_id)
+    log.info("Generate stream request", extra={"query": req.query, "url": req.url})
+    cassette.record_request("/generate/stream", req.dict(), session_id)
+    config = {"configurable":{"thread_id": session_id}}
+    await sessions.create(session_id)
+    return StreamingResponse(
+        stream_graph(initial_state(req.query, req.url), config, session_id, new_session=True),
+        media_type="text/event-stream",
+    )
+
+@app.post("/edit/stream")
+async def edit_state_stream(req: EditRequest):
+    session_id_var.set(req.session_id)
+    log.info("Edit stream request", extra={"feedback": req.user_feedback})
+    cassette.record_request("/edit/stream", req.dict(), req.session_id)
+    await require_session(req.session_id)
+    config = {"configurable":{"thread_id": req.session_id}}
+    await graph.aupdate_state(
+            config,
+            {"feedback": req.user_feedback, "ready_to_post": "approve" in req.user_feedback.lower()},
+        )
+    return StreamingResponse(
+        stream_graph(None, config, req.session_id),
+        media_type="text/event-stream",
+    )
+
 @app.post("/post")
 async def post_to_linkedin(req: PostRequest):
-    print("\nPost approved. Resuming to post to LinkedIn...")
     # This final invoke will resume from the interruption and run to the end.
     req = req.dict()
     session_id = req["session_id"]
+    session_id_var.set(session_id)
+    log.info("Post approved, resuming to post to LinkedIn")
+    cassette.record_request("/post", req, session_id)
     user_feedback = req["user_feedback"]
     is_approved = True
+    if not known_account(req["account"]):
+        raise HTTPException(status_code=422, detail=f"Unknown LinkedIn account: {req['account']}")
+    await require_session(session_id)
     config = {"configurable":{"thread_id": session_id}}
-    graph.update_state(
+    publish_at = req["publish_at"].timestamp() if req["publish_at"] else None
+    await graph.aupdate_state(
             config,
-            {"feedback": user_feedback, "ready_to_post": is_approved},
+            {"feedback": user_feedback, "ready_to_post": is_approved, "publish_at": publish_at,
+             "account": req["account"]},
         )
-    graph.invoke(None, config=config)
-    print("\nWorkflow finished.")
-    return {"state": "Posted"}
+    result = await graph.ainvoke(None, config=config)
+    if (await graph.aget_state(config)).next:
+        # The graph did not run to the end, the session stays usable for more edits
+        raise HTTPException(status_code=409, detail="Post was not approved, the session is still open")
+    # The workflow has ended, its checkpoints are no longer needed
+    await sessions.remove(session_id)
+    log.info("Workflow finished")
+    if result.get("schedule_id"):
+        return {"state": "Scheduled", "schedule_id": result["schedule_id"], "publish_at": publish_at}
+    if result.get("outbox_id") is None:
+        raise HTTPException(status_code=409, detail="Nothing was queued: the session has no post to publish")
+    # Publishing happens in the background, its progress is at /outbox/{outbox_id}
+    return {"state": "Queued", "outbox_id": result["outbox_id"]}
+
+# The store endpoints below are plain functions: FastAPI runs them in its
+# threadpool, so their SQLite queries never block the event loop
+@app.get("/outbox/stats")
+def outbox_stats():
+    return get_publisher().stats()
+
+OUTBOX_FIELDS = ("id", "status", "account", "attempts", "post_id", "last_error")
+
+@app.get("/outbox")
+def outbox_entries(status: str | None = None, limit: int = 100):
+    """
+    Lists the latest outbox entries, e.g. `?status=needs_check` for the posts
+    that may or may not have been published.
+    """
+    return {
+        "entries": [
+            {**{key: entry[key] for key in OUTBOX_FIELDS}, "content": entry["content"], "updated_at": entry["updated_at"]}
+            for entry in get_outbox().entries(status, limit)
+        ]
+    }
+
+@app.get("/outbox/{outbox_id}")
+def outbox_entry(outbox_id: int):
+    entry = get_outbox().get(outbox_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Outbox entry not found")
+    return {key: entry[key] for key in OUTBOX_FIELDS}
+
+@app.post("/outbox/{outbox_id}/requeue")
+def requeue_outbox_entry(outbox_id: int, reset_attempts: bool = False):
+    """
+    Sends a `needs_check` or `failed` post again, once it is known not to be on LinkedIn.
+    """
+    if not get_outbox().requeue(outbox_id, reset_attempts):
+        raise HTTPException(status_code=409, detail="Only needs_check or failed entries can be requeued")
+    return outbox_entry(outbox_id)
+
+@app.post("/outbox/{outbox_id}/resolve")
+def resolve_outbox_entry(outbox_id: int, req: ResolveRequest):
+    """
+    Settles a `needs_check` post by hand after checking the LinkedIn account.
+    """
+    error = "Marked as failed by an operator" if req.status == "failed" else None
+    if not get_outbox().resolve(outbox_id, req.status, req.post_id, error):
+        raise HTTPException(status_code=409, detail="Entry is not waiting for a check")
+    return outbox_entry(outbox_id)
+
+@app.get("/schedule/stats")
+def schedule_stats():
+    return get_scheduler().stats()
+
+@app.get("/schedule/{schedule_id}")
+def scheduled_post(schedule_id: int):
+    entry = get_scheduler().get(schedule_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Scheduled post not found")
+    return {key: entry[key] for key in ("id", "status", "account", "publish_at", "outbox_id")}
+
+@app.delete("/schedule/{schedule_id}")
+def cancel_scheduled_post(schedule_id: int):
+    if not get_scheduler().cancel(schedule_id):
+        raise HTTPException(status_code=409, detail="Post is not scheduled any more")
+    return {"state": "Cancelled", "schedule_id": schedule_id}
+
+@app.get("/sessions/stats")
+async def session_stats():
+    return sessions.stats()
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "search": get_search_cache().stats(),
+        "pages": get_page_store().stats(),
+        "llm": llm_cache_stats(),
+    }
+
+@app.get("/metrics")
+def metrics():
+    """
+    Node, tool and LLM latencies, token usage and cost, retries and the cache,
+    outbox, scheduler and session stats in the Prometheus text format.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Serve the LinkedIn post generator API.")
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", "1")),
+        help="worker processes; more than one needs CHECKPOINTER_BACKEND=sqlite or kv",
+    )
+    parser.add_argument("--reload", action="store_true", help="restart on code changes (development)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        if CHECKPOINTER_BACKEND == "memory":
+            # Every worker would have its own sessions, and requests land on any worker
+            sys.exit("--workers needs a shared backend: set CHECKPOINTER_BACKEND to sqlite or kv")
+        if args.reload:
+            sys.exit("--reload runs a single worker")
+        # Lets /metrics sum the counters of all workers
+        os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="linkedin-agent-metrics-"))
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, reload=args.reload)
 
 if __name__ == "__main__":
-    uvicorn.run("api:app", port=8000, reload=True)
+    main_cli()
 
@@ -0,0 +1,385 @@
+import asyncio
+import atexit
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+from typing import Any
+
+import requests
+import zstandard
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, message_chunk_to_message, messages_from_dict, message_to_dict
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# "off", "record" (real calls, saved to the cassette) or "replay" (served from it, no network)
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+CASSETTE_PATH = os.getenv("CASSETTE_PATH", ".cache/cassettes")
+# Replayed calls take their recorded time multiplied by this, 0 answers at once
+CASSETTE_LATENCY_SCALE = float(os.getenv("CASSETTE_LATENCY_SCALE", "1"))
+CASSETTE_ZSTD_LEVEL = int(os.getenv("CASSETTE_ZSTD_LEVEL", "10"))
+
+# Headers that describe the body as sent over the wire, not the decoded body that is recorded
+_WIRE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+_TOKEN_PIECE = re.compile(r"\s*\S+\s*")
+
+
+class CassetteMiss(LookupError):
+    """
+    Raised in replay mode for a call that was never recorded.
+    """
+
+
+def read_cassettes(path: str):
+    """
+    Yields the recorded interactions of every cassette file in `path`, oldest file first.
+
+    A file cut short by a crash is read up to its last complete record.
+    """
+    for name in sorted(glob.glob(os.path.join(path, "*.jsonl.zst"))):
+        with open(name, "rb") as f:
+            reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+            try:
+                for line in io.TextIOWrapper(reader, encoding="utf-8"):
+                    if line.endswith("\n"):
+                        yield json.loads(line)
+            except zstandard.ZstdError:
+                continue
+
+
+class Cassette:
+    """
+    Records the external calls of real runs and serves them back offline.
+
+    Every interaction is one JSON line: its `kind` ("llm", "search", "fetch",
+    "linkedin" or "request" for the API calls themselves), a `key` identifying
+    the call, the `response`, and the `latency` it took. Recording appends them
+    to a zstd-compressed file per process in the `path` directory. Replay loads
+    all files there and answers each call with the recorded responses for its
+    key in order, cycling when a key is asked for more often than it was
+    recorded, after sleeping `latency * latency_scale`.
+    """
+
+    def __init__(self, mode: str = "off", path: str = CASSETTE_PATH, latency_scale: float = 1.0):
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode!r}")
+        self.mode = mode
+        self.path = path
+        self.latency_scale = latency_scale
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._stream = None
+        self._index = None
+        self._served = {}
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def record(self, kind: str, key: str, response, latency: float, **extra) -> None:
+        entry = {"kind": kind, "key": key, "t": time.time(), "latency": latency, "response": response, **extra}
+        line = json.dumps(entry, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+        with self._lock:
+            if self._stream is None:
+                os.makedirs(self.path, exist_ok=True)
+                name = os.path.join(self.path, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl.zst")
+                compressor = zstandard.ZstdCompressor(level=CASSETTE_ZSTD_LEVEL)
+                self._stream = compressor.stream_writer(open(name, "wb"))
+                atexit.register(self.close)
+            self._stream.write(line)
+            # Each record reaches the disk in a decodable block, so a crash loses nothing
+            self._stream.flush(zstandard.FLUSH_BLOCK)
+            self.recorded += 1
+
+    def record_request(self, endpoint: str, body: dict, session_id: str) -> None:
+        """
+        Records an API call, so whole sessions can be replayed against the API.
+        """
+        if self.recording:
+            self.record("request", endpoint, {"body": body, "session_id": session_id}, 0.0)
+
+    def lookup(self, kind: str, key: str) -> dict:
+        with self._lock:
+            if self._index is None:
+                self._index = {}
+                for entry in read_cassettes(self.path):
+                    self._index.setdefault((entry["kind"], entry["key"]), []).append(entry)
+            entries = self._index.get((kind, key))
+            if not entries:
+                self.misses += 1
+                raise CassetteMiss(f"No recorded {kind} call for {key!r}")
+            served = self._served.get((kind, key), 0)
+            self._served[(kind, key)] = served + 1
+            self.replayed += 1
+        return entries[served % len(entries)]
+
+    def delay(self, seconds: float) -> float:
+        return seconds * self.latency_scale
+
+    def call(self, kind: str, key: str, func, *args):
+        """
+        Returns func(*args), recording it, or the recorded result when replaying.
+        """
+        if self.replaying:
+            entry = self.lookup(kind, key)
+            time.sleep(self.delay(entry["latency"]))
+            return entry["response"]
+        start = time.perf_counter()
+        result = func(*args)
+        if self.recording:
+            self.record(kind, key, result, time.perf_counter() - start)
+        return result
+
+    async def acall(self, kind: str, key: str, func, *args):
+        """
+        Async variant of `call` for coroutine functions.
+        """
+        if self.replaying:
+            entry = self.lookup(kind, key)
+            await asyncio.sleep(self.delay(entry["latency"]))
+            return entry["response"]
+        start = time.perf_counter()
+        result = await func(*args)
+        if self.recording:
+            self.record(kind, key, result, time.perf_counter() - start)
+        return result
+
+    def mount(self, session: requests.Session, **adapter_kwargs) -> None:
+        """
+        Routes the HTTP requests of the session through the cassette, unless it is off.
+        """
+        if self.mode != "off":
+            adapter = CassetteAdapter(self, **adapter_kwargs)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._stream is not None:
+                self._stream.flush(zstandard.FLUSH_FRAME)
+                self._stream.close()
+                self._stream = None
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "recorded": self.recorded, "replayed": self.replayed, "misses": self.misses}
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Transport adapter that records responses, or replays them without a connection.
+
+    The decoded body is recorded up to `max_bytes`, the fetcher's size limit,
+    so an oversized page is neither read past the limit nor stored whole, and
+    a replayed page goes through the fetcher's streaming, size limit and
+    caching like a live one.
+    """
+
+    def __init__(self, cassette: Cassette, max_bytes: int | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.max_bytes = max_bytes
+
+    def read_body(self, response: requests.Response) -> bytes:
+        if self.max_bytes is None:
+            return response.content
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=16384):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                break
+        body = b"".join(chunks)[: self.max_bytes]
+        # The rest of an oversized body is never read; the caller reads what was recorded
+        response.close()
+        response._content = body
+        response._content_consumed = True
+        return body
+
+    def send(self, request, stream=False, **kwargs):
+        key = f"{request.method} {request.url}"
+        if self.cassette.replaying:
+            entry = self.cassette.lookup("fetch", key)
+            time.sleep(self.cassette.delay(entry["latency"]))
+            return self.replayed_response(request, entry["response"])
+
+        start = time.perf_counter()
+        response = super().send(request, stream=stream, **kwargs)
+        body = self.read_body(response)
+        self.cassette.record(
+            "fetch",
+            key,
+            {
+                "status": response.status_code,
+                "reason": response.reason,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() not in _WIRE_HEADERS},
+                # latin-1 maps every byte to one character, so any body survives the JSON round trip
+                "body": body.decode("latin-1"),
+            },
+            time.perf_counter() - start,
+        )
+        return response
+
+    def replayed_response(self, request, data: dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = data["status"]
+        response.reason = data["reason"]
+        response.headers = CaseInsensitiveDict(data["headers"])
+        response.raw = io.BytesIO(data["body"].encode("latin-1"))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+
+def llm_key(model_name: str, messages: list, stop, kwargs: dict) -> str:
+    """
+    Identifies a chat request by its model, message contents, tool calls and tools.
+
+    Message and tool call ids are left out, they are random per run.
+    """
+    payload = {
+        "model": model_name,
+        "messages": [
+            {
+                "type": m.type,
+                "content": m.content,
+                "tool_calls": [[c["name"], c["args"]] for c in getattr(m, "tool_calls", None) or []],
+            }
+            for m in messages
+        ],
+        "tools": sorted(t.get("function", t).get("name", "") for t in kwargs.get("tools") or []),
+        "stop": stop,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:32]
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Chat model that records the responses of `inner`, or replays them when it has none.
+
+    Streamed calls record the time to the first token as well, and replay
+    streams the recorded message word by word over the recorded duration.
+    """
+
+    model_name: str
+    cassette: Any = Field(exclude=True)
+    inner: BaseChatModel | None = Field(default=None, exclude=True)
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model_name": self.model_name}
+
+    def bind_tools(self, tools, **kwargs):
+        if self.inner is not None:
+            # The wrapped model formats its tools, so recorded requests match live ones exactly
+            return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _record(self, key: str, message, start: float, ttft: float | None = None) -> None:
+        extra = {"ttft": ttft} if ttft is not None else {}
+        self.cassette.record("llm", key, message_to_dict(message), time.perf_counter() - start, **extra)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        key = llm_key(self.model_name, messages, stop, kwargs)
+        if self.inner is None:
+            entry = self.cassette.lookup("llm", key)
+            time.sleep(self.cassette.delay(entry["latency"]))
+            return ChatResult(generations=[ChatGeneration(message=messages_from_dict([entry["response"]])[0])])
+        start = time.perf_counter()
+        result = self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self._record(key, result.generations[0].message, start)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        key = llm_key(self.model_name, messages, stop, kwargs)
+        if self.inner is None:
+            entry = self.cassette.lookup("llm", key)
+            await asyncio.sleep(self.cassette.delay(entry["latency"]))
+            return ChatResult(generations=[ChatGeneration(message=messages_from_dict([entry["response"]])[0])])
+        start = time.perf_counter()
+        result = await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self._record(key, result.generations[0].message, start)
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        key = llm_key(self.model_name, messages, stop, kwargs)
+        if self.inner is not None:
+            start = time.perf_counter()
+            ttft = None
+            final = None
+            async for chunk in self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                final = chunk if final is None else final + chunk
+                yield chunk
+            if final is not None:
+                self._record(key, message_chunk_to_message(final.message), start, ttft)
+            return
+
+        entry = self.cassette.lookup("llm", key)
+        message = messages_from_dict([entry["response"]])[0]
+        content = message.content if isinstance(message.content, str) else ""
+        pieces = _TOKEN_PIECE.findall(content) or ([content] if content else [])
+        ttft = entry.get("ttft") or 0.0
+        await asyncio.sleep(self.cassette.delay(ttft))
+        step = self.cassette.delay(entry["latency"] - ttft) / max(1, len(pieces))
+        for piece in pieces:
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece, id=message.id))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(step)
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                id=message.id,
+                tool_call_chunks=[
+                    {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                    for i, c in enumerate(message.tool_calls)
+                ],
+                usage_metadata=message.usage_metadata,
+                response_metadata=message.response_metadata,
+            )
+        )
+
+
+cassette = Cassette(CASSETTE_MODE, CASSETTE_PATH, CASSETTE_LATENCY_SCALE)
+
+
+def chat_model(model: str, **kwargs) -> BaseChatModel:
+    """
+    ChatOpenAI for `model`, recorded to or replayed from the cassette when CASSETTE_MODE is set.
+
+    Replay needs neither the openai package loaded nor an API key.
+    """
+    if cassette.replaying:
+        return CassetteChatModel(model_name=model, cassette=cassette, **kwargs)
+    from langchain_openai import ChatOpenAI
+
+    if cassette.recording:
+        # No LLM cache either: a cache hit never reaches the model, so it would never be recorded
+        kwargs["cache"] = False
+        return CassetteChatModel(model_name=model, cassette=cassette, inner=ChatOpenAI(model=model), **kwargs)
+    return ChatOpenAI(model=model, **kwargs)
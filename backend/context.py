@@ -0,0 +1,135 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+import tiktoken
+
+from telemetry import get_logger
+
+log = get_logger("context")
+
+_WORD = re.compile(r"\w+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+# Rough characters-per-token ratio used when the tiktoken encoding is unavailable
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str = "gpt-4o"):
+    # tiktoken downloads its BPE file on first use, fall back to an estimate when offline
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        log.warning("tiktoken encoding unavailable, estimating token counts", extra={"error": str(e)})
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    encoding = _encoding()
+    if encoding is None:
+        return text[: budget * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= budget else encoding.decode(tokens[:budget])
+
+
+def chunk_text(text: str, chunk_tokens: int = 128) -> list[str]:
+    """
+    Splits the text on sentence boundaries into chunks of roughly `chunk_tokens` tokens.
+    """
+    chunks, current, size = [], [], 0
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = count_tokens(sentence)
+        if current and size + tokens > chunk_tokens:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def bm25_scores(query: str, documents: list[str], k1: float = 1.5, b: float = 0.75) -> list[float]:
+    """
+    Okapi BM25 score of every document against the query.
+    """
+    query_terms = set(_WORD.findall(query.lower()))
+    tokenized = [_WORD.findall(doc.lower()) for doc in documents]
+    if not tokenized:
+        return []
+    avg_len = sum(len(doc) for doc in tokenized) / len(tokenized) or 1.0
+    doc_freq = Counter(term for doc in tokenized for term in set(doc) if term in query_terms)
+    n = len(tokenized)
+
+    scores = []
+    for doc in tokenized:
+        counts = Counter(doc)
+        score = 0.0
+        for term in query_terms:
+            tf = counts.get(term, 0)
+            if not tf:
+                continue
+            idf = math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def format_sections(sections: list[tuple[str, str]]) -> str:
+    return "\n\n".join(f"{heading}:\n{text}" if heading else text for heading, text in sections if text)
+
+
+def pack_context(query: str, sections: list[tuple[str, str]], budget: int) -> str:
+    """
+    Fits the (heading, text) sections into `budget` tokens.
+
+    When everything fits the sections are returned as they are. Otherwise every
+    section is chunked, chunks are ranked against the query with BM25 and the
+    best ones are kept until the budget is full. Kept chunks stay in their
+    original order under their section heading.
+    """
+    return truncate_tokens(format_sections(pack_sections(query, sections, budget)), budget)
+
+
+def pack_sections(query: str, sections: list[tuple[str, str]], budget: int) -> list[tuple[str, str]]:
+    """
+    Like pack_context, but returns the packed (heading, text) sections, so the
+    caller can see which sections got nothing into the budget.
+    """
+    if count_tokens(format_sections(sections)) <= budget:
+        return sections
+
+    candidates = []
+    for index, (heading, text) in enumerate(sections):
+        for position, chunk in enumerate(chunk_text(text)):
+            candidates.append((index, position, chunk))
+    scores = bm25_scores(query, [chunk for _, _, chunk in candidates])
+
+    # Headings and separators are paid for up front
+    used = count_tokens(format_sections([(heading, " ") for heading, _ in sections]))
+    kept = []
+    for score, candidate in sorted(zip(scores, candidates), key=lambda item: -item[0]):
+        tokens = count_tokens(candidate[2]) + 1
+        if used + tokens > budget:
+            continue
+        kept.append(candidate)
+        used += tokens
+
+    kept.sort()
+    return [
+        (heading, " ".join(chunk for i, _, chunk in kept if i == index))
+        for index, (heading, _) in enumerate(sections)
+    ]
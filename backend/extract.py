@@ -0,0 +1,86 @@
+from lxml import etree
+
+# Subtrees that never carry useful page text
+BOILERPLATE_TAGS = frozenset(["script", "style", "header", "footer", "nav"])
+
+
+class _TextCollector:
+    """
+    lxml parser target that keeps the visible text of the page.
+
+    Text arrives in document order as the parser streams through the html, so no
+    tree is ever built. Text inside boilerplate subtrees is dropped on the fly and
+    the collector reports `full` once `max_chars` of text have been gathered.
+    """
+
+    def __init__(self, max_chars: int | None = None):
+        self.max_chars = max_chars
+        self.parts = []
+        self.size = 0
+        self._buffer = []
+        self._skip_depth = 0
+
+    @property
+    def full(self) -> bool:
+        return self.max_chars is not None and self.size >= self.max_chars
+
+    def _flush(self):
+        if self._buffer:
+            text = "".join(self._buffer).strip()
+            self._buffer = []
+            if text:
+                self.parts.append(text)
+                self.size += len(text) + 1
+
+    def start(self, tag, attrib):
+        self._flush()
+        if tag in BOILERPLATE_TAGS:
+            self._skip_depth += 1
+
+    def end(self, tag):
+        self._flush()
+        if tag in BOILERPLATE_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def data(self, data):
+        if not self._skip_depth and not self.full:
+            self._buffer.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        text = " ".join(self.parts)
+        return text[: self.max_chars] if self.max_chars is not None else text
+
+
+def extract_text(html: str, max_chars: int | None = None, chunk_size: int = 65536) -> str:
+    """
+    Streams the html through lxml and returns its visible text, joined by single
+    spaces like `BeautifulSoup.get_text(separator=" ", strip=True)`.
+
+    Parsing stops as soon as `max_chars` characters of text have been collected.
+    """
+    collector = _TextCollector(max_chars)
+    parser = etree.HTMLParser(target=collector, recover=True)
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start : start + chunk_size])
+        if collector.full:
+            break
+    return parser.close() if html else ""
+
+
+def extract_text_bs4(html: str) -> str:
+    """
+    Reference extractor: full BeautifulSoup parse with boilerplate tags removed.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Remove unwanted tags (scripts, styles, nav, etc.)
+    for tag in soup(list(BOILERPLATE_TAGS)):
+        tag.extract()
+
+    return soup.get_text(separator=" ", strip=True)
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cassettes import cassette
+from page_store import get_page_store
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+class PageFetcher:
+    """
+    Reusable HTTP fetcher for web pages.
+
+    Keeps a pooled keep-alive session, applies connect/read timeouts, streams
+    the body and stops at `max_bytes`, skips non-HTML responses and revalidates
+    cached pages with If-None-Match / If-Modified-Since.
+
+    `cache` is a page store (see `page_store.PageStore`). Pages stored less than
+    `max_age` seconds ago are served from it without any network call.
+    """
+
+    def __init__(
+        self,
+        cache=None,
+        max_age: float = 86400.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 15.0,
+        max_bytes: int = 2_000_000,
+        pool_size: int = 10,
+    ):
+        self.cache = cache
+        self.max_age = max_age
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_bytes = max_bytes
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = "Mozilla/5.0 (compatible; linkedin-post-agent)"
+
+    def fetch(self, url: str) -> dict:
+        """
+        Fetches the url and returns a dict with the decoded `html`.
+
+        `from_cache` is set when the page came from the store (fresh, or after a
+        304 Not Modified), `truncated` when the body was cut at `max_bytes`, and
+        `skipped` (with an `error`) when the response is not an HTML document.
+        `content_key` identifies the stored body when a cache is configured.
+        """
+        cached = self.cache.get(url) if self.cache else None
+        if cached and time.time() - cached["fetched_at"] < self.max_age:
+            return {"url": url, "html": cached["html"], "from_cache": True, "truncated": False,
+                    "content_key": cached["content_key"]}
+
+        headers = {}
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304 and cached:
+                self.cache.refresh(url)
+                return {"url": url, "html": cached["html"], "from_cache": True, "truncated": False,
+                        "content_key": cached["content_key"]}
+            response.raise_for_status()
+
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in HTML_CONTENT_TYPES:
+                return {
+                    "url": url,
+                    "html": "",
+                    "skipped": True,
+                    "error": f"Unsupported content type: {content_type}",
+                }
+
+            chunks = []
+            size = 0
+            truncated = False
+            for chunk in response.iter_content(chunk_size=16384):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    truncated = True
+                    break
+            body = b"".join(chunks)[: self.max_bytes]
+            html = body.decode(response.encoding or "utf-8", errors="replace")
+
+            content_key = None
+            if self.cache:
+                # A truncated body must not be revalidated later as if it were the full page
+                etag = None if truncated else response.headers.get("ETag")
+                last_modified = None if truncated else response.headers.get("Last-Modified")
+                content_key = self.cache.put(url, etag, last_modified, html)
+
+        return {"url": url, "html": html, "from_cache": False, "truncated": truncated,
+                "content_key": content_key}
+
+
+_page_fetcher = None
+_lock = threading.Lock()
+
+
+def get_page_fetcher() -> PageFetcher:
+    """
+    Returns the fetcher backed by the page store, built on first use.
+
+    While recording there is no page store: a stored page would be served, or
+    revalidated with a 304, without its body reaching the cassette.
+    """
+    global _page_fetcher
+    page_store = None if cassette.recording else get_page_store()
+    with _lock:
+        if _page_fetcher is None:
+            fetcher = PageFetcher(
+                cache=page_store,
+                max_age=float(os.getenv("FETCH_MAX_AGE", "86400")),
+                connect_timeout=float(os.getenv("FETCH_CONNECT_TIMEOUT", "5")),
+                read_timeout=float(os.getenv("FETCH_READ_TIMEOUT", "15")),
+                max_bytes=int(os.getenv("FETCH_MAX_BYTES", "2000000")),
+                pool_size=int(os.getenv("FETCH_POOL_SIZE", "10")),
+            )
+            # Pages are recorded to or replayed from the cassette when CASSETTE_MODE is set
+            cassette.mount(
+                fetcher.session,
+                max_bytes=fetcher.max_bytes,
+                pool_connections=fetcher.pool_size,
+                pool_maxsize=fetcher.pool_size,
+            )
+            _page_fetcher = fetcher
+        return _page_fetcher
+
+
+def __getattr__(name: str):
+    # `from fetcher import page_fetcher` keeps working, nothing is opened until it is asked for
+    if name == "page_fetcher":
+        return get_page_fetcher()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
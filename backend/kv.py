@@ -0,0 +1,349 @@
+import asyncio
+import random
+from urllib.parse import urlparse
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+KV_URL = "redis://127.0.0.1:6379/0"
+
+
+class KVError(Exception):
+    """
+    Error reply from the key-value server.
+    """
+
+
+class KVClient:
+    """
+    Minimal asyncio client for Redis-compatible key-value servers (RESP2).
+
+    Works against Redis, Valkey and compatible servers, and against the local
+    stand-in in `benchmarks/kv_server.py`. Keeps up to `pool_size` connections
+    per event loop, so the instance can be built at import time.
+    """
+
+    def __init__(self, url: str = KV_URL, pool_size: int = 10, timeout: float = 5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pool = None
+        self._loop = None
+        self._open = 0
+
+    @staticmethod
+    def encode(*args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode("utf-8")
+            elif not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    @classmethod
+    async def read_reply(cls, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by the key-value server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            return KVError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = await reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            if length < 0:
+                return None
+            return [await cls.read_reply(reader) for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from the key-value server: {line!r}")
+
+    async def _connect(self):
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            writer.write(b"".join(self.encode(*command) for command in setup))
+            for _ in setup:
+                reply = await self.read_reply(reader)
+                if isinstance(reply, KVError):
+                    raise reply
+        return reader, writer
+
+    async def _acquire(self):
+        loop = asyncio.get_running_loop()
+        if self._pool is None or self._loop is not loop:
+            self._loop = loop
+            self._pool = asyncio.Queue()
+            self._open = 0
+        if self._pool.empty() and self._open < self.pool_size:
+            self._open += 1
+            try:
+                return await self._connect()
+            except BaseException:
+                self._open -= 1
+                raise
+        return await self._pool.get()
+
+    async def pipeline(self, *commands) -> list:
+        """
+        Sends the commands in one round trip and returns their replies in order.
+
+        Error replies are raised as KVError after all replies have been read.
+        """
+        connection = await self._acquire()
+        reader, writer = connection
+        try:
+            writer.write(b"".join(self.encode(*command) for command in commands))
+            replies = [await asyncio.wait_for(self.read_reply(reader), self.timeout) for _ in commands]
+        except BaseException:
+            # A connection with unread replies cannot be reused
+            writer.close()
+            self._open -= 1
+            raise
+        self._pool.put_nowait(connection)
+        for reply in replies:
+            if isinstance(reply, KVError):
+                raise reply
+        return replies
+
+    async def execute(self, *command):
+        return (await self.pipeline(command))[0]
+
+    async def aclose(self) -> None:
+        if self._pool is not None:
+            while not self._pool.empty():
+                _, writer = self._pool.get_nowait()
+                writer.close()
+            self._open = 0
+
+
+class KVSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer on a Redis-compatible key-value server, shared by
+    every worker and node that points at the same server.
+
+    Per thread, a hash `<prefix>thread:<thread_id>` indexes the checkpoints by
+    namespace and id. Each checkpoint is a hash with the serialized checkpoint,
+    its metadata and parent id, and its pending writes are a hash keyed by task
+    and write index.
+
+    Must be created inside a running event loop. The sync methods run the async
+    ones on that loop, so they work from other threads (sync tools, callbacks)
+    but not from the loop itself, where they would deadlock.
+    """
+
+    def __init__(self, client: KVClient, prefix: str = "linkedin_agent:", serde=None):
+        super().__init__(serde=serde)
+        self.client = client
+        self.prefix = prefix
+        try:
+            self.loop = asyncio.get_running_loop()
+        except RuntimeError:
+            raise RuntimeError(
+                "KVSaver must be created inside a running event loop, e.g. with `async with open_checkpointer('kv')`"
+            ) from None
+
+    def _sync(self, coroutine):
+        try:
+            if asyncio.get_running_loop() is self.loop:
+                coroutine.close()
+                raise asyncio.InvalidStateError(
+                    "Synchronous calls to KVSaver are only allowed from another thread. "
+                    "From the event loop use the async interface, e.g. `await graph.ainvoke(...)`."
+                )
+        except RuntimeError:
+            pass
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def _thread_key(self, thread_id: str) -> str:
+        return f"{self.prefix}thread:{thread_id}"
+
+    def _checkpoint_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"{self.prefix}checkpoint:{thread_id}:{checkpoint_ns}:{checkpoint_id}"
+
+    def _writes_key(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"{self.prefix}writes:{thread_id}:{checkpoint_ns}:{checkpoint_id}"
+
+    async def _checkpoint_ids(self, thread_id: str) -> list[tuple[str, str]]:
+        """
+        (namespace, checkpoint id) of every checkpoint of the thread, newest first.
+        """
+        fields = await self.client.execute("HKEYS", self._thread_key(thread_id))
+        ids = [tuple(field.decode("utf-8").split("\x00", 1)) for field in fields]
+        return sorted(ids, key=lambda pair: pair[1], reverse=True)
+
+    async def _load(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        saved, writes = await self.client.pipeline(
+            ("HGETALL", self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id)),
+            ("HGETALL", self._writes_key(thread_id, checkpoint_ns, checkpoint_id)),
+        )
+        if not saved:
+            return None
+        saved = dict(zip(saved[::2], saved[1::2]))
+        pending = []
+        for field, value in zip(writes[::2], writes[1::2]):
+            task_id, idx = field.decode("utf-8").rsplit("\x00", 1)
+            channel, type_, data = value.split(b"\x00", 2)
+            pending.append((task_id, int(idx), channel.decode("utf-8"), self.serde.loads_typed((type_.decode(), data))))
+        pending.sort(key=lambda write: write[:2])
+        parent_id = saved[b"parent"].decode("utf-8")
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((saved[b"type"].decode(), saved[b"checkpoint"])),
+            metadata=self.serde.loads_typed((saved[b"metadata_type"].decode(), saved[b"metadata"])),
+            pending_writes=[(task_id, channel, value) for task_id, _, channel, value in pending],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+        )
+
+    async def aget_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        if not checkpoint_id:
+            ids = [cid for ns, cid in await self._checkpoint_ids(thread_id) if ns == checkpoint_ns]
+            if not ids:
+                return None
+            checkpoint_id = ids[0]
+        return await self._load(thread_id, checkpoint_ns, checkpoint_id)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        if config is None:
+            keys = await self.client.execute("KEYS", f"{self.prefix}thread:*")
+            thread_ids = [key.decode("utf-8")[len(f"{self.prefix}thread:"):] for key in keys]
+        else:
+            thread_ids = [config["configurable"]["thread_id"]]
+        config_ns = config["configurable"].get("checkpoint_ns") if config else None
+        config_id = get_checkpoint_id(config) if config else None
+        before_id = get_checkpoint_id(before) if before else None
+        for thread_id in thread_ids:
+            for checkpoint_ns, checkpoint_id in await self._checkpoint_ids(thread_id):
+                if config_ns is not None and checkpoint_ns != config_ns:
+                    continue
+                if config_id and checkpoint_id != config_id:
+                    continue
+                if before_id and checkpoint_id >= before_id:
+                    continue
+                saved = await self._load(thread_id, checkpoint_ns, checkpoint_id)
+                if saved is None:
+                    continue
+                if filter and not all(saved.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                if limit is not None:
+                    if limit <= 0:
+                        return
+                    limit -= 1
+                yield saved
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        type_, data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        # The checkpoint is written before the index entry, so readers never find one without the other
+        await self.client.pipeline(
+            (
+                "HSET",
+                self._checkpoint_key(thread_id, checkpoint_ns, checkpoint["id"]),
+                "type", type_,
+                "checkpoint", data,
+                "metadata_type", metadata_type,
+                "metadata", metadata_data,
+                "parent", config["configurable"].get("checkpoint_id") or "",
+            ),
+            ("HSET", self._thread_key(thread_id), f"{checkpoint_ns}\x00{checkpoint['id']}", ""),
+        )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key = self._writes_key(thread_id, checkpoint_ns, config["configurable"]["checkpoint_id"])
+        commands = []
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            type_, data = self.serde.dumps_typed(value)
+            # Regular writes are kept from the first attempt, special channels are overwritten
+            command = "HSET" if idx < 0 else "HSETNX"
+            commands.append((command, key, f"{task_id}\x00{idx}", b"\x00".join([channel.encode(), type_.encode(), data])))
+        if commands:
+            await self.client.pipeline(*commands)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        keys = [self._thread_key(thread_id)]
+        for checkpoint_ns, checkpoint_id in await self._checkpoint_ids(thread_id):
+            keys.append(self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id))
+            keys.append(self._writes_key(thread_id, checkpoint_ns, checkpoint_id))
+        await self.client.execute("DEL", *keys)
+
+    def get_tuple(self, config):
+        return self._sync(self.aget_tuple(config))
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        checkpoints = self.alist(config, filter=filter, before=before, limit=limit)
+        while True:
+            try:
+                yield self._sync(anext(checkpoints))
+            except StopAsyncIteration:
+                return
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        return self._sync(self.aput(config, checkpoint, metadata, new_versions))
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        return self._sync(self.aput_writes(config, writes, task_id, task_path))
+
+    def delete_thread(self, thread_id: str) -> None:
+        return self._sync(self.adelete_thread(thread_id))
+
+    def get_next_version(self, current, channel) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
@@ -0,0 +1,274 @@
+import asyncio
+import os
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from telemetry import get_logger
+
+log = get_logger("linkedin")
+
+LINKEDIN_API_URL = "https://api.linkedin.com/rest/posts"
+LINKEDIN_VERSION = "202408"
+
+# Statuses that say the post was not created and is worth another attempt
+RETRYABLE_STATUS_CODES = {429}
+# How many of the author's latest posts are searched for a post whose outcome is
+# unknown, 100 is the most the posts finder returns at once
+RECENT_POSTS_COUNT = int(os.getenv("LINKEDIN_RECENT_POSTS", "100"))
+
+
+def retry_after_seconds(headers) -> float | None:
+    value = headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class BaseLinkedInClient:
+    """
+    Credentials, request building and result parsing shared by both clients.
+
+    Each client holds the credentials of one account, so several accounts are
+    served by one client each. Results are plain dicts: `success`, `post_id`
+    and `status_code`, plus `error`, `details`, `retryable`, `ambiguous` and
+    `retry_after` on failure. `status_code` is None when no response came back.
+
+    Only failures where the post was certainly not created are `retryable`:
+    the connection was never made, or the API answered 429. A 5xx answer, or
+    a timeout or dropped connection after the request was sent, may come after
+    LinkedIn created the post, so those are `ambiguous` and not retried.
+    """
+
+    def __init__(
+        self,
+        user_urn: str | None,
+        access_token: str | None,
+        api_url: str = LINKEDIN_API_URL,
+        connect_timeout: float = 5,
+        read_timeout: float = 30,
+        pool_size: int = 10,
+    ):
+        self.user_urn = user_urn
+        self.access_token = access_token
+        self.api_url = api_url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+            "X-Restli-Protocol-Version": "2.0.0",
+            "LinkedIn-Version": LINKEDIN_VERSION,
+        }
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """
+        Client for the account configured by USER_URN and LINKEDIN_ACCESS_TOKEN.
+        """
+        kwargs.setdefault("api_url", os.getenv("LINKEDIN_API_URL", LINKEDIN_API_URL))
+        kwargs.setdefault("read_timeout", float(os.getenv("LINKEDIN_TIMEOUT", "30")))
+        return cls(os.getenv("USER_URN"), os.getenv("LINKEDIN_ACCESS_TOKEN"), **kwargs)
+
+    def missing_credentials(self):
+        if self.user_urn and self.access_token:
+            return None
+        error_msg = "LinkedIn API credentials (USER_URN, ACCESS_TOKEN) are not set in the environment."
+        return {"success": False, "error": error_msg, "details": None, "status_code": None, "retryable": False}
+
+    def request_headers(self, idempotency_key: str | None) -> dict:
+        """
+        The `idempotency_key` is sent as `X-Idempotency-Key`. The LinkedIn API
+        ignores it; only a deduplicating proxy or `benchmarks/fake_linkedin.py`
+        recognise retries of the same post by it.
+        """
+        if not idempotency_key:
+            return self.headers
+        return {**self.headers, "X-Idempotency-Key": idempotency_key}
+
+    def post_data(self, content: str, visibility: str) -> dict:
+        # Structure of the post data as per LinkedIn API documentation
+        return {
+            "author": self.user_urn,
+            "commentary": content,
+            "visibility": visibility,
+            "distribution": {"feedDistribution": "MAIN_FEED"},
+            "lifecycleState": "PUBLISHED",
+            "isReshareDisabledByAuthor": False,
+        }
+
+    @staticmethod
+    def parse_response(status_code: int, headers, text: str, json_body) -> dict:
+        if status_code >= 400:
+            return {
+                "success": False,
+                "error": f"HTTP Error: {status_code}",
+                "details": text or "No response body",
+                "status_code": status_code,
+                "retryable": status_code in RETRYABLE_STATUS_CODES,
+                "ambiguous": status_code >= 500,
+                "retry_after": retry_after_seconds(headers),
+            }
+        # The API returns the new post's URN in a header and usually an empty body
+        post_id = headers.get("x-restli-id")
+        if text:
+            try:
+                post_id = json_body().get("id", post_id)
+            except ValueError:
+                log.warning("Received a non-JSON success response from LinkedIn", extra={"status_code": status_code})
+        return {"success": True, "post_id": post_id, "status_code": status_code}
+
+    def recent_posts_params(self, count: int) -> dict:
+        # Posts finder: the author's posts, most recently changed first
+        return {"q": "author", "author": self.user_urn, "count": count, "sortBy": "LAST_MODIFIED"}
+
+    def recent_posts_headers(self) -> dict:
+        return {**self.headers, "X-RestLi-Method": "FINDER"}
+
+    @staticmethod
+    def match_post(content: str, status_code: int, text: str, json_body) -> dict:
+        """
+        Looks for `content` among the posts of a finder response. The API keeps
+        no idempotency key, so posts are matched on their text. `post_id` is
+        None when no recent post has that text.
+        """
+        if status_code >= 400:
+            return {
+                "success": False,
+                "error": f"HTTP Error: {status_code}",
+                "details": text or "No response body",
+                "status_code": status_code,
+            }
+        try:
+            elements = json_body().get("elements", [])
+        except ValueError:
+            return {"success": False, "error": "Non-JSON posts response", "details": text, "status_code": status_code}
+        wanted = content.strip()
+        post_id = next((post.get("id") for post in elements if (post.get("commentary") or "").strip() == wanted), None)
+        return {"success": True, "post_id": post_id, "status_code": status_code}
+
+    @staticmethod
+    def request_error(error: Exception, sent: bool) -> dict:
+        """
+        Result for a request that got no response. A request that was never
+        sent can be retried, one that was sent may have created the post.
+        """
+        return {
+            "success": False,
+            "error": str(error),
+            "details": None,
+            "status_code": None,
+            "retryable": not sent,
+            "ambiguous": sent,
+        }
+
+
+class LinkedInClient(BaseLinkedInClient):
+    """
+    Blocking LinkedIn posts client on a keep-alive `requests.Session`, so
+    consecutive posts reuse pooled connections instead of a new TLS handshake.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def create_post(self, content: str, visibility: str = "PUBLIC", idempotency_key: str | None = None) -> dict:
+        if error := self.missing_credentials():
+            return error
+        try:
+            response = self.session.post(
+                self.api_url,
+                headers=self.request_headers(idempotency_key),
+                json=self.post_data(content, visibility),
+                timeout=(self.connect_timeout, self.read_timeout),
+            )
+        except requests.exceptions.RequestException as e:
+            # Failed connects carry urllib3's NewConnectionError, anything else may have sent the body
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            unsent = isinstance(e, requests.exceptions.ConnectTimeout) or isinstance(reason, NewConnectionError)
+            return self.request_error(e, sent=not unsent)
+        return self.parse_response(response.status_code, response.headers, response.text, response.json)
+
+    def find_post(self, content: str, count: int = RECENT_POSTS_COUNT) -> dict:
+        """
+        Searches the account's `count` latest posts for one with this content.
+        """
+        if error := self.missing_credentials():
+            return error
+        try:
+            response = self.session.get(
+                self.api_url,
+                headers=self.recent_posts_headers(),
+                params=self.recent_posts_params(count),
+                timeout=(self.connect_timeout, self.read_timeout),
+            )
+        except requests.exceptions.RequestException as e:
+            return {"success": False, "error": str(e), "details": None, "status_code": None}
+        return self.match_post(content, response.status_code, response.text, response.json)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncLinkedInClient(BaseLinkedInClient):
+    """
+    Non-blocking LinkedIn posts client on a pooled `httpx.AsyncClient`.
+
+    The httpx client is created on first use, and again if used from another
+    event loop, so the instance can be built at import time.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._client = None
+        self._loop = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        return self._client
+
+    async def create_post(self, content: str, visibility: str = "PUBLIC", idempotency_key: str | None = None) -> dict:
+        if error := self.missing_credentials():
+            return error
+        try:
+            response = await self.client.post(
+                self.api_url,
+                headers=self.request_headers(idempotency_key),
+                json=self.post_data(content, visibility),
+            )
+        except httpx.HTTPError as e:
+            unsent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+            return self.request_error(e, sent=not unsent)
+        return self.parse_response(response.status_code, response.headers, response.text, response.json)
+
+    async def find_post(self, content: str, count: int = RECENT_POSTS_COUNT) -> dict:
+        if error := self.missing_credentials():
+            return error
+        try:
+            response = await self.client.get(
+                self.api_url, headers=self.recent_posts_headers(), params=self.recent_posts_params(count)
+            )
+        except httpx.HTTPError as e:
+            return {"success": False, "error": str(e), "details": None, "status_code": None}
+        return self.match_post(content, response.status_code, response.text, response.json)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
@@ -1,78 +1,126 @@
-import requests
-import os
+import hashlib
 import json
+import os
+import threading
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
+# Load environment variables from .env file, before the modules below read
+# their settings (CASSETTE_MODE, LOG_*) at import time
 load_dotenv()
 
-# It's safer to check if the environment variables exist
-USER_URN = os.getenv("USER_URN")
-ACCESS_TOKEN = os.getenv("LINKEDIN_ACCESS_TOKEN")
+from cassettes import cassette
+from linkedin_client import AsyncLinkedInClient, LinkedInClient
+from telemetry import get_logger
+
+log = get_logger("linkedin")
+
+# Clients for the account configured in the environment (USER_URN, LINKEDIN_ACCESS_TOKEN),
+# used for posts that name no account
+linkedin_client = LinkedInClient.from_env(pool_size=int(os.getenv("LINKEDIN_POOL_SIZE", "10")))
+async_linkedin_client = AsyncLinkedInClient.from_env(pool_size=int(os.getenv("LINKEDIN_POOL_SIZE", "10")))
+
+# Further accounts as JSON, mapping an account id to its credentials:
+# {"acme": {"user_urn": "urn:li:organization:123", "access_token": "..."}}
+LINKEDIN_ACCOUNTS = json.loads(os.getenv("LINKEDIN_ACCOUNTS") or "{}")
+
+_account_clients = {}
+_lock = threading.Lock()
+
+
+def known_account(account: str | None) -> bool:
+    return account is None or account in LINKEDIN_ACCOUNTS
+
+
+def account_client(account: str | None, cls=AsyncLinkedInClient):
+    """
+    Returns the client of `cls` for the account, built on first use and kept
+    for its connection pool. None names the account of the environment.
+    Returns None for an account that is not configured.
+    """
+    default = async_linkedin_client if cls is AsyncLinkedInClient else linkedin_client
+    if account is None:
+        return default
+    with _lock:
+        if (account, cls) not in _account_clients:
+            credentials = LINKEDIN_ACCOUNTS.get(account)
+            if credentials is None:
+                return None
+            _account_clients[(account, cls)] = cls(
+                credentials["user_urn"],
+                credentials["access_token"],
+                api_url=default.api_url,
+                connect_timeout=default.connect_timeout,
+                read_timeout=default.read_timeout,
+                pool_size=default.pool_size,
+            )
+        return _account_clients[(account, cls)]
+
+
+def unknown_account(account: str) -> dict:
+    error_msg = f"LinkedIn account {account!r} is not configured in LINKEDIN_ACCOUNTS."
+    return {"success": False, "error": error_msg, "details": None, "status_code": None, "retryable": False}
+
+
+def cassette_key(content: str, account: str | None = None) -> str:
+    # Idempotency keys hold the session id, which differs on replay, the content does not
+    key = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    return key if account is None else f"{account}:{key}"
+
+
+def report(result: dict) -> dict:
+    if result["success"]:
+        log.info("Posted to LinkedIn", extra={"post_id": result["post_id"]})
+    else:
+        log.warning(
+            "Error posting to LinkedIn",
+            extra={"error": result["error"], "details": result["details"], "status_code": result["status_code"]},
+        )
+    return result
+
+
+def create_linkedin_post(
+    content: str, visibility: str = "PUBLIC", idempotency_key: str | None = None, account: str | None = None
+):
+    """
+    Takes the content as input and posts it to LinkedIn with the pooled client of the account.
+    """
+    log.info("Attempting to post to LinkedIn", extra={"account": account})
+    client = account_client(account, LinkedInClient)
+    if client is None:
+        return report(unknown_account(account))
+    result = cassette.call(
+        "linkedin", cassette_key(content, account), client.create_post, content, visibility, idempotency_key
+    )
+    return report(result)
+
+
+async def acreate_linkedin_post(
+    content: str, visibility: str = "PUBLIC", idempotency_key: str | None = None, account: str | None = None
+):
+    """
+    Async variant of `create_linkedin_post`, used by the outbox workers.
+    """
+    log.info("Attempting to post to LinkedIn", extra={"account": account})
+    client = account_client(account)
+    if client is None:
+        return report(unknown_account(account))
+    result = await cassette.acall(
+        "linkedin", cassette_key(content, account), client.create_post, content, visibility, idempotency_key
+    )
+    return report(result)
 
 
-def create_linkedin_post(content: str, visibility: str = "PUBLIC"):
+async def afind_linkedin_post(content: str, account: str | None = None) -> dict:
     """
-    Takes the content as input and posts it to LinkedIn.
+    Looks for an already published post with this content among the account's
+    latest posts, used to settle posts whose publish outcome is unknown.
     """
-    # Check for the presence of necessary credentials
-    if not USER_URN or not ACCESS_TOKEN:
-        error_msg = "LinkedIn API credentials (USER_URN, ACCESS_TOKEN) are not set in the environment."
-        print(f"Error: {error_msg}")
-        return {"success": False, "error": error_msg}
-
-    url = "https://api.linkedin.com/rest/posts"
-
-    headers = {
-        "Authorization": f"Bearer {ACCESS_TOKEN}",
-        "Content-Type": "application/json",  # requests handles the charset with the `json` param
-        "X-Restli-Protocol-Version": "2.0.0",
-        "LinkedIn-Version": "202408",
-    }
-
-    # Structure of the post data as per LinkedIn API documentation
-    post_data = {
-        "author": USER_URN,
-        "commentary": content,
-        "visibility": visibility,
-        "distribution": {"feedDistribution": "MAIN_FEED"},
-        "lifecycleState": "PUBLISHED",
-        "isReshareDisabledByAuthor": False,
-    }
-
-    try:
-        print("\nAttempting to post to LinkedIn...")
-        # **KEY FIX**: Use the `json` parameter to let `requests` handle encoding.
-        # This is the standard and most reliable way to send JSON data.
-        response = requests.post(url, headers=headers, json=post_data)
-
-        # This will raise an HTTPError for bad responses (4xx or 5xx)
-        response.raise_for_status()
-        print("Successfully posted to LinkedIn!")
-
-        # Check if the response has content before trying to parse JSON.
-        post_id = None
-        if response.text:
-            try:
-                post_id = response.json().get("id")
-            except requests.exceptions.JSONDecodeError:
-                print("Warning: Received a non-JSON success response from LinkedIn.")
-
-        return {
-            "success": True,
-            "post_id": post_id,
-            "status_code": response.status_code,
-        }
-    except requests.exceptions.HTTPError as e:
-        error_details = e.response.text if e.response else "No response body"
-        status_code = e.response.status_code if e.response else "N/A"
-        print(f"HTTP Error posting to LinkedIn: {e}")
-        print(f"Response Details: {error_details}")
-        return {
-            "success": False,
-            "error": f"HTTP Error: {status_code}",
-            "details": error_details,
-        }
-    except requests.exceptions.RequestException as e:
-        print(f"An unexpected request error occurred: {e}")
-        return {"success": False, "error": str(e), "details": None}
\ No newline at end of file
+    client = account_client(account)
+    if client is None:
+        return unknown_account(account)
+    result = await cassette.acall(
+        "linkedin", "find:" + cassette_key(content, account), client.find_post, content
+    )
+    if not result["success"]:
+        log.warning("Error looking up LinkedIn posts", extra={"error": result["error"], "status_code": result["status_code"]})
+    return result
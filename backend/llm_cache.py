@@ -0,0 +1,155 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+
+class LLMCache(BaseCache):
+    """
+    Persistent exact-match cache for LLM responses.
+
+    Entries are keyed on a hash of the model string (model name and parameters,
+    as provided by LangChain) and the prompt. Storage is a SQLite table bounded
+    to `max_entries` rows with LRU eviction, fronted by an in-process LRU of
+    `memory_entries` decoded responses so repeated hits skip SQLite entirely.
+    Several call sites can share one file, each through its own instance so
+    hit rates are reported per site.
+    """
+
+    _connections = {}
+    _connections_lock = threading.Lock()
+
+    def __init__(self, path: str, name: str, max_entries: int = 10000, memory_entries: int = 256):
+        self.name = name
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._conn, self._lock = self._connect(path)
+
+    @classmethod
+    def _connect(cls, path: str):
+        with cls._connections_lock:
+            if path not in cls._connections:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS llm_responses (
+                        key TEXT PRIMARY KEY,
+                        response TEXT NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_llm_last_access ON llm_responses (last_access)"
+                )
+                conn.commit()
+                cls._connections[path] = (conn, threading.Lock())
+            return cls._connections[path]
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, value) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str):
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            row = self._conn.execute(
+                "SELECT response FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_responses SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            with warnings.catch_warnings():
+                # `loads` is flagged as beta by langchain-core
+                warnings.simplefilter("ignore")
+                value = loads(row[0])
+            self._remember(key, value)
+        return value
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            self._remember(key, return_val)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, last_access) VALUES (?, ?, ?)",
+                (key, dumps(return_val), time.time()),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM llm_responses WHERE key IN (
+                    SELECT key FROM llm_responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+# Call sites that may use the cache, with the env flag that enables each of them
+CACHE_FLAGS = {
+    "improve_input": "LLM_CACHE_IMPROVE_INPUT",
+    "summarize": "LLM_CACHE_SUMMARIZE",
+}
+
+llm_caches = {}
+
+
+def llm_cache(call_site: str):
+    """
+    Returns the cache for the call site, or None when its flag is turned off.
+    """
+    if os.getenv(CACHE_FLAGS[call_site], "1").lower() in ("0", "false", "no"):
+        return None
+    if call_site not in llm_caches:
+        llm_caches[call_site] = LLMCache(LLM_CACHE_PATH, call_site, LLM_CACHE_MAX_ENTRIES)
+    return llm_caches[call_site]
+
+
+def llm_cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in llm_caches.items()}
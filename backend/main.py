@@ -1,29 +1,71 @@
+import asyncio
+import functools
+import os
+import re
+import time
 import uuid
+import hashlib
 from typing import Annotated
 from dotenv import load_dotenv
-from langgraph.graph import StateGraph, END
+
+# Load environment variables from .env file, before the local modules read their settings
+load_dotenv()
+
+from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
 from typing_extensions import TypedDict
 import requests
 
-# Note: The 'duckduckgo-search' library has been renamed to 'ddgs'.
-# It's recommended to 'pip install -U ddgs' and use the new library.
-from ddgs import DDGS
-
 # Local imports from your other files
-from Prompt import linkedin_post_prompt, improve_user_query, summarize_text_query
-from linkedin_script import create_linkedin_post
+from Prompt import linkedin_post_prompt, improve_user_query, summarize_text_query, reduce_summaries_query, revise_post_query
+# The stores open their SQLite files on first use, so importing this module creates nothing
+from outbox import get_outbox, get_publisher
+from scheduler import get_scheduler
+from search_cache import get_search_cache, normalize_query
+from fetcher import get_page_fetcher
+from page_store import get_page_store, normalize_url
+from extract import extract_text
+from llm_cache import llm_cache
+from context import count_tokens, format_sections, pack_context, pack_sections, truncate_tokens
+from telemetry import get_logger, session_id_var
+from cassettes import cassette, chat_model
+
+log = get_logger("agent")
 
 
-# Load environment variables from .env file
-load_dotenv()
+# --- State Definition ---
+def compact_messages(left: list[BaseMessage], right) -> list[BaseMessage]:
+    """
+    Reducer for the message history.
+
+    New messages are appended, a message whose id is already present replaces
+    the stored one (this is how the agent swaps consumed tool outputs for their
+    compact form), and only the latest draft, an AI message without tool calls,
+    is kept. The history therefore stays the same size across revisions.
+    """
+    if not isinstance(right, list):
+        right = [right]
+    merged = list(left)
+    positions = {msg.id: i for i, msg in enumerate(merged)}
+    for msg in right:
+        if msg.id is None:
+            msg.id = str(uuid.uuid4())
+        if msg.id in positions:
+            merged[positions[msg.id]] = msg
+        else:
+            positions[msg.id] = len(merged)
+            merged.append(msg)
 
+    drafts = [i for i, msg in enumerate(merged) if isinstance(msg, AIMessage) and not msg.tool_calls]
+    if len(drafts) > 1:
+        stale = set(drafts[:-1])
+        merged = [msg for i, msg in enumerate(merged) if i not in stale]
+    return merged
 
-# --- State Definition ---
 class State(TypedDict):
     """
     Represents the state of our graph.
@@ -34,113 +76,482 @@ class State(TypedDict):
         generated_post: The latest version of the generated post content.
         feedback: The latest human feedback provided for revision.
         ready_to_post: A boolean flag to indicate if the post is approved.
+        tool_results: The tool context that was passed to the last agent turn.
+        summaries: Cache of tool output summaries keyed by tool_call_id and content hash, and the
+            context of each compacted tool output keyed by "context:<tool_call_id>".
+        input_path: How the topic was prepared: "url" or "clean" (used as is) or "refine" (LLM).
+        url: Optional URL provided alongside the topic, prefetched while the topic is prepared.
+        publish_at: Optional Unix timestamp the approved post should be published at.
+        account: Optional id of the LinkedIn account to publish as (see LINKEDIN_ACCOUNTS),
+            the account of the environment when unset.
+        outbox_id: Id of the publish outbox entry once the post has been approved.
+        schedule_id: Id of the scheduler entry when the post was approved for later.
+        revision_path: How the last feedback was applied: "light" (small LLM edit) or "agent".
     """
 
-    messages: Annotated[list[BaseMessage], lambda x, y: x + y]
+    messages: Annotated[list[BaseMessage], compact_messages]
     topic: str
     generated_post: str
     feedback: str
     ready_to_post: bool
     tool_results: str
+    summaries: Annotated[dict[str, str], lambda x, y: {**x, **y}]
+    input_path: str
+    url: str
+    publish_at: float
+    account: str
+    outbox_id: int
+    schedule_id: int
+    revision_path: str
 
 
 # --- Tools ---
+# Also prefetch a web search on the raw topic while the input is being prepared
+PREFETCH_SEARCH = os.getenv("PREFETCH_SEARCH", "0").lower() in ("1", "true", "yes")
+# Maximum characters of page text kept from a fetched url
+EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", "50000"))
+
+# In-flight lookups shared by concurrent sessions, so a batch asking for the same
+# topic or url at once makes a single network call
+_inflight: dict[str, asyncio.Task] = {}
+
+async def coalesce(key: str, func, *args):
+    """
+    Runs func(*args) in a worker thread, or joins the identical call already in flight
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+def _ddgs_text(topic: str) -> list:
+    # Recording skips the cache, so every search lands in the cassette and replays from empty caches
+    if cassette.recording:
+        return cassette.call("search", normalize_query(topic), _ddgs_search, topic)
+    # Repeated topics are served from the local cache without a network call
+    results = get_search_cache().get(topic)
+    if results is not None:
+        log.info("Search cache hit", extra={"topic": topic})
+        return results
+    results = cassette.call("search", normalize_query(topic), _ddgs_search, topic)
+    get_search_cache().set(topic, results or [])
+    return results
+
+def _ddgs_search(topic: str) -> list:
+    # Note: The 'duckduckgo-search' library has been renamed to 'ddgs'.
+    # Imported here as it is only needed on a cache miss
+    from ddgs import DDGS
+
+    with DDGS() as ddgs:
+        return ddgs.text(topic, max_results=5)
+
 @tool
-def web_search(topic: str) -> str:
+async def web_search(topic: str) -> str:
     """
     Takes a topic as input, performs a web search, and returns the top 5 results as a formatted string.
     This tool is used to gather current information or data for the LinkedIn post.
     """
-    print(f"---TOOL: Performing web search for topic: '{topic}'---")
+    log.info("Performing web search", extra={"topic": topic})
     try:
-        with DDGS() as ddgs:
-            results = ddgs.text(topic, max_results=5)
-            if not results:
-                return "No results found."
-            # Format results into a single, clean string for the LLM
-            formatted_results = "\n\n".join(
-                [f"Title: {r['title']}\nSnippet: {r['body']}" for r in results]
-            )
-            return formatted_results
+        # DDGS is a blocking client, run it off the event loop
+        results = await coalesce(f"search:{normalize_query(topic)}", _ddgs_text, topic)
+        if not results:
+            return "No results found."
+        # Format results into a single, clean string for the LLM
+        formatted_results = "\n\n".join(
+            [f"Title: {r['title']}\nSnippet: {r['body']}" for r in results]
+        )
+        return formatted_results
     except Exception as e:
-        print(f"Error during web search: {e}")
+        log.warning("Web search failed", extra={"topic": topic, "error": str(e)})
         return f"An error occurred during web search: {e}"
 
+def page_text(page: dict) -> str:
+    """
+    Returns the extracted text of a fetched page, reusing the stored extraction when present
+    """
+    content_key = page.get("content_key")
+    extractor = f"lxml:{EXTRACT_MAX_CHARS}"
+    if content_key:
+        text = get_page_store().get_text(content_key, extractor)
+        if text is not None:
+            return text
+    text = extract_text(page["html"], EXTRACT_MAX_CHARS)
+    if content_key:
+        get_page_store().put_text(content_key, extractor, text)
+    return text
+
 @tool
-def fetch_url_data(url: str):
+async def fetch_url_data(url: str):
     """ This methods takes url as the input and returns the content
     """
-    print(f"---TOOL: Performing get call for url: '{url}'---")
-    output = requests.get(url=url)
-    from bs4 import BeautifulSoup
+    log.info("Fetching url", extra={"url": url})
+    try:
+        page = await coalesce(f"fetch:{normalize_url(url)}", get_page_fetcher().fetch, url)
+    # Malformed urls raise ValueError from urllib before any request is made
+    except (requests.exceptions.RequestException, ValueError) as e:
+        log.warning("Fetching url failed", extra={"url": url, "error": str(e)})
+        return f"An error occurred while fetching the url: {e}"
+    if page.get("skipped"):
+        return f"The url could not be used as context. {page['error']}"
+    return await asyncio.to_thread(page_text, page)
 
-    soup = BeautifulSoup(output.text, "html.parser")
 
-    # Remove unwanted tags (scripts, styles, nav, etc.)
-    for tag in soup(["script", "style", "header", "footer", "nav"]):
-        tag.extract()
+# --- Model and Tools Initialization ---
+class Models:
+    """
+    The chat models and tools a graph runs with.
+
+    Anything not injected gets the default: gpt-4o drafts the post, gpt-4o-mini
+    serves the helper calls, each call site with its own response cache. Light
+    revisions use `revise_llm`, which falls back to an injected `small_llm`. The
+    OpenAI clients are only created when a node first uses them, so building a
+    graph needs neither the openai package loaded nor an API key. With
+    CASSETTE_MODE set the defaults record to or replay from the cassette.
+    """
 
-    page_text = soup.get_text(separator=" ", strip=True)
-    return page_text
+    def __init__(self, main_llm=None, small_llm=None, improve_llm=None, revise_llm=None, tools=None):
+        self._main_llm = main_llm
+        self._small_llm = small_llm
+        self._improve_llm = improve_llm
+        self._revise_llm = revise_llm
+        self._llm_with_tools = None
+        self.tools = tools if tools is not None else [web_search, fetch_url_data]
+        self.tools_by_name = {t.name: t for t in self.tools}
+
+    @property
+    def main_llm(self):
+        if self._main_llm is None:
+            self._main_llm = chat_model("gpt-4o")
+        return self._main_llm
+
+    @property
+    def small_llm(self):
+        if self._small_llm is None:
+            self._small_llm = chat_model("gpt-4o-mini", cache=llm_cache("summarize"), tags=["summarize"])
+        return self._small_llm
+
+    @property
+    def improve_llm(self):
+        if self._improve_llm is None:
+            self._improve_llm = chat_model("gpt-4o-mini", cache=llm_cache("improve_input"), tags=["improve_input"])
+        return self._improve_llm
+
+    @property
+    def revise_llm(self):
+        if self._revise_llm is None:
+            if self._small_llm is not None:
+                self._revise_llm = self._small_llm.with_config(tags=["revise"])
+            else:
+                # Not cached: the same draft and feedback rarely come twice
+                self._revise_llm = chat_model("gpt-4o-mini", tags=["revise"])
+        return self._revise_llm
+
+    @property
+    def llm_with_tools(self):
+        if self._llm_with_tools is None:
+            # The "draft" tag lets streaming consumers pick the post tokens out of all LLM calls,
+            # and names the call site in the metrics like the tags of the helper models
+            self._llm_with_tools = self.main_llm.bind_tools(self.tools).with_config(tags=["draft"])
+        return self._llm_with_tools
+
+# Context window of the summarize model (gpt-4o-mini), and the part of it kept for the prompt
+# template and the summary it returns. Larger inputs cannot go through one call at all.
+SUMMARY_CONTEXT_TOKENS = int(os.getenv("SUMMARY_CONTEXT_TOKENS", "128000"))
+SUMMARY_HEADROOM_TOKENS = int(os.getenv("SUMMARY_HEADROOM_TOKENS", "4000"))
+SUMMARY_MAX_INPUT_TOKENS = SUMMARY_CONTEXT_TOKENS - SUMMARY_HEADROOM_TOKENS
+# Texts above this many tokens are summarized with map-reduce over chunks of MAP_REDUCE_CHUNK_TOKENS.
+# benchmarks/map_reduce.py puts the latency crossover near 10k tokens once prompt processing costs
+# ~0.5s per 1k tokens; below it one call is faster and cheaper. Never above what one call can take.
+MAP_REDUCE_THRESHOLD_TOKENS = min(int(os.getenv("MAP_REDUCE_THRESHOLD_TOKENS", "10000")), SUMMARY_MAX_INPUT_TOKENS)
+MAP_REDUCE_CHUNK_TOKENS = int(os.getenv("MAP_REDUCE_CHUNK_TOKENS", "4000"))
+MAP_REDUCE_MAX_CONCURRENCY = int(os.getenv("MAP_REDUCE_MAX_CONCURRENCY", "8"))
+# Token budget of the tool context inserted into the post prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+# Size a tool output is cut down to in the history once the agent has consumed it
+COMPACT_TOOL_TOKENS = int(os.getenv("COMPACT_TOOL_TOKENS", "300"))
+# Apply feedback that only reworks the draft with revise_llm instead of the full agent
+LIGHT_REVISIONS = os.getenv("LIGHT_REVISIONS", "1").lower() in ("1", "true", "yes")
+# Print the graph as ASCII art whenever it is compiled (needs grandalf)
+PRINT_GRAPH = os.getenv("PRINT_GRAPH", "0").lower() in ("1", "true", "yes")
+
+URL_PATTERN = re.compile(r"https?://\S+")
+WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z'’-]*")
+# Feedback asking to rework the existing draft: length, tone, format, wording
+LIGHT_EDIT_PATTERN = re.compile(
+    r"\b(short(er|en)?|long(er)?|lengthen|concise|brief(er)?|trim|cut|condense|tighten|"
+    r"hashtags?|emojis?|tone|formal|informal|casual|friendly|professional|conversational|"
+    r"rephrase|reword|rewrite|wording|grammar|typos?|spelling|punctuation|bullets?|"
+    r"format(ting)?|paragraphs?|line breaks?|remove|drop|delete|simplify|simpler|"
+    r"punch(y|ier)|hook|opening|intro|ending|closing|conclusion|question|first person|"
+    r"sentences?|words?|style|voice|capitali[sz]e|exclamation|jargon)\b",
+    re.IGNORECASE,
+)
+# Feedback that needs information the draft does not have yet, including a change of topic
+# ("rewrite it about Python instead"), which wins over the light cues it often contains
+NEW_INFO_PATTERN = re.compile(
+    r"https?://|\b(search|research|look up|latest|recent|news|current|up[- ]to[- ]date|"
+    r"statistics?|stats|data|numbers|figures|sources?|cite|citations?|references?|"
+    r"stud(y|ies)|reports?|facts?|examples?|benchmarks?|more (details?|information|info|context)|"
+    r"about|instead|topics?|subject|focus(ed|ing)? on|switch to)\b",
+    re.IGNORECASE,
+)
 
+def classify_topic(topic: str) -> tuple[str, str]:
+    """
+    Decides locally whether the topic needs the LLM refinement step.
 
-# --- Model and Tools Initialization ---
-main_llm = ChatOpenAI(model="gpt-4o")
-small_llm = ChatOpenAI(model="gpt-4o-mini")
-tools = [web_search, fetch_url_data]
-llm_with_tools = main_llm.bind_tools(tools)
-tool_node = ToolNode(tools)
+    Returns the path and the topic to use: "url" for a bare URL and "clean" for
+    an already well-formed sentence (optionally after a URL) are passed through
+    in the format improve_user_query produces, anything else is "refine".
+    """
+    urls = URL_PATTERN.findall(topic)
+    text = URL_PATTERN.sub(" ", topic).strip()
+    url_lines = "\n".join(f"URL: {url}" for url in urls)
+    if urls and not text:
+        return "url", url_lines
+
+    words = text.split()
+    alphabetic = [w for w in words if WORD_PATTERN.fullmatch(w.strip(".,;:!?()\"'"))]
+    well_formed = (
+        4 <= len(words) <= 60
+        and text[0].isupper()
+        and text[-1] in ".!?"
+        and len(alphabetic) >= 0.8 * len(words)
+        and "  " not in text
+    )
+    if well_formed:
+        return "clean", f"{url_lines}\n{text}" if urls else text
+    return "refine", topic
+
+def classify_feedback(feedback: str) -> str:
+    """
+    Decides locally how revision feedback is applied.
+
+    Returns "light" when the feedback only asks to rework the draft (length,
+    tone, format, wording) and nothing in it calls for new information, and
+    "agent" otherwise, so anything uncertain still gets the full agent with
+    its tools.
+    """
+    if NEW_INFO_PATTERN.search(feedback) or not LIGHT_EDIT_PATTERN.search(feedback):
+        return "agent"
+    return "light"
 
-def improve_input(state: State) -> dict:
+async def prefetch(state: State, models: Models) -> dict:
     """
-    This method improves the input provide by the user
+    Speculatively runs the tools the agent would call first, in parallel with the
+    input preparation: fetches the provided URL (or the first URL in the topic)
+    and, with PREFETCH_SEARCH enabled, a web search on the raw topic. The results
+    are injected as a pre-seeded tool call so the agent can draft in its first turn.
     """
-    print("---AGENT: Improving the User Input---")
     topic = state["topic"]
-    prompt = improve_user_query.format(topic=topic)
-    response = small_llm.invoke(prompt)
-    print(response.content)
+    urls = URL_PATTERN.findall(topic)
+    url = (state.get("url") or "").strip() or (urls[0] if urls else "")
+    calls = []
+    if url and "fetch_url_data" in models.tools_by_name:
+        calls.append(("fetch_url_data", models.tools_by_name["fetch_url_data"], {"url": url}))
+    if PREFETCH_SEARCH and "web_search" in models.tools_by_name:
+        search_topic = URL_PATTERN.sub(" ", topic).strip()
+        if search_topic:
+            calls.append(("web_search", models.tools_by_name["web_search"], {"topic": search_topic}))
+    if not calls:
+        return {}
+
+    log.info("Prefetching", extra={"tools": [name for name, _, _ in calls]})
+    # A failing tool becomes an error result like in ToolNode, the other results are kept
+    outputs = await asyncio.gather(*(tool_fn.ainvoke(args) for _, tool_fn, args in calls), return_exceptions=True)
+    tool_calls = [
+        {"name": name, "args": args, "id": f"prefetch_{uuid.uuid4().hex[:12]}"}
+        for name, _, args in calls
+    ]
+    messages = []
+    for call, output in zip(tool_calls, outputs):
+        if isinstance(output, Exception):
+            log.warning("Prefetch failed", extra={"tool": call["name"], "error": str(output)})
+            messages.append(ToolMessage(
+                content=f"Error: {output!r}\n Please fix your mistakes.",
+                tool_call_id=call["id"],
+                name=call["name"],
+                status="error",
+            ))
+        else:
+            messages.append(ToolMessage(content=str(output), tool_call_id=call["id"], name=call["name"]))
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)] + messages}
+
+async def improve_input(state: State, models: Models) -> dict:
+    """
+    This method improves the input provide by the user. URLs and well-formed
+    topics are used as they are, only the rest goes through the LLM. Runs in the
+    same step as prefetch, so the refinement and the fetch overlap.
+    """
+    path, topic = classify_topic(state["topic"])
+    log.info("Input classified", extra={"input_path": path})
+    if path == "refine":
+        prompt = improve_user_query.format(topic=topic)
+        response = await models.improve_llm.ainvoke(prompt)
+        topic = response.content
+        log.info("Improved the user input", extra={"topic": topic})
 
     return {
-        "messages": [HumanMessage(content=response.content)],
-        "topic":response.content
+        "messages": [HumanMessage(content=topic)],
+        "topic": topic,
+        "input_path": path
     }
 
-def summaries_text(text: str) -> str:
+async def summaries_text(text: str, llm) -> str:
     """
     Takes text as an input summaries it and retuns the summary in less than 200 worda
     """
+    if count_tokens(text) > MAP_REDUCE_THRESHOLD_TOKENS:
+        return await map_reduce_summary(text, llm)
     prompt = summarize_text_query.format(text=text)
-    summary = small_llm.invoke(prompt)
+    summary = await llm.ainvoke(prompt)
+    return summary.content
+
+async def map_reduce_summary(text: str, llm) -> str:
+    """
+    Summarizes a long text by splitting it into chunks, summarizing the chunks
+    concurrently and reducing the partial summaries into one.
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=MAP_REDUCE_CHUNK_TOKENS,
+        chunk_overlap=MAP_REDUCE_CHUNK_TOKENS // 20,
+        length_function=count_tokens,
+    )
+    chunks = splitter.split_text(text)
+    prompts = [summarize_text_query.format(text=chunk) for chunk in chunks]
+    partials = await llm.abatch(prompts, config={"max_concurrency": MAP_REDUCE_MAX_CONCURRENCY})
+    combined = "\n\n".join(partial.content for partial in partials)
+
+    # Very long documents can produce more partial summaries than fit one reduce call
+    if count_tokens(combined) > SUMMARY_MAX_INPUT_TOKENS and len(chunks) > 1:
+        return await map_reduce_summary(combined, llm)
+    summary = await llm.ainvoke(reduce_summaries_query.format(summaries=combined))
     return summary.content
 
+def summary_key(msg: ToolMessage, text: str | None = None) -> str:
+    """
+    Builds the cache key of a tool output: its tool_call_id plus a hash of the content
+    (or of `text`, the content it stands for).
+    """
+    text = str(msg.content) if text is None else text
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    return f"{msg.tool_call_id}:{digest}"
+
+def context_key(msg: ToolMessage) -> str:
+    """
+    Key under which the context of a tool output is saved before the output is compacted.
+    """
+    return f"context:{msg.tool_call_id}"
+
+def source_text(msg: ToolMessage, summaries: dict) -> str:
+    """
+    Text a tool output contributes to the context. A compacted output is only a
+    stub, so its saved context is used instead.
+    """
+    if msg.response_metadata.get("compacted"):
+        return summaries.get(context_key(msg), str(msg.content))
+    return str(msg.content)
+
+def select_tool_messages(messages: list[BaseMessage], tool_results: str) -> tuple:
+    """
+    Returns the tool outputs the agent needs for its context: the latest fetched URL
+    (if any) and the web search results used alongside it.
+    """
+    tool_messages = [m for m in messages if isinstance(m, ToolMessage)]
+    fetched = [m for m in tool_messages if "fetch_url_data" in getattr(m, "name", "")]
+    searches = [m for m in tool_messages if "web_search" in getattr(m, "name", "")]
+    if fetched:
+        return fetched[-1], searches
+    if searches and "Primary URL content" not in tool_results:
+        return None, searches[:1]
+    return None, []
+
+async def build_tool_context(topic: str, primary, searches: list, summaries: dict, llm) -> tuple[str, dict]:
+    """
+    Packs the tool outputs into at most CONTEXT_TOKEN_BUDGET tokens for the post prompt.
+
+    The raw outputs are chunked, ranked against the topic with BM25 and packed
+    to the budget first. The summarizer is only the fallback for a main source
+    that gets nothing into the budget that way, e.g. a page whose text has no
+    sentence breaks: its summary (cached, or made with map-reduce when long) is
+    packed instead. Returns the context and the newly created summaries.
+    """
+    sources = ([primary] if primary else []) + searches
+    keys = {m.tool_call_id: summary_key(m, source_text(m, summaries)) for m in sources}
+    texts = {keys[m.tool_call_id]: source_text(m, summaries) for m in sources}
+
+    def sections() -> list[tuple[str, str]]:
+        search_texts = [texts[keys[m.tool_call_id]] for m in searches]
+        if primary:
+            result = [("Primary URL content", texts[keys[primary.tool_call_id]])]
+            if search_texts:
+                result.append(("Optional enrichment", "\n".join(search_texts)))
+            return result
+        return [("", search_texts[0])]
+
+    raw = sections()
+    packed = pack_sections(topic, raw, CONTEXT_TOKEN_BUDGET)
+    new_summaries = {}
+    # The enrichment may lose out to the main source in the ranking, the main source may not
+    if raw[0][1].strip() and not packed[0][1].strip():
+        key = keys[(primary or searches[0]).tool_call_id]
+        log.info("Main source does not pack into the context, summarizing it")
+        if key not in summaries:
+            new_summaries[key] = await summaries_text(texts[key], llm)
+        texts[key] = {**summaries, **new_summaries}[key]
+        packed = pack_sections(topic, sections(), CONTEXT_TOKEN_BUDGET)
+    return truncate_tokens(format_sections(packed), CONTEXT_TOKEN_BUDGET), new_summaries
+
+def compact_tool_message(msg: ToolMessage, summaries: dict) -> ToolMessage:
+    """
+    Returns the consumed tool output in compact form, under the same id so the
+    reducer replaces the raw payload: its summary when one exists, otherwise
+    the first COMPACT_TOOL_TOKENS tokens.
+    """
+    content = summaries.get(summary_key(msg)) or truncate_tokens(str(msg.content), COMPACT_TOOL_TOKENS)
+    return ToolMessage(
+        content=content,
+        tool_call_id=msg.tool_call_id,
+        name=msg.name,
+        id=msg.id,
+        response_metadata={"compacted": True},
+    )
+
 # --- Graph Nodes ---
-def agent(state: State) -> dict:
+async def agent(state: State, models: Models) -> dict:
     """
     The main agent node. It invokes the LLM to either generate a post or decide to use a tool.
     """
-    print("---AGENT: Generating post or deciding on tool use---")
     messages = state["messages"]
     topic = state["topic"]
     feedback = state["feedback"]
     tool_results = state["tool_results"]
-
-    # Check for tool results in the message history
-
-    if messages:
-        for msg in reversed(messages):
-            if isinstance(msg, ToolMessage):
-                tool_name = getattr(msg,"name", "")
-                content = summaries_text(msg.content)
-                if "fetch_url_data" in tool_name:
-                    tool_results = f"Primary URL content:\n{content}"
-                    search_snippets = [summaries_text(m.content) for m in messages 
-                                       if isinstance(m, ToolMessage) and "web_search" in getattr(m, "name", "") ]
-                    if search_snippets:
-                        tool_results += "\n\nOptional enrichment:\n" + "\n".join(search_snippets)
-                    break
-                elif "web_search" in tool_name and "Primary URL content" not in tool_results:
-                  tool_results = content
+    summaries = state.get("summaries") or {}
+
+    # Tool outputs are folded into tool_results once, later turns reuse that context
+    fresh = [m for m in messages if isinstance(m, ToolMessage) and not m.response_metadata.get("compacted")]
+    new_summaries = {}
+    compacted = []
+    if fresh:
+        primary, searches = select_tool_messages(messages, tool_results)
+        if primary or searches:
+            tool_results, new_summaries = await build_tool_context(
+                topic, primary, searches, summaries, models.small_llm
+            )
+        # Later turns see only the compacted stubs, so the part of each output that
+        # fits the context is kept first, for when the context is rebuilt
+        new_summaries.update({
+            context_key(m): pack_context(topic, [("", str(m.content))], CONTEXT_TOKEN_BUDGET) for m in fresh
+        })
+        known = {**summaries, **new_summaries}
+        compacted = [compact_tool_message(m, known) for m in fresh]
+        replaced = {m.id: m for m in compacted}
+        messages = [replaced.get(m.id, m) for m in messages]
 
     # Format the prompt for the LLM
     prompt = linkedin_post_prompt.format(
@@ -150,45 +561,82 @@ def agent(state: State) -> dict:
     # Create a new HumanMessage for this turn to not pollute the history
     invocation_messages = messages + [HumanMessage(content=prompt)]
 
-    response = llm_with_tools.invoke(invocation_messages)
+    response = await models.llm_with_tools.ainvoke(invocation_messages)
 
     # The agent returns new messages and the generated post content
     return {
-        "messages": [response],
+        "messages": compacted + [response],
         "generated_post": response.content if response.content else "",
-        "tool_results": tool_results
+        "tool_results": tool_results,
+        "summaries": new_summaries
     }
 
 
+async def revise(state: State, models: Models) -> dict:
+    """
+    Applies light feedback to the current draft with revise_llm, given only the
+    draft and the feedback. Feedback that needs new information, or an edit
+    that comes back empty, is left to the agent.
+    """
+    feedback = state["feedback"]
+    draft = state.get("generated_post") or ""
+    path = classify_feedback(feedback) if LIGHT_REVISIONS and draft else "agent"
+    log.info("Feedback classified", extra={"revision_path": path})
+    if path == "agent":
+        return {"revision_path": path}
+
+    response = await models.revise_llm.ainvoke(revise_post_query.format(post=draft, feedback=feedback))
+    if not response.content:
+        log.warning("Light revision came back empty, handing the feedback to the agent")
+        return {"revision_path": "agent"}
+    # Stored as the latest draft, so a later agent turn revises this version
+    return {
+        "messages": [AIMessage(content=response.content)],
+        "generated_post": response.content,
+        "revision_path": path,
+    }
+
+def route_revision(state: State) -> str:
+    return "light" if state.get("revision_path") == "light" else "agent"
+
 def human_review(state: State) -> dict:
     """
     This node is a placeholder that signals the graph to wait for human input.
     The graph will be interrupted after this node runs.
     """
-    print("---HUMAN REVIEW: Awaiting feedback---")
+    log.info("Awaiting human feedback")
     # No state change needed here, just a point to pause.
     return {}
 
 
-def post_to_linkedin(state: State) -> dict:
+async def post_to_linkedin(state: State, config: RunnableConfig) -> dict:
     """
-    Posts the final, approved content to LinkedIn.
+    Hands the final, approved content to the publish outbox, whose workers post
+    it to LinkedIn with retries, or to the scheduler when `publish_at` is in
+    the future. The thread id and content form the idempotency key, so resuming
+    the same approval twice never queues a second post.
     """
-    print("---ACTION: Posting to LinkedIn---")
     if state.get("ready_to_post"):
         post_content = state.get("generated_post")
         if not post_content:
-            print("---ACTION: Failed. No post content found in the state.")
+            log.warning("No post content found in the state")
             return {}
 
-        result = create_linkedin_post(content=post_content)
-        if result.get("success"):
-            print(f"Post successfully published! Post ID: {result.get('post_id')}")
-        else:
-            print(f"Failed to post. Error: {result.get('error')}")
-            print(f"Details: {result.get('details')}")
+        content_hash = hashlib.sha256(post_content.encode("utf-8")).hexdigest()[:16]
+        idempotency_key = f"{config['configurable']['thread_id']}:{content_hash}"
+        publish_at = state.get("publish_at")
+        account = state.get("account")
+        if publish_at and publish_at > time.time():
+            entry = await asyncio.to_thread(
+                get_scheduler().schedule, post_content, idempotency_key, publish_at, "PUBLIC", account
+            )
+            log.info("Post scheduled", extra={"schedule_id": entry["id"], "publish_at": time.ctime(publish_at)})
+            return {"schedule_id": entry["id"]}
+        entry = await asyncio.to_thread(get_outbox().enqueue, post_content, idempotency_key, "PUBLIC", account)
+        log.info("Post queued for publishing", extra={"outbox_id": entry["id"]})
+        return {"outbox_id": entry["id"]}
     else:
-        print("---ACTION: Skipped posting as post was not approved.---")
+        log.info("Skipped posting as the post was not approved")
     return {}
 
 def tools_condition_router(state: State):
@@ -208,66 +656,111 @@ def tools_condition_router(state: State):
 def after_human_review(state: State) -> str:
     """
     Router that directs the flow after human feedback is received.
-    This runs when the graph is resumed after the interruption.
+    This runs when the graph is resumed after the interruption. Approval is
+    the `ready_to_post` flag set by the caller, whatever the feedback says.
     """
-    print("---ROUTER: Processing human feedback---")
     last_feedback = state.get("feedback", "").lower()
 
-    if "approve" in last_feedback:
-        print("---ROUTER: Feedback is 'approve'. Moving to post.---")
-        return "post"
+    if state.get("ready_to_post"):
+        route = "post"
     elif "exit" in last_feedback:
-        print("---ROUTER: Feedback is 'exit'. Ending workflow.---")
-        return "end"
+        route = "end"
     else:
-        print("---ROUTER: Revision feedback received. Returning to agent.---")
-        return "revise"
+        route = "revise"
+    log.info("Routing human feedback", extra={"route": route})
+    return route
 
 
 # --- Graph Definition ---
-graph_builder = StateGraph(State)
-
-graph_builder.add_node("agent", agent)
-graph_builder.add_node("tools", tool_node)
-graph_builder.add_node("human_review", human_review)
-graph_builder.add_node("post_to_linkedin", post_to_linkedin)
-graph_builder.add_node("improve_input",improve_input)
-
-graph_builder.set_entry_point("improve_input")
-graph_builder.add_edge("improve_input","agent")
-
-# This conditional edge checks if the LLM's last response was a tool call.
-# The key "__end__" signifies the default path when no tools are called.
-graph_builder.add_conditional_edges(
-    "agent",
-    tools_condition,
-    {"tools": "tools", "__end__": "human_review"},
-)
-graph_builder.add_edge("tools", "agent")
+def build_graph(models: Models) -> StateGraph:
+    """
+    Builds the workflow graph, its nodes bound to the given models and tools.
+    """
+    graph_builder = StateGraph(State)
+
+    graph_builder.add_node("agent", functools.partial(agent, models=models))
+    graph_builder.add_node("tools", ToolNode(models.tools))
+    graph_builder.add_node("human_review", human_review)
+    graph_builder.add_node("post_to_linkedin", post_to_linkedin)
+    graph_builder.add_node("improve_input", functools.partial(improve_input, models=models))
+    graph_builder.add_node("prefetch", functools.partial(prefetch, models=models))
+    graph_builder.add_node("revise", functools.partial(revise, models=models))
+
+    # Input preparation and the speculative prefetch run in the same superstep, so
+    # the LLM refinement and the fetch overlap, and the agent runs once both are done.
+    # Nodes of one step wait for each other: nothing may sit in front of improve_input.
+    graph_builder.add_edge(START, "improve_input")
+    graph_builder.add_edge(START, "prefetch")
+    graph_builder.add_edge(["improve_input", "prefetch"], "agent")
+
+    # This conditional edge checks if the LLM's last response was a tool call.
+    # The key "__end__" signifies the default path when no tools are called.
+    graph_builder.add_conditional_edges(
+        "agent",
+        tools_condition,
+        {"tools": "tools", "__end__": "human_review"},
+    )
+    graph_builder.add_edge("tools", "agent")
+
+    # This conditional edge routes based on human feedback after the graph resumes.
+    graph_builder.add_conditional_edges(
+        "human_review",
+        after_human_review,
+        {"post": "post_to_linkedin", "revise": "revise", "end": END},
+    )
+    # Light edits go straight back to review, feedback needing new information
+    # goes through the agent and its tools
+    graph_builder.add_conditional_edges(
+        "revise",
+        route_revision,
+        {"light": "human_review", "agent": "agent"},
+    )
+    graph_builder.add_edge("post_to_linkedin", END)
+    return graph_builder
 
-# This conditional edge routes based on human feedback after the graph resumes.
-graph_builder.add_conditional_edges(
-    "human_review",
-    after_human_review,
-    {"post": "post_to_linkedin", "revise": "agent", "end": END},
-)
-graph_builder.add_edge("post_to_linkedin", END)
 
 # --- Compile and Run ---
-memory = MemorySaver()
-# We interrupt the graph after the 'human_review' node to wait for input.
-graph = graph_builder.compile(checkpointer=memory, interrupt_after=["human_review"])
+def compile_graph(checkpointer, models: Models | None = None):
+    """
+    Compiles the graph with the given checkpointer, and the default models unless others are given.
+    We interrupt the graph after the 'human_review' node to wait for input.
+    """
+    graph = build_graph(models or Models()).compile(checkpointer=checkpointer, interrupt_after=["human_review"])
+    if PRINT_GRAPH:
+        print("\n--- LinkedIn Post Agent Graph ---")
+        print(graph.get_graph().draw_ascii())
+        print("---------------------------------\n")
+    return graph
+
+_graph = None
+
+def get_graph(models: Models | None = None, checkpointer=None):
+    """
+    Returns the default graph (default models, in-memory checkpoints), built on
+    first use. Passing models, e.g. Models(main_llm=fake, tools=[...]), or a
+    checkpointer builds a separate graph with them instead.
+    """
+    global _graph
+    if models is not None or checkpointer is not None:
+        return compile_graph(checkpointer or MemorySaver(), models)
+    if _graph is None:
+        _graph = compile_graph(MemorySaver())
+    return _graph
 
-print("\n--- LinkedIn Post Agent Graph ---")
-print(graph.get_graph().draw_ascii())
-print("---------------------------------\n")
+def __getattr__(name: str):
+    # `from main import graph` keeps working, the graph is only built when asked for
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-def main():
+async def main():
     """
     Main function to run the interactive LinkedIn post generation agent.
     """
     config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    session_id_var.set(config["configurable"]["thread_id"])
+    graph = get_graph()
 
     print("Welcome to the LinkedIn Post Generation Agent!")
     topic = input("What topic would you like to create a post about?\n> ")
@@ -283,7 +776,7 @@ def main():
     while True:
         # Run the graph. It will execute until it hits the interrupt
         # or a terminal state (END).
-        result = graph.invoke(initial_input, config=config)
+        result = await graph.ainvoke(initial_input, config=config)
 
         # The graph is now paused at the 'human_review' node.
         # The `result` dictionary holds the state at that point.
@@ -313,7 +806,7 @@ def main():
         is_approved = "approve" in user_feedback.lower()
 
         # Update the state of the graph in the checkpointer
-        graph.update_state(
+        await graph.aupdate_state(
             config,
             {"feedback": user_feedback, "ready_to_post": is_approved},
         )
@@ -325,13 +818,22 @@ def main():
         if is_approved:
             print("\nPost approved. Resuming to post to LinkedIn...")
             # This final invoke will resume from the interruption and run to the end.
-            graph.invoke(None, config=config)
+            result = await graph.ainvoke(None, config=config)
+            if result.get("outbox_id"):
+                publisher = get_publisher()
+                await publisher.start()
+                entry = await publisher.wait(result["outbox_id"])
+                await publisher.stop()
+                if entry["status"] == "published":
+                    print(f"Post successfully published! Post ID: {entry['post_id']}")
+                else:
+                    print(f"Failed to post. Error: {entry['last_error']}")
             print("\nWorkflow finished.")
             break
 
-        # If not approved, the loop continues. The next `graph.invoke` will use
+        # If not approved, the loop continues. The next `graph.ainvoke` will use
         # the updated state from the checkpointer to revise the post.
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,649 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from tenacity import (
+    AsyncRetrying,
+    retry_if_result,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+from linkedin_script import acreate_linkedin_post, afind_linkedin_post
+from telemetry import RETRIES, get_logger, session_id_var
+
+log = get_logger("outbox")
+
+# Outbox entries the workers are done with. "needs_check" entries may or may not
+# have been published; they are only sent again once reconcile() or an operator
+# found no such post, see OutboxWorkers.reconcile and the /outbox endpoints.
+FINAL_STATUSES = ("published", "failed", "needs_check")
+
+
+class PublishOutbox:
+    """
+    Durable queue of posts waiting to be published.
+
+    Every post is stored under an idempotency key before anything is sent, so
+    enqueueing the same post twice returns the existing entry. Entries go from
+    `pending` to `in_flight` while a worker owns them, are `sending` while a
+    request to LinkedIn is out, and end up `published`, `failed` or
+    `needs_check`. The LinkedIn API does not deduplicate posts, so an attempt
+    whose outcome is unknown (a 5xx, a timeout after sending, or a crash while
+    `sending`) ends in `needs_check` instead of being sent again, until
+    `resolve()` settles it or `requeue()` hands it back. Entries left
+    `in_flight` by a crash are handed back to the workers by `recover()`.
+
+    Several processes can share the file: each claims entries under its own
+    owner id, so a worker starting up only takes back the entries of
+    processes that are gone.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._listeners = []
+        # Process id first, so recover() can tell whether the owner is still alive
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                content TEXT NOT NULL,
+                visibility TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                post_id TEXT,
+                last_error TEXT,
+                claimed_by TEXT,
+                account TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        if "claimed_by" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN claimed_by TEXT")
+        if "account" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN account TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def add_listener(self, callback) -> None:
+        """
+        Registers a callable run after every new entry, used to wake the workers.
+        """
+        self._listeners.append(callback)
+
+    def enqueue(
+        self, content: str, idempotency_key: str, visibility: str = "PUBLIC", account: str | None = None
+    ) -> dict:
+        """
+        Stores the post unless an entry with the same key exists. Returns the entry.
+
+        `account` names the LinkedIn account to publish as, None the one
+        configured in the environment.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO outbox
+                    (idempotency_key, content, visibility, account, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 'pending', ?, ?)
+                """,
+                (idempotency_key, content, visibility, account, now, now),
+            )
+            self._conn.commit()
+            created = cursor.rowcount == 1
+            row = self._conn.execute(
+                "SELECT * FROM outbox WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+        if created:
+            for callback in self._listeners:
+                callback()
+        return dict(row)
+
+    def get(self, entry_id: int):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def claim(self):
+        """
+        Marks the oldest pending entry as in flight and returns it, or None when there is none.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """
+                UPDATE outbox SET status = 'in_flight', claimed_by = ?, updated_at = ?
+                WHERE id = (SELECT id FROM outbox WHERE status = 'pending' ORDER BY id LIMIT 1)
+                RETURNING *
+                """,
+                (self.owner, time.time()),
+            ).fetchone()
+            self._conn.commit()
+        return dict(row) if row is not None else None
+
+    def start_attempt(self, entry_id: int) -> None:
+        """
+        Marks the entry as being sent, so a crash before record_attempt() is not retried blindly.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'sending', updated_at = ? WHERE id = ?", (time.time(), entry_id)
+            )
+            self._conn.commit()
+
+    def record_attempt(self, entry_id: int, error: str | None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'in_flight', attempts = attempts + 1, last_error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (error, time.time(), entry_id),
+            )
+            self._conn.commit()
+
+    def finish(self, entry_id: int, result: dict) -> None:
+        """
+        Records the final outcome of an entry from the publish result.
+        """
+        if result.get("success"):
+            status = "published"
+        else:
+            status = "needs_check" if result.get("ambiguous") else "failed"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, post_id = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (status, result.get("post_id"), result.get("error"), time.time(), entry_id),
+            )
+            self._conn.commit()
+
+    def entries(self, status: str | None = None, limit: int = 100) -> list:
+        """
+        The latest entries, newest first, optionally only those with `status`.
+        """
+        with self._lock:
+            if status is None:
+                rows = self._conn.execute("SELECT * FROM outbox ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM outbox WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def checks_due(self, before: float, limit: int = 10) -> list:
+        """
+        Takes up to `limit` `needs_check` entries last looked at before `before`
+        and marks them as looked at now, so processes sharing the file do not
+        check the same entry at once. Returns them.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                UPDATE outbox SET updated_at = ?
+                WHERE id IN (
+                    SELECT id FROM outbox WHERE status = 'needs_check' AND updated_at < ? ORDER BY id LIMIT ?
+                )
+                RETURNING *
+                """,
+                (time.time(), before, limit),
+            ).fetchall()
+            self._conn.commit()
+        return [dict(row) for row in rows]
+
+    def resolve(self, entry_id: int, status: str, post_id: str | None = None, error: str | None = None) -> bool:
+        """
+        Settles a `needs_check` entry as `published` or `failed`. Returns False
+        when the entry is not waiting for a check.
+        """
+        if status not in ("published", "failed"):
+            raise ValueError(f"Cannot resolve an entry as {status!r}")
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE outbox SET status = ?, post_id = COALESCE(?, post_id), last_error = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'needs_check'",
+                (status, post_id, error, time.time(), entry_id),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def requeue(self, entry_id: int, reset_attempts: bool = False) -> bool:
+        """
+        Hands a `needs_check` or `failed` entry back to the workers. Returns
+        False when the entry is in any other state.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE outbox SET status = 'pending', claimed_by = NULL, "
+                "attempts = CASE WHEN ? THEN 0 ELSE attempts END, updated_at = ? "
+                "WHERE id = ? AND status IN ('needs_check', 'failed')",
+                (reset_attempts, time.time(), entry_id),
+            )
+            self._conn.commit()
+        if cursor.rowcount == 1:
+            for callback in self._listeners:
+                callback()
+        return cursor.rowcount == 1
+
+    def take_token(self, name: str, rate: float, capacity: float) -> float:
+        """
+        Takes a token from the bucket `name`, shared by every process using the
+        file. Returns 0 when one was taken, otherwise the seconds until one is due.
+        """
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes cannot read the same tokens
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute("SELECT tokens, updated_at FROM rate_limits WHERE name = ?", (name,)).fetchone()
+                tokens = capacity if row is None else min(capacity, row["tokens"] + (now - row["updated_at"]) * rate)
+                wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+                if tokens >= 1:
+                    tokens -= 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (name, tokens, now),
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return wait
+
+    @staticmethod
+    def _owner_alive(owner: str | None) -> bool:
+        pid = int(owner.split(":")[0]) if owner else 0
+        # Our own pid under another owner id is a previous process that had the same pid
+        if pid <= 0 or pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def release(self, entry_id: int, sent: bool) -> None:
+        """
+        Gives up this process's claim on an entry whose delivery broke off. An
+        entry that was `sent` may have been published and goes to `needs_check`,
+        any other back to the queue.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = CASE WHEN ? OR status = 'sending' THEN 'needs_check' ELSE 'pending' END, "
+                "claimed_by = NULL, last_error = CASE WHEN ? OR status = 'sending' THEN ? ELSE last_error END, "
+                "updated_at = ? WHERE id = ? AND claimed_by = ? AND status IN ('in_flight', 'sending')",
+                (sent, sent, "Delivery broke off, the post may have been published", time.time(), entry_id, self.owner),
+            )
+            self._conn.commit()
+
+    def recover(self, owner: str | None = None) -> int:
+        """
+        Returns entries left in flight to the queue: those claimed by `owner`, or
+        by default those whose owner process has exited. Entries that were
+        interrupted while `sending` may have been published and are moved to
+        `needs_check` instead. Returns how many entries went back to the queue.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, status, claimed_by FROM outbox WHERE status IN ('in_flight', 'sending')"
+            ).fetchall()
+            if owner is not None:
+                rows = [row for row in rows if row["claimed_by"] == owner]
+            else:
+                rows = [
+                    row for row in rows
+                    if row["claimed_by"] != self.owner and not self._owner_alive(row["claimed_by"])
+                ]
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE outbox SET status = CASE status WHEN 'sending' THEN 'needs_check' ELSE 'pending' END, "
+                "claimed_by = NULL, last_error = CASE status WHEN 'sending' THEN ? ELSE last_error END, "
+                "updated_at = ? WHERE id = ? AND status IN ('in_flight', 'sending')",
+                [("Interrupted while sending, the post may have been published", now, row["id"]) for row in rows],
+            )
+            self._conn.commit()
+        interrupted = [row["id"] for row in rows if row["status"] == "sending"]
+        if interrupted:
+            log.warning("Posts interrupted while sending need checking", extra={"outbox_ids": interrupted})
+        return len(rows) - len(interrupted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        counts = {status: 0 for status in ("pending", "in_flight", "sending", *FINAL_STATUSES)}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average, with bursts of up to `capacity`.
+
+    The bucket lives in the outbox file, so every process publishing from it
+    shares the one rate, however many API workers run.
+    """
+
+    def __init__(self, outbox: PublishOutbox, rate: float, capacity: float, name: str = "linkedin"):
+        self.outbox = outbox
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                wait = await asyncio.to_thread(self.outbox.take_token, self.name, self.rate, self.capacity)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+
+
+class OutboxWorkers:
+    """
+    Background tasks that drain the outbox.
+
+    `publish(content, visibility, idempotency_key, account)` sends one post
+    as the entry's account and returns a LinkedIn client result.
+
+    Each attempt first takes a token from a bucket kept in the outbox file,
+    so all workers of all API processes together stay under the API rate
+    limit. Failures where the post was certainly not created (429, failed
+    connects) are retried with exponential backoff and jitter, honouring
+    `Retry-After` when the API sends it, up to `max_attempts` per entry.
+    Other failures are final, except that ambiguous ones (`needs_check`) are
+    reconciled. Idle workers sleep until a new entry is enqueued, or for at
+    most `poll_interval` seconds, which picks up entries queued by other
+    processes.
+
+    With a `find(content, account)` callable, every `poll_interval` seconds a
+    worker also looks up the `needs_check` entries that have waited
+    `check_after` seconds among their account's recent posts: a post that is
+    found marks the entry `published`, one that is not sends it again while it
+    has attempts left. An error in a worker is logged and the worker carries
+    on.
+    """
+
+    def __init__(
+        self,
+        outbox: PublishOutbox,
+        publish,
+        workers: int = 2,
+        rate: float = 0.5,
+        burst: float = 5,
+        max_attempts: int = 5,
+        backoff_initial: float = 1,
+        backoff_max: float = 60,
+        poll_interval: float = 5,
+        find=None,
+        check_after: float = 300,
+    ):
+        self.outbox = outbox
+        self.publish = publish
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.find = find
+        self.check_after = check_after
+        self.bucket = TokenBucket(outbox, rate, burst)
+        self._backoff = wait_exponential_jitter(initial=backoff_initial, max=backoff_max, jitter=backoff_initial)
+        self._tasks = []
+        self._loop = None
+        self._wake = None
+        self._settled = None
+        self.published = 0
+        self.failed = 0
+        self.needs_check = 0
+        self.retries = 0
+        self.reconciled = 0
+        self.requeued = 0
+        self.errors = 0
+        self._next_check = 0.0
+        outbox.add_listener(self.notify)
+
+    def notify(self) -> None:
+        """
+        Wakes the idle workers. Safe to call from any thread.
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._settled = asyncio.Condition()
+        recovered = await asyncio.to_thread(self.outbox.recover)
+        if recovered:
+            log.info("Recovered interrupted posts", extra={"recovered": recovered})
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Whatever this process interrupted mid-flight goes back to the queue, for
+        # the workers of other processes or the next start
+        await asyncio.to_thread(self.outbox.recover, self.outbox.owner)
+        self._loop = None
+
+    async def wait(self, entry_id: int) -> dict:
+        """
+        Waits until the entry is published or has failed, and returns it.
+        """
+        while True:
+            entry = await asyncio.to_thread(self.outbox.get, entry_id)
+            if entry["status"] in FINAL_STATUSES:
+                return entry
+            # Also polls: another process may settle it, or the notify may land before the wait
+            async with self._settled:
+                try:
+                    await asyncio.wait_for(self._settled.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _wait(self, retry_state) -> float:
+        delay = self._backoff(retry_state)
+        if not retry_state.outcome.failed:
+            retry_after = retry_state.outcome.result().get("retry_after")
+            if retry_after:
+                delay = max(delay, retry_after)
+        return delay
+
+    async def _attempt(self, entry: dict) -> dict:
+        await self.bucket.acquire()
+        await asyncio.to_thread(self.outbox.start_attempt, entry["id"])
+        # From here on the post may exist, whatever happens to this worker
+        entry["sent"] = True
+        try:
+            result = await self.publish(
+                entry["content"], entry["visibility"], entry["idempotency_key"], entry["account"]
+            )
+        except Exception as e:
+            # The request may have gone out before the failure
+            result = {"success": False, "error": str(e), "status_code": None, "retryable": False, "ambiguous": True}
+        await asyncio.to_thread(self.outbox.record_attempt, entry["id"], result.get("error"))
+        return result
+
+    def _give_up(self, retry_state) -> dict:
+        return retry_state.outcome.result()
+
+    def _count_retry(self, retry_state) -> None:
+        self.retries += 1
+        RETRIES.labels("outbox").inc()
+
+    async def _deliver(self, entry: dict) -> None:
+        # Keys made by the graph start with its thread id, which ties the publish logs to the session
+        session_id_var.set(entry["idempotency_key"].rpartition(":")[0] or None)
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(max(1, self.max_attempts - entry["attempts"])),
+            wait=self._wait,
+            retry=retry_if_result(lambda r: r.get("retryable", False)),
+            before_sleep=self._count_retry,
+            retry_error_callback=self._give_up,
+        )
+        result = await retrying(self._attempt, entry)
+        await asyncio.to_thread(self.outbox.finish, entry["id"], result)
+        if result.get("success"):
+            self.published += 1
+        elif result.get("ambiguous"):
+            self.needs_check += 1
+            log.warning(
+                "Post may have been published, not retrying",
+                extra={"outbox_id": entry["id"], "error": result.get("error")},
+            )
+        else:
+            self.failed += 1
+            log.warning("Giving up on post", extra={"outbox_id": entry["id"], "error": result.get("error")})
+        async with self._settled:
+            self._settled.notify_all()
+
+    async def reconcile(self) -> int:
+        """
+        Settles the `needs_check` entries that are due. Returns how many were settled.
+        """
+        entries = await asyncio.to_thread(self.outbox.checks_due, time.time() - self.check_after)
+        settled = 0
+        for entry in entries:
+            result = await self.find(entry["content"], entry["account"])
+            if not result.get("success"):
+                # Looked at again after check_after
+                continue
+            if result.get("post_id"):
+                done = await asyncio.to_thread(self.outbox.resolve, entry["id"], "published", result["post_id"])
+                self.reconciled += done
+                log.info("Found the post of an unsettled entry", extra={"outbox_id": entry["id"]})
+            elif entry["attempts"] < self.max_attempts:
+                done = await asyncio.to_thread(self.outbox.requeue, entry["id"])
+                self.requeued += done
+                log.info("Post not found, sending it again", extra={"outbox_id": entry["id"]})
+            else:
+                error = f"Not found among the recent posts after {entry['attempts']} attempts"
+                done = await asyncio.to_thread(self.outbox.resolve, entry["id"], "failed", None, error)
+                self.failed += done
+            settled += done
+        if settled:
+            async with self._settled:
+                self._settled.notify_all()
+        return settled
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _run(self) -> None:
+        while True:
+            entry = None
+            try:
+                # Checked while busy too, a post that waits too long drops out of the recent posts
+                if self.find is not None and time.monotonic() >= self._next_check:
+                    self._next_check = time.monotonic() + self.poll_interval
+                    await self.reconcile()
+                entry = await asyncio.to_thread(self.outbox.claim)
+                if entry is None:
+                    await self._idle()
+                    continue
+                await self._deliver(entry)
+            except Exception:
+                # A locked outbox file or a failing lookup must not take the worker down
+                self.errors += 1
+                log.exception("Outbox worker error", extra={"outbox_id": entry and entry["id"]})
+                if entry is not None:
+                    try:
+                        await asyncio.to_thread(self.outbox.release, entry["id"], entry.get("sent", False))
+                    except Exception:
+                        log.exception("Could not release outbox entry", extra={"outbox_id": entry["id"]})
+                await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "published": self.published,
+            "failed": self.failed,
+            "needs_check": self.needs_check,
+            "retries": self.retries,
+            "reconciled": self.reconciled,
+            "requeued": self.requeued,
+            "errors": self.errors,
+            **{f"queue_{status}": count for status, count in self.outbox.stats().items()},
+        }
+
+
+async def publish_post(content: str, visibility: str, idempotency_key: str, account: str | None = None) -> dict:
+    return await acreate_linkedin_post(content, visibility, idempotency_key, account)
+
+
+async def find_post(content: str, account: str | None = None) -> dict:
+    return await afind_linkedin_post(content, account)
+
+
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", ".cache/outbox.sqlite")
+
+_outbox = None
+_publisher = None
+_lock = threading.Lock()
+
+
+def get_outbox() -> PublishOutbox:
+    """
+    Returns the outbox at OUTBOX_PATH, opened on first use.
+    """
+    global _outbox
+    with _lock:
+        if _outbox is None:
+            _outbox = PublishOutbox(OUTBOX_PATH)
+        return _outbox
+
+
+def get_publisher() -> OutboxWorkers:
+    """
+    Returns the workers that publish the outbox entries, built on first use.
+    """
+    global _publisher
+    outbox = get_outbox()
+    with _lock:
+        if _publisher is None:
+            _publisher = OutboxWorkers(
+                outbox,
+                publish_post,
+                workers=int(os.getenv("OUTBOX_WORKERS", "2")),
+                rate=float(os.getenv("OUTBOX_RATE", "0.5")),
+                burst=float(os.getenv("OUTBOX_BURST", "5")),
+                max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5")),
+                backoff_initial=float(os.getenv("OUTBOX_BACKOFF_INITIAL", "1")),
+                backoff_max=float(os.getenv("OUTBOX_BACKOFF_MAX", "60")),
+                poll_interval=float(os.getenv("OUTBOX_POLL_INTERVAL", "5")),
+                find=find_post,
+                check_after=float(os.getenv("OUTBOX_CHECK_AFTER", "300")),
+            )
+        return _publisher
+
+
+def __getattr__(name: str):
+    # `from outbox import outbox, publisher` keeps working, the database is only opened when asked for
+    if name == "outbox":
+        return get_outbox()
+    if name == "publisher":
+        return get_publisher()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,223 @@
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import xxhash
+import zstandard
+
+
+def normalize_url(url: str) -> str:
+    """
+    Lower-cases scheme and host and drops the fragment, which never reaches the server.
+    """
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+class PageStore:
+    """
+    Content-addressed, zstd-compressed store of fetched pages.
+
+    URLs are keyed on an xxhash of the normalized url and point at a body keyed
+    on an xxhash of its content, so identical pages served under several urls
+    are stored once. Next to the raw html the store keeps the text extracted by
+    each extractor, so re-extraction and repeat fetches stay off the network.
+    The compressed bodies and texts are bounded by `max_bytes` with LRU eviction.
+
+    The store also serves as the validator cache of `fetcher.PageFetcher`.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 200_000_000, level: int = 3):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # WAL lets the API workers read while one of them writes
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS urls (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_key TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                content_key TEXT PRIMARY KEY,
+                html BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS texts (
+                content_key TEXT NOT NULL,
+                extractor TEXT NOT NULL,
+                text BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (content_key, extractor)
+            );
+            CREATE INDEX IF NOT EXISTS idx_blobs_last_access ON blobs (last_access);
+            CREATE INDEX IF NOT EXISTS idx_urls_content_key ON urls (content_key);
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def url_key(url: str) -> str:
+        return xxhash.xxh64_hexdigest(normalize_url(url))
+
+    @staticmethod
+    def content_key(html: str) -> str:
+        return xxhash.xxh3_128_hexdigest(html.encode("utf-8"))
+
+    def get(self, url: str):
+        """
+        Returns the stored page for the url with its validators, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT u.content_key, u.etag, u.last_modified, u.fetched_at, b.html
+                FROM urls u JOIN blobs b ON b.content_key = u.content_key
+                WHERE u.url_key = ?
+                """,
+                (self.url_key(url),),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE blobs SET last_access = ? WHERE content_key = ?", (time.time(), row[0])
+            )
+            self._conn.commit()
+            html = self._decompressor.decompress(row[4]).decode("utf-8")
+        return {
+            "content_key": row[0],
+            "etag": row[1],
+            "last_modified": row[2],
+            "fetched_at": row[3],
+            "html": html,
+        }
+
+    def put(self, url: str, etag, last_modified, html: str) -> str:
+        """
+        Stores the page body (once per distinct content) and points the url at it.
+        Returns the content key.
+        """
+        content_key = self.content_key(html)
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM blobs WHERE content_key = ?", (content_key,)
+            ).fetchone()
+            if exists:
+                self._conn.execute(
+                    "UPDATE blobs SET last_access = ? WHERE content_key = ?", (now, content_key)
+                )
+            else:
+                compressed = self._compressor.compress(html.encode("utf-8"))
+                self._conn.execute(
+                    "INSERT INTO blobs (content_key, html, size, last_access) VALUES (?, ?, ?, ?)",
+                    (content_key, compressed, len(compressed), now),
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO urls (url_key, url, content_key, etag, last_modified, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.url_key(url), url, content_key, etag, last_modified, now),
+            )
+            self._evict()
+            self._conn.commit()
+        return content_key
+
+    def refresh(self, url: str) -> None:
+        """
+        Marks the stored page as fetched now, after a successful revalidation.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE urls SET fetched_at = ? WHERE url_key = ?", (time.time(), self.url_key(url))
+            )
+            self._conn.commit()
+
+    def get_text(self, content_key: str, extractor: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM texts WHERE content_key = ? AND extractor = ?",
+                (content_key, extractor),
+            ).fetchone()
+            if row is None:
+                return None
+            return self._decompressor.decompress(row[0]).decode("utf-8")
+
+    def put_text(self, content_key: str, extractor: str, text: str) -> None:
+        compressed = self._compressor.compress(text.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO texts (content_key, extractor, text, size) VALUES (?, ?, ?, ?)",
+                (content_key, extractor, compressed, len(compressed)),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Caller holds the lock. Drops least recently used bodies with their texts and urls.
+        total = self._conn.execute(
+            "SELECT (SELECT COALESCE(SUM(size), 0) FROM blobs) + (SELECT COALESCE(SUM(size), 0) FROM texts)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            """
+            SELECT b.content_key, b.size + COALESCE((SELECT SUM(t.size) FROM texts t WHERE t.content_key = b.content_key), 0)
+            FROM blobs b ORDER BY b.last_access
+            """
+        ).fetchall()
+        for content_key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM blobs WHERE content_key = ?", (content_key,))
+            self._conn.execute("DELETE FROM texts WHERE content_key = ?", (content_key,))
+            self._conn.execute("DELETE FROM urls WHERE content_key = ?", (content_key,))
+            total -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            pages, html_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+            text_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM texts").fetchone()[0]
+            urls = self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        return {"urls": urls, "pages": pages, "bytes": html_bytes + text_bytes}
+
+
+_page_store = None
+_lock = threading.Lock()
+
+
+def get_page_store() -> PageStore:
+    """
+    Returns the page store at PAGE_STORE_PATH, opened on first use.
+    """
+    global _page_store
+    with _lock:
+        if _page_store is None:
+            _page_store = PageStore(
+                path=os.getenv("PAGE_STORE_PATH", ".cache/page_store.sqlite"),
+                max_bytes=int(os.getenv("PAGE_STORE_MAX_BYTES", "200000000")),
+            )
+        return _page_store
+
+
+def __getattr__(name: str):
+    # `from page_store import page_store` keeps working, the database is only opened when asked for
+    if name == "page_store":
+        return get_page_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import os
+import sqlite3
+import threading
+import time
+
+from outbox import get_outbox
+
+
+class PostScheduler:
+    """
+    Persisted scheduler that hands posts to the publish outbox at their `publish_at` time.
+
+    Scheduled posts are stored in SQLite and mirrored in an in-memory min-heap
+    of (publish_at, id), so scheduling and dispatching are O(log n) and the
+    heap is rebuilt from the table on start. The dispatcher sleeps until the
+    earliest `publish_at` and is woken early only when an earlier post is
+    scheduled, so an idle scheduler costs nothing however many posts wait.
+    Cancelled posts stay in the heap and are skipped when they come up.
+
+    Dispatching enqueues the post under its idempotency key before marking it
+    dispatched, so a crash in between cannot publish a post twice.
+    """
+
+    def __init__(self, path: str, outbox):
+        self.outbox = outbox
+        self._lock = threading.Lock()
+        self._heap = []
+        self._loop = None
+        self._wake = None
+        self._task = None
+        self.dispatched = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scheduled_posts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                content TEXT NOT NULL,
+                visibility TEXT NOT NULL,
+                publish_at REAL NOT NULL,
+                status TEXT NOT NULL,
+                outbox_id INTEGER,
+                account TEXT
+            )
+            """
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(scheduled_posts)")}
+        if "account" not in columns:
+            self._conn.execute("ALTER TABLE scheduled_posts ADD COLUMN account TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scheduled_status ON scheduled_posts (status, publish_at)"
+        )
+        self._conn.commit()
+        self._load()
+
+    def _load(self) -> None:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT publish_at, id FROM scheduled_posts WHERE status = 'scheduled'"
+            ).fetchall()
+            self._heap = [(publish_at, entry_id) for publish_at, entry_id in rows]
+            heapq.heapify(self._heap)
+
+    def schedule(
+        self,
+        content: str,
+        idempotency_key: str,
+        publish_at: float,
+        visibility: str = "PUBLIC",
+        account: str | None = None,
+    ) -> dict:
+        """
+        Stores the post for publishing at `publish_at` (a Unix timestamp) as
+        `account`, None for the account of the environment. Returns the entry.
+
+        Scheduling the same idempotency key again returns the existing entry.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO scheduled_posts
+                    (idempotency_key, content, visibility, publish_at, status, account)
+                VALUES (?, ?, ?, ?, 'scheduled', ?)
+                """,
+                (idempotency_key, content, visibility, publish_at, account),
+            )
+            self._conn.commit()
+            row = self._conn.execute(
+                "SELECT * FROM scheduled_posts WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+            if cursor.rowcount == 1:
+                earliest = not self._heap or publish_at < self._heap[0][0]
+                heapq.heappush(self._heap, (publish_at, row["id"]))
+                if earliest and self._loop is not None:
+                    self._loop.call_soon_threadsafe(self._wake.set)
+        return dict(row)
+
+    def cancel(self, entry_id: int) -> bool:
+        """
+        Cancels a post that has not been dispatched yet. Returns False otherwise.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE scheduled_posts SET status = 'cancelled' WHERE id = ? AND status = 'scheduled'",
+                (entry_id,),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def get(self, entry_id: int):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM scheduled_posts WHERE id = ?", (entry_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def dispatch_due(self, now: float | None = None) -> int:
+        """
+        Hands every post due by `now` to the outbox. Returns how many were handed over.
+        """
+        now = time.time() if now is None else now
+        count = 0
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    return count
+                _, entry_id = heapq.heappop(self._heap)
+                row = self._conn.execute(
+                    "SELECT * FROM scheduled_posts WHERE id = ? AND status = 'scheduled'", (entry_id,)
+                ).fetchone()
+            if row is None:
+                continue
+            entry = self.outbox.enqueue(row["content"], row["idempotency_key"], row["visibility"], row["account"])
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE scheduled_posts SET status = 'dispatched', outbox_id = ? WHERE id = ?",
+                    (entry["id"], entry_id),
+                )
+                self._conn.commit()
+            self.dispatched += 1
+            count += 1
+
+    def next_due(self):
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    async def run(self) -> None:
+        while True:
+            self._wake.clear()
+            await asyncio.to_thread(self.dispatch_due)
+            next_due = self.next_due()
+            timeout = None if next_due is None else max(0, next_due - time.time())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._loop = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM scheduled_posts GROUP BY status"
+            ).fetchall()
+            next_due = self._heap[0][0] if self._heap else None
+        counts = {status: 0 for status in ("scheduled", "dispatched", "cancelled")}
+        counts.update({status: count for status, count in rows})
+        return {**counts, "next_publish_at": next_due, "dispatched_since_start": self.dispatched}
+
+
+SCHEDULER_PATH = os.getenv("SCHEDULER_PATH", ".cache/scheduled_posts.sqlite")
+
+_scheduler = None
+_lock = threading.Lock()
+
+
+def get_scheduler() -> PostScheduler:
+    """
+    Returns the scheduler at SCHEDULER_PATH, opened on first use.
+    """
+    global _scheduler
+    outbox = get_outbox()
+    with _lock:
+        if _scheduler is None:
+            _scheduler = PostScheduler(SCHEDULER_PATH, outbox)
+        return _scheduler
+
+
+def __getattr__(name: str):
+    # `from scheduler import scheduler` keeps working, the database is only opened when asked for
+    if name == "scheduler":
+        return get_scheduler()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
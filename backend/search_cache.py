@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def normalize_query(query: str) -> str:
+    """
+    Lower-cases the query and collapses whitespace so trivially different
+    spellings of the same topic share one cache entry.
+    """
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """
+    Disk-backed cache for web search results.
+
+    Entries expire after `ttl` seconds, empty results after the much shorter
+    `empty_ttl` so a search that found nothing (or was throttled into returning
+    nothing) is retried soon. The table is bounded to `max_entries` rows,
+    evicting the least recently used ones first. Hit/miss counters are kept
+    per process and exposed through `stats()`.
+    """
+
+    def __init__(self, path: str, ttl: float = 6 * 3600, max_entries: int = 5000, empty_ttl: float = 300):
+        self.path = path
+        self.ttl = ttl
+        self.empty_ttl = empty_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # WAL lets the API workers read while one of them writes
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_results (
+                query TEXT PRIMARY KEY,
+                results TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_last_access ON search_results (last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, query: str):
+        """
+        Returns the cached results for the query, or None on a miss or an expired entry.
+        """
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, created_at FROM search_results WHERE query = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > (self.empty_ttl if row[0] == "[]" else self.ttl):
+                if row is not None:
+                    self._conn.execute("DELETE FROM search_results WHERE query = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE search_results SET last_access = ? WHERE query = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, query: str, results) -> None:
+        """
+        Stores the results for the query and evicts the least recently used entries
+        once the cache grows past `max_entries`.
+        """
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_results (query, results, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(results), now, now),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM search_results WHERE query IN (
+                    SELECT query FROM search_results ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": size,
+        }
+
+
+_search_cache = None
+_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """
+    Returns the search cache at SEARCH_CACHE_PATH, opened on first use.
+    """
+    global _search_cache
+    with _lock:
+        if _search_cache is None:
+            _search_cache = SearchCache(
+                path=os.getenv("SEARCH_CACHE_PATH", ".cache/search_cache.sqlite"),
+                ttl=float(os.getenv("SEARCH_CACHE_TTL", str(6 * 3600))),
+                max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000")),
+                empty_ttl=float(os.getenv("SEARCH_CACHE_EMPTY_TTL", "300")),
+            )
+        return _search_cache
+
+
+def __getattr__(name: str):
+    # `from search_cache import search_cache` keeps working, the database is only opened when asked for
+    if name == "search_cache":
+        return get_search_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,280 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from kv import KV_URL, KVClient, KVSaver
+from telemetry import get_logger
+
+log = get_logger("sessions")
+
+
+@asynccontextmanager
+async def open_checkpointer(backend: str = "memory", path: str = ".cache/checkpoints.sqlite", kv_url: str = KV_URL):
+    """
+    Yields the graph checkpointer for the configured backend.
+
+    "memory" keeps checkpoints in process, "sqlite" stores them durably in a
+    SQLite file in WAL mode (requires `langgraph-checkpoint-sqlite`) that every
+    worker on the host can share, and "kv" keeps them on the Redis-compatible
+    server at `kv_url`, shared by every host that points at it.
+    """
+    if backend == "sqlite":
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        async with AsyncSqliteSaver.from_conn_string(path) as saver:
+            yield saver
+    elif backend == "kv":
+        client = KVClient(kv_url)
+        try:
+            yield KVSaver(client)
+        finally:
+            await client.aclose()
+    elif backend == "memory":
+        yield MemorySaver()
+    else:
+        raise ValueError(f"Unknown checkpointer backend: {backend}")
+
+
+class MemoryRegistry:
+    """
+    Last access time of each session, kept in process.
+    """
+
+    def __init__(self):
+        self._sessions = OrderedDict()
+
+    async def get(self, session_id: str):
+        return self._sessions.get(session_id)
+
+    async def set(self, session_id: str, last_access: float) -> None:
+        self._sessions[session_id] = last_access
+        self._sessions.move_to_end(session_id)
+
+    async def remove(self, session_id: str) -> bool:
+        """
+        Forgets the session. Returns False when it was already gone.
+        """
+        return self._sessions.pop(session_id, None) is not None
+
+    async def expired(self, cutoff: float) -> list:
+        return [sid for sid, last_access in self._sessions.items() if last_access < cutoff]
+
+    async def oldest(self, count: int) -> list:
+        return list(self._sessions)[:count]
+
+    async def count(self) -> int:
+        return len(self._sessions)
+
+
+class SqliteRegistry:
+    """
+    Last access time of each session in a SQLite table, shared by every
+    process on the host that opens the same file.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access)")
+        self._conn.commit()
+
+    def _query(self, sql: str, params: tuple = (), commit: bool = False):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            rows = cursor.fetchall()
+            if commit:
+                self._conn.commit()
+        return rows, cursor.rowcount
+
+    async def _run(self, sql: str, params: tuple = (), commit: bool = False):
+        # sqlite3 blocks for up to `timeout` on a locked file, so never on the event loop
+        return await asyncio.to_thread(self._query, sql, params, commit)
+
+    async def get(self, session_id: str):
+        rows, _ = await self._run("SELECT last_access FROM sessions WHERE session_id = ?", (session_id,))
+        return rows[0][0] if rows else None
+
+    async def set(self, session_id: str, last_access: float) -> None:
+        await self._run(
+            "INSERT OR REPLACE INTO sessions (session_id, last_access) VALUES (?, ?)",
+            (session_id, last_access),
+            commit=True,
+        )
+
+    async def remove(self, session_id: str) -> bool:
+        _, removed = await self._run("DELETE FROM sessions WHERE session_id = ?", (session_id,), commit=True)
+        return removed == 1
+
+    async def expired(self, cutoff: float) -> list:
+        rows, _ = await self._run("SELECT session_id FROM sessions WHERE last_access < ?", (cutoff,))
+        return [row[0] for row in rows]
+
+    async def oldest(self, count: int) -> list:
+        rows, _ = await self._run("SELECT session_id FROM sessions ORDER BY last_access LIMIT ?", (count,))
+        return [row[0] for row in rows]
+
+    async def count(self) -> int:
+        rows, _ = await self._run("SELECT COUNT(*) FROM sessions")
+        return rows[0][0]
+
+
+class KVRegistry:
+    """
+    Last access time of each session in a sorted set on a Redis-compatible
+    server, shared by every process and host that points at it.
+    """
+
+    def __init__(self, client: KVClient, key: str = "linkedin_agent:sessions"):
+        self.client = client
+        self.key = key
+
+    async def get(self, session_id: str):
+        score = await self.client.execute("ZSCORE", self.key, session_id)
+        return float(score) if score is not None else None
+
+    async def set(self, session_id: str, last_access: float) -> None:
+        await self.client.execute("ZADD", self.key, repr(last_access), session_id)
+
+    async def remove(self, session_id: str) -> bool:
+        return await self.client.execute("ZREM", self.key, session_id) == 1
+
+    async def expired(self, cutoff: float) -> list:
+        members = await self.client.execute("ZRANGEBYSCORE", self.key, "-inf", f"({cutoff!r}")
+        return [member.decode("utf-8") for member in members]
+
+    async def oldest(self, count: int) -> list:
+        members = await self.client.execute("ZRANGE", self.key, 0, count - 1)
+        return [member.decode("utf-8") for member in members]
+
+    async def count(self) -> int:
+        return await self.client.execute("ZCARD", self.key)
+
+
+def session_registry(backend: str = "memory", path: str = ".cache/sessions.sqlite", kv_url: str = KV_URL):
+    """
+    Returns the session registry matching the checkpointer backend.
+    """
+    if backend == "sqlite":
+        return SqliteRegistry(path)
+    if backend == "kv":
+        return KVRegistry(KVClient(kv_url))
+    if backend == "memory":
+        return MemoryRegistry()
+    raise ValueError(f"Unknown session backend: {backend}")
+
+
+class SessionStore:
+    """
+    Registry of live generation sessions, bounded in time and size.
+
+    Sessions idle for longer than `ttl` seconds, and the least recently used
+    ones beyond `max_sessions`, are evicted together with every checkpoint of
+    their graph thread, so memory stays flat however many sessions are served.
+
+    Last access times live in `registry`. With a shared registry and
+    checkpointer, any worker can serve any session; when several workers
+    evict the same session, only the one that removes it from the registry
+    deletes its checkpoints.
+    """
+
+    def __init__(self, checkpointer, ttl: float = 3600, max_sessions: int = 1000, registry=None):
+        self.checkpointer = checkpointer
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.registry = registry if registry is not None else MemoryRegistry()
+        # Last known size of the registry, so stats() needs no round trip
+        self.sessions = 0
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+
+    async def _evict(self, session_id: str) -> bool:
+        if not await self.registry.remove(session_id):
+            return False
+        await self.checkpointer.adelete_thread(session_id)
+        return True
+
+    async def create(self, session_id: str) -> None:
+        await self.registry.set(session_id, time.time())
+        self.created += 1
+        self.sessions = await self.registry.count()
+        if self.sessions > self.max_sessions:
+            for oldest in await self.registry.oldest(self.sessions - self.max_sessions):
+                if await self._evict(oldest):
+                    self.evicted_lru += 1
+                    self.sessions -= 1
+
+    async def touch(self, session_id: str) -> bool:
+        """
+        Marks the session as used. Returns False when the session is unknown or expired.
+
+        A session missing from the registry is adopted again if its thread still
+        has a checkpoint, which is the case after a restart with a durable backend.
+        """
+        last_access = await self.registry.get(session_id)
+        if last_access is not None and time.time() - last_access <= self.ttl:
+            await self.registry.set(session_id, time.time())
+            return True
+        if last_access is None:
+            # An in-process saver cannot outlive the registry, and looking a thread up
+            # in it would create an empty entry for it
+            if isinstance(self.checkpointer, MemorySaver):
+                return False
+            config = {"configurable": {"thread_id": session_id}}
+            if await self.checkpointer.aget_tuple(config) is not None:
+                await self.create(session_id)
+                return True
+            return False
+        await self.sweep()
+        return False
+
+    async def remove(self, session_id: str) -> None:
+        await self.registry.remove(session_id)
+        await self.checkpointer.adelete_thread(session_id)
+        self.sessions = await self.registry.count()
+
+    async def sweep(self) -> int:
+        """
+        Evicts every session idle for longer than the TTL. Returns how many this process evicted.
+        """
+        evicted = 0
+        for session_id in await self.registry.expired(time.time() - self.ttl):
+            if await self._evict(session_id):
+                evicted += 1
+        self.evicted_idle += evicted
+        self.sessions = await self.registry.count()
+        return evicted
+
+    async def run_sweeper(self, interval: float = 60) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            evicted = await self.sweep()
+            if evicted:
+                log.info("Evicted idle sessions", extra={"evicted": evicted})
+
+    def stats(self) -> dict:
+        return {
+            "sessions": self.sessions,
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl,
+            "created": self.created,
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru": self.evicted_lru,
+        }
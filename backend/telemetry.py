@@ -0,0 +1,269 @@
+import contextvars
+import json
+import logging
+import os
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.config import var_child_runnable_config
+from langchain_core.tracers.context import register_configure_hook
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# --- Structured logs ---
+# Session the current request belongs to, added to every log record. Inside a
+# graph run without one, the thread id of the run is used instead.
+session_id_var = contextvars.ContextVar("session_id", default=None)
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" (one object per line) or "text"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
+# Attributes every LogRecord has, anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "session_id"}
+
+
+class SessionFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        session_id = session_id_var.get()
+        if session_id is None:
+            config = var_child_runnable_config.get() or {}
+            session_id = config.get("configurable", {}).get("thread_id")
+        record.session_id = session_id
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object: time, level, logger, message, session_id
+    and every field passed with `extra`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "session_id": record.session_id,
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{k}={v}" for k, v in vars(record).items() if k not in _RECORD_ATTRS)
+        session = f" [{record.session_id}]" if record.session_id else ""
+        return f"{self.formatTime(record)} {record.levelname} {record.name}{session} {record.getMessage()} {fields}".rstrip()
+
+
+def setup_logging() -> None:
+    root = logging.getLogger("linkedin_agent")
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.addFilter(SessionFilter())
+    handler.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"linkedin_agent.{name}")
+
+
+setup_logging()
+log = get_logger("telemetry")
+
+
+# --- Metrics ---
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+NODE_DURATION = Histogram(
+    "linkedin_agent_node_duration_seconds", "Wall time of graph node runs", ["node"], buckets=LATENCY_BUCKETS
+)
+NODE_ERRORS = Counter("linkedin_agent_node_errors", "Graph node runs that raised", ["node"])
+TOOL_DURATION = Histogram(
+    "linkedin_agent_tool_duration_seconds", "Wall time of tool calls", ["tool", "status"], buckets=LATENCY_BUCKETS
+)
+LLM_DURATION = Histogram(
+    "linkedin_agent_llm_duration_seconds",
+    "Wall time of chat model calls",
+    ["call_site", "model", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "linkedin_agent_llm_tokens",
+    "Tokens sent to and generated by chat models, estimated when the response does not report them",
+    ["call_site", "model", "kind"],
+)
+LLM_COST = Counter("linkedin_agent_llm_cost_dollars", "Estimated chat model spend", ["call_site", "model"])
+RETRIES = Counter("linkedin_agent_retries", "Retried operations", ["component"])
+
+# USD per million prompt and completion tokens
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+# Tags that name the call site of a chat model call, see main.Models
+CALL_SITES = ("draft", "revise", "summarize", "improve_input")
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records graph node, tool and chat model calls into the Prometheus metrics.
+
+    Installed for every LangChain run in the process, so graph runs are
+    measured whatever callbacks their caller passes. Token counts come from the
+    response usage metadata, or are estimated with `count_tokens` when a model
+    does not report them.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._runs = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        if metadata and name == metadata.get("langgraph_node"):
+            self._runs[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self._runs:
+            node, start = self._runs.pop(run_id)
+            NODE_DURATION.labels(node).observe(time.perf_counter() - start)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        if run_id in self._runs:
+            node, start = self._runs.pop(run_id)
+            NODE_DURATION.labels(node).observe(time.perf_counter() - start)
+            NODE_ERRORS.labels(node).inc()
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._runs[run_id] = (kwargs.get("name") or (serialized or {}).get("name"), time.perf_counter())
+
+    def _tool_end(self, run_id, status: str) -> None:
+        if run_id in self._runs:
+            tool, start = self._runs.pop(run_id)
+            TOOL_DURATION.labels(tool, status).observe(time.perf_counter() - start)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._tool_end(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._tool_end(run_id, "error")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        call_site = next((t for t in CALL_SITES if t in (tags or [])), metadata.get("langgraph_node", "other"))
+        model = metadata.get("ls_model_name") or (serialized or {}).get("name") or "unknown"
+        self._runs[run_id] = (call_site, model, messages, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        if run_id not in self._runs:
+            return
+        call_site, model, messages, start = self._runs.pop(run_id)
+        duration = time.perf_counter() - start
+        LLM_DURATION.labels(call_site, model, "ok").observe(duration)
+
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if usage:
+            prompt_tokens, completion_tokens = usage["input_tokens"], usage["output_tokens"]
+        else:
+            from context import count_tokens
+
+            prompt_tokens = sum(count_tokens(str(m.content)) for batch in messages for m in batch)
+            completion_tokens = count_tokens(generation.text) if generation else 0
+        LLM_TOKENS.labels(call_site, model, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(call_site, model, "completion").inc(completion_tokens)
+        if model in MODEL_PRICES:
+            input_price, output_price = MODEL_PRICES[model]
+            LLM_COST.labels(call_site, model).inc((prompt_tokens * input_price + completion_tokens * output_price) / 1e6)
+        log.info(
+            "LLM call",
+            extra={"call_site": call_site, "model": model, "duration_s": round(duration, 3),
+                   "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        if run_id in self._runs:
+            call_site, model, _, start = self._runs.pop(run_id)
+            LLM_DURATION.labels(call_site, model, "error").observe(time.perf_counter() - start)
+            log.warning("LLM call failed", extra={"call_site": call_site, "model": model, "error": str(error)})
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        RETRIES.labels("langchain").inc()
+
+
+metrics_handler = MetricsCallbackHandler()
+# The default makes the hook add the handler in every context, threads included
+register_configure_hook(contextvars.ContextVar("metrics_handler", default=metrics_handler), inheritable=True)
+
+
+class StatsCollector:
+    """
+    Exposes the `stats()` dicts of the caches, stores and workers as metrics.
+
+    Hit and miss counts become `linkedin_agent_cache_lookups_total`, every other
+    number a gauge named after its source and key.
+    """
+
+    def __init__(self):
+        self.sources = {}
+
+    def register(self, name: str, stats) -> None:
+        """
+        Adds a source: a callable returning a dict of numbers, or of such dicts keyed by instance.
+        """
+        self.sources[name] = stats
+
+    def collect(self):
+        lookups = CounterMetricFamily(
+            "linkedin_agent_cache_lookups", "Cache lookups by result", labels=["cache", "result"]
+        )
+        gauges = {}
+        for name, stats in self.sources.items():
+            values = stats()
+            nested = bool(values) and all(isinstance(v, dict) for v in values.values())
+            for instance, fields in values.items() if nested else [(None, values)]:
+                cache = f"{name}:{instance}" if nested else name
+                for key, value in fields.items():
+                    if key in ("hits", "misses"):
+                        lookups.add_metric([cache, "hit" if key == "hits" else "miss"], value)
+                    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                        metric = f"linkedin_agent_{name}_{key}"
+                        if metric not in gauges:
+                            labels = ["instance"] if nested else []
+                            gauges[metric] = GaugeMetricFamily(metric, f"{key} of {name}", labels=labels)
+                        gauges[metric].add_metric([instance] if nested else [], value)
+        yield lookups
+        yield from gauges.values()
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Returns the metrics in the Prometheus text format and its content type.
+
+    Under several API workers (PROMETHEUS_MULTIPROC_DIR set) the counters and
+    histograms are summed over all workers, while the `stats()` gauges are
+    those of the worker that serves the scrape.
+    """
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    from prometheus_client.multiprocess import MultiProcessCollector
+
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    registry.register(stats_collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,171 @@
+"""
+Concurrency check for the FastAPI service.
+
+Runs the real graph behind `backend/api.py` with stubbed LLMs and tools that
+only sleep, then compares sequential `/generate` calls against concurrent ones
+served by a single event loop.
+
+Fails (exit status 1) unless the concurrent requests overlap, at least half
+of them in flight at once and at least twice as fast as sequential, and every
+session gets its own id and a draft written for its own topic.
+
+    python benchmarks/concurrent_sessions.py --sessions 50 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+import httpx
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+
+import main
+import api
+
+
+class StubSmallLLM:
+    """Stands in for the gpt-4o-mini helper calls."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return AIMessage(content="A refined topic about stubbed benchmarks.")
+
+    async def abatch(self, prompts, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return [AIMessage(content="Stub summary.") for _ in prompts]
+
+
+class StubMainLLM:
+    """Calls web_search on the first turn of a thread, then writes a draft naming the thread's topic."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def bind_tools(self, tools):
+        return self
+
+    def with_config(self, **kwargs):
+        return self
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        if not any(getattr(m, "tool_calls", None) for m in messages):
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": "web_search", "args": {"topic": "stub"}, "id": f"call_{id(messages)}"}],
+            )
+        topic = next(str(m.content) for m in messages if isinstance(m, HumanMessage))
+        return AIMessage(content=f"Stub LinkedIn draft. {topic}")
+
+
+def stub_models(latency: float) -> main.Models:
+    @tool("web_search")
+    async def stub_search(topic: str) -> str:
+        """Stub web search that only sleeps."""
+        await asyncio.sleep(latency)
+        return "Title: Stub\nSnippet: Stub result."
+
+    return main.Models(
+        main_llm=StubMainLLM(latency),
+        small_llm=StubSmallLLM(latency),
+        improve_llm=StubSmallLLM(latency),
+        tools=[stub_search, main.fetch_url_data],
+    )
+
+
+def install_stubs(latency: float) -> main.Models:
+    """
+    Points the API at a graph running on the stubs, on the checkpointer the lifespan opened.
+    """
+    models = stub_models(latency)
+    api.graph = main.compile_graph(api.graph.checkpointer, models)
+    return models
+
+
+async def run(sessions: int, concurrent: bool, latency: float) -> tuple[float, list]:
+    async with api.lifespan(api.app):
+        install_stubs(latency)
+        return await send(sessions, concurrent)
+
+
+async def send(sessions: int, concurrent: bool) -> tuple[float, list]:
+    """
+    Returns the wall time and, per request, (index, start, end, response body).
+    """
+    transport = httpx.ASGITransport(app=api.app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int):
+            started = time.perf_counter()
+            response = await client.post("/generate", json={"query": f"topic {i}", "url": ""})
+            response.raise_for_status()
+            results.append((i, started, time.perf_counter(), response.json()))
+
+        start = time.perf_counter()
+        if concurrent:
+            await asyncio.gather(*(one(i) for i in range(sessions)))
+        else:
+            for i in range(sessions):
+                await one(i)
+        return time.perf_counter() - start, results
+
+
+def peak_in_flight(results: list) -> int:
+    events = sorted([(start, 1) for _, start, _, _ in results] + [(end, -1) for _, _, end, _ in results])
+    peak = running = 0
+    for _, change in events:
+        running += change
+        peak = max(peak, running)
+    return peak
+
+
+def check(sequential: float, concurrent: float, results: list, sessions: int) -> list:
+    failures = []
+    peak = peak_in_flight(results)
+    if peak < max(2, sessions // 2):
+        failures.append(f"at most {peak} of {sessions} concurrent requests were in flight at once")
+    if sequential / concurrent < 2:
+        failures.append(f"concurrent run only {sequential / concurrent:.1f}x faster than sequential")
+    if len({body["session_id"] for *_, body in results}) != sessions:
+        failures.append("sessions share an id")
+    # The topic is "topic <i>", with a space after it so topic 1 does not match topic 10
+    foreign = [i for i, *_, body in results if f"topic {i} " not in body["generated_post"] + " "]
+    if foreign:
+        failures.append(f"{len(foreign)} sessions got a draft for another topic, e.g. session {foreign[0]}")
+    return failures
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per stubbed LLM/tool call")
+    args = parser.parse_args()
+
+    sequential, _ = asyncio.run(run(args.sessions, concurrent=False, latency=args.latency))
+    concurrent, results = asyncio.run(run(args.sessions, concurrent=True, latency=args.latency))
+
+    print(f"sessions:   {args.sessions}")
+    print(f"sequential: {sequential:.2f}s ({args.sessions / sequential:.1f} sessions/s)")
+    print(f"concurrent: {concurrent:.2f}s ({args.sessions / concurrent:.1f} sessions/s)")
+    print(f"speedup:    {sequential / concurrent:.1f}x")
+    print(f"in flight:  {peak_in_flight(results)} at most")
+
+    failures = check(sequential, concurrent, results, args.sessions)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,95 @@
+"""
+Compares the streaming lxml extractor against the BeautifulSoup reference.
+
+Every *.html file in the corpus directory is extracted with both
+implementations. The script reports wall time, peak traced memory and whether
+the outputs match.
+
+    python benchmarks/extractors.py --corpus path/to/saved/pages
+    python benchmarks/extractors.py --synthetic 20   # generate a corpus first
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from extract import extract_text, extract_text_bs4
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+WORDS = "agent graph model token latency cache search post engineer pipeline data insight".split()
+
+
+def write_synthetic_corpus(directory: str, pages: int, paragraphs: int = 2000):
+    """
+    Writes article-like pages with navigation, scripts and styles around the body.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(42)
+    for i in range(pages):
+        body = "\n".join(
+            f"<p>{' '.join(rng.choice(WORDS) for _ in range(40))} <a href='#'>link</a>.</p>"
+            for _ in range(paragraphs)
+        )
+        html = (
+            "<!DOCTYPE html><html><head><title>Page</title>"
+            f"<style>{'p { color: red; } ' * 200}</style></head><body>"
+            f"<header>Site header</header><nav>{'<a>menu</a>' * 100}</nav>"
+            f"<article>{body}</article><script>{'var x = 1; ' * 2000}</script>"
+            "<footer>Footer</footer></body></html>"
+        )
+        with open(os.path.join(directory, f"synthetic_{i}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+def measure(extractor, pages: list[str]):
+    tracemalloc.start()
+    start = time.perf_counter()
+    outputs = [extractor(html) for html in pages]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return outputs, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="directory of saved *.html pages")
+    parser.add_argument("--synthetic", type=int, default=0, help="generate N synthetic pages into the corpus")
+    parser.add_argument("--max-chars", type=int, default=50000, help="text cap for the streaming extractor")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        write_synthetic_corpus(args.corpus, args.synthetic)
+
+    files = sorted(glob.glob(os.path.join(args.corpus, "*.html")))
+    if not files:
+        sys.exit(f"No *.html files in {args.corpus}; pass --corpus or --synthetic N")
+    pages = []
+    for path in files:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+    total_mb = sum(len(p) for p in pages) / 1e6
+
+    bs4_out, bs4_time, bs4_peak = measure(extract_text_bs4, pages)
+    lxml_out, lxml_time, lxml_peak = measure(extract_text, pages)
+    capped_out, capped_time, capped_peak = measure(lambda h: extract_text(h, args.max_chars), pages)
+
+    identical = sum(a == b for a, b in zip(bs4_out, lxml_out))
+    prefixes = sum(a.startswith(c) for a, c in zip(bs4_out, capped_out))
+
+    print(f"corpus: {len(pages)} pages, {total_mb:.1f} MB")
+    print(f"{'extractor':<28}{'time (s)':>10}{'peak MB':>10}")
+    print(f"{'bs4 html.parser':<28}{bs4_time:>10.3f}{bs4_peak / 1e6:>10.1f}")
+    print(f"{'lxml streaming':<28}{lxml_time:>10.3f}{lxml_peak / 1e6:>10.1f}")
+    print(f"{f'lxml streaming ({args.max_chars} chars)':<28}{capped_time:>10.3f}{capped_peak / 1e6:>10.1f}")
+    print(f"identical output: {identical}/{len(pages)}, capped output is a prefix: {prefixes}/{len(pages)}")
+
+
+if __name__ == "__main__":
+    main()
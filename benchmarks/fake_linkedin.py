@@ -0,0 +1,137 @@
+"""
+Local stand-in for the LinkedIn posts API.
+
+Accepts `POST /rest/posts` like the real endpoint, answering 201 with the new
+post URN in the `x-restli-id` header. It can add latency, enforce a rate limit
+(429 with `Retry-After`), fail a share of requests with 503 before or after
+creating the post, and deduplicates on `X-Idempotency-Key`. The real API does
+not deduplicate, so a client must not count on that. `GET /rest/posts?q=author`
+lists the latest posts with their commentary, like the posts finder.
+
+    python benchmarks/fake_linkedin.py --port 8800 --failure-rate 0.2 --rate-limit 20
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeLinkedIn:
+    def __init__(
+        self,
+        latency: float = 0.05,
+        failure_rate: float = 0.0,
+        failure_after_create: float = 0.0,
+        rate_limit: float | None = None,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_after_create = failure_after_create
+        self.rate_limit = rate_limit
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = []
+        self.posts = {}
+        # Created posts in order, as the finder lists them
+        self.feed = []
+        self.counts = {"requests": 0, "created": 0, "deduplicated": 0, "rate_limited": 0, "failed": 0}
+
+    def handle(self, body: dict, idempotency_key: str | None) -> tuple[int, dict]:
+        time.sleep(self.latency)
+        with self._lock:
+            self.counts["requests"] += 1
+            now = time.monotonic()
+            if self.rate_limit:
+                self._window = [t for t in self._window if now - t < 1]
+                if len(self._window) >= self.rate_limit:
+                    self.counts["rate_limited"] += 1
+                    return 429, {"Retry-After": "1"}
+                self._window.append(now)
+            if self._rng.random() < self.failure_rate:
+                self.counts["failed"] += 1
+                return 503, {}
+            if idempotency_key and idempotency_key in self.posts:
+                self.counts["deduplicated"] += 1
+                return 201, {"x-restli-id": self.posts[idempotency_key]}
+            post_id = f"urn:li:share:{len(self.posts) + 1}"
+            self.posts[idempotency_key or post_id] = post_id
+            self.feed.append({"id": post_id, "author": body.get("author"), "commentary": body.get("commentary")})
+            self.counts["created"] += 1
+            if self._rng.random() < self.failure_after_create:
+                # The post exists but the client never hears about it
+                self.counts["failed"] += 1
+                return 503, {}
+            return 201, {"x-restli-id": post_id}
+
+    def recent(self, author: str | None, count: int) -> list:
+        """
+        The author's `count` latest posts, newest first.
+        """
+        time.sleep(self.latency)
+        with self._lock:
+            return [post for post in reversed(self.feed) if post["author"] == author][:count]
+
+    def serve(self, port: int = 0) -> ThreadingHTTPServer:
+        """
+        Starts the server on a background thread and returns it; `server_port` has the bound port.
+        """
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so clients can reuse their connections like with the real API
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                status, headers = api.handle(body, self.headers.get("X-Idempotency-Key"))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                posts = api.recent(query.get("author", [None])[0], int(query.get("count", ["10"])[0]))
+                body = json.dumps({"elements": posts}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-after-create", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="requests per second before 429s")
+    args = parser.parse_args()
+
+    fake = FakeLinkedIn(args.latency, args.failure_rate, args.failure_after_create, args.rate_limit)
+    server = fake.serve(args.port)
+    print(f"Fake LinkedIn API on http://127.0.0.1:{server.server_port}/rest/posts")
+    try:
+        while True:
+            time.sleep(5)
+            print(fake.counts)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main_cli()
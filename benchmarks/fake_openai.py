@@ -0,0 +1,155 @@
+"""
+Local stand-in for the OpenAI chat completions API, plus the pages it cites.
+
+Answers `POST /v1/chat/completions` like the real endpoint, streamed or not,
+after a fixed latency. When the request offers tools and holds no tool result
+yet, the answer is a `fetch_url_data` call for one of the articles the server
+itself serves under `GET /articles/<n>`, so the tool loop runs without the
+network. Otherwise it writes a draft whose length is set by --words.
+
+Point the API at it with
+
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=fake uvicorn api:app
+
+    python benchmarks/fake_openai.py --port 8900 --latency 0.2
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ARTICLE = """<html><head><title>Article {n}</title></head><body><article>
+<h1>Notes on AI agents, part {n}</h1>
+{paragraphs}
+</article></body></html>"""
+
+
+class FakeOpenAI:
+    def __init__(self, latency: float = 0.2, words: int = 120, tool_calls: bool = True):
+        self.latency = latency
+        self.words = words
+        self.tool_calls = tool_calls
+        self.base_url = None
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.counts = {"completions": 0, "tool_calls": 0, "streamed": 0, "articles": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def article(self, n: int) -> str:
+        self._count("articles")
+        paragraph = "<p>Agents plan, call tools and check their own work. Paragraph {i} of article {n}.</p>"
+        return ARTICLE.format(n=n, paragraphs="\n".join(paragraph.format(i=i, n=n) for i in range(20)))
+
+    def complete(self, request: dict) -> dict:
+        """
+        Returns the assistant message for a chat completion request.
+        """
+        time.sleep(self.latency)
+        n = next(self._ids)
+        self._count("completions")
+        messages = request["messages"]
+        if self.tool_calls and request.get("tools") and not any(m["role"] == "tool" for m in messages):
+            self._count("tool_calls")
+            arguments = json.dumps({"url": f"{self.base_url}/articles/{n % 50}"})
+            return {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {"id": f"call_{n}", "type": "function", "function": {"name": "fetch_url_data", "arguments": arguments}}
+                ],
+            }
+        # Varies with the conversation, so every draft differs from the previous one
+        words = ["Agents"] + ["are", "changing", "how", "teams", "ship", "work."] * (self.words // 6)
+        return {"role": "assistant", "content": " ".join(words) + f" #{len(json.dumps(messages)) % 997}"}
+
+    def serve(self, port: int = 0) -> ThreadingHTTPServer:
+        """
+        Starts the server on a background thread and returns it; `server_port` has the bound port.
+        """
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int, content_type: str, body: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _chunk(self, data: str) -> None:
+                payload = f"data: {data}\n\n".encode()
+                self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+
+            def do_GET(self):
+                if self.path.startswith("/articles/"):
+                    self._send(200, "text/html; charset=utf-8", api.article(int(self.path.rsplit("/", 1)[1])).encode())
+                else:
+                    self._send(404, "text/plain", b"not found")
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                message = api.complete(request)
+                base = {"id": f"chatcmpl-{id(message)}", "created": int(time.time()), "model": request.get("model")}
+                if not request.get("stream"):
+                    body = {
+                        **base,
+                        "object": "chat.completion",
+                        "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150},
+                    }
+                    self._send(200, "application/json", json.dumps(body).encode())
+                    return
+                api._count("streamed")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                chunk = {**base, "object": "chat.completion.chunk"}
+                if message.get("tool_calls"):
+                    deltas = [{"role": "assistant", "tool_calls": [{"index": 0, **message["tool_calls"][0]}]}]
+                else:
+                    deltas = [{"content": word + " "} for word in message["content"].split(" ")]
+                for delta in deltas:
+                    self._chunk(json.dumps({**chunk, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}))
+                self._chunk(json.dumps({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}))
+                self._chunk("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{server.server_port}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--words", type=int, default=120, help="length of the drafts")
+    parser.add_argument("--no-tool-calls", action="store_true", help="never answer with a tool call")
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(args.latency, args.words, not args.no_tool_calls)
+    server = fake.serve(args.port)
+    print(f"Fake OpenAI API on http://127.0.0.1:{server.server_port}/v1")
+    try:
+        while True:
+            time.sleep(5)
+            print(fake.counts)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,139 @@
+"""
+Offline stand-ins for the OpenAI chat models and the DuckDuckGo client used by the benchmarks.
+"""
+import asyncio
+import random
+import re
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from context import count_tokens
+
+
+class LatencyFakeChatModel(BaseChatModel):
+    """
+    Chat model whose latency grows with the prompt size, like a hosted LLM.
+
+    Each call costs `base_latency` plus `input_latency_per_1k` per thousand
+    prompt tokens plus `output_latency_per_token` per generated token. Prompts
+    larger than `context_window` fail the way the OpenAI API does. Token usage
+    is accumulated in `usage` for cost estimates.
+    """
+
+    base_latency: float = 0.3
+    input_latency_per_1k: float = 0.05
+    output_latency_per_token: float = 0.01
+    output_tokens: int = 250
+    context_window: int = 128_000
+    reply: str = "summary"
+    _usage: dict = PrivateAttr(default_factory=lambda: {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+
+    @property
+    def _llm_type(self) -> str:
+        return "latency-fake"
+
+    @property
+    def usage(self) -> dict:
+        return self._usage
+
+    def reset_usage(self):
+        self._usage.update(calls=0, input_tokens=0, output_tokens=0)
+
+    def _message(self, messages) -> AIMessage:
+        return AIMessage(content=" ".join([self.reply] * self.output_tokens))
+
+    def _respond(self, messages) -> tuple[ChatResult, float]:
+        prompt_tokens = sum(count_tokens(str(m.content)) for m in messages)
+        if prompt_tokens > self.context_window:
+            raise ValueError(
+                f"This model's maximum context length is {self.context_window} tokens, "
+                f"however you requested {prompt_tokens} tokens"
+            )
+        self._usage["calls"] += 1
+        self._usage["input_tokens"] += prompt_tokens
+        self._usage["output_tokens"] += self.output_tokens
+        latency = (
+            self.base_latency
+            + self.input_latency_per_1k * prompt_tokens / 1000
+            + self.output_latency_per_token * self.output_tokens
+        )
+        message = self._message(messages)
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": prompt_tokens + self.output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)]), latency
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        result, latency = self._respond(messages)
+        time.sleep(latency)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        result, latency = self._respond(messages)
+        await asyncio.sleep(latency)
+        return result
+
+
+URL_PATTERN = re.compile(r"https?://\S+")
+
+
+class ScriptedChatModel(LatencyFakeChatModel):
+    """
+    Stand-in for the tool-calling draft model, scripted like a typical session.
+
+    Until tool results are in the conversation it asks for them: `fetch_url_data`
+    for every URL of the first human message and `web_search` on its text.
+    Once they are in, it writes a draft of `output_tokens` words.
+    """
+
+    base_latency: float = 0.5
+    search: bool = True
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _message(self, messages) -> AIMessage:
+        if any(isinstance(m, ToolMessage) for m in messages):
+            words = " ".join(["insight"] * (self.output_tokens - 2))
+            return AIMessage(content=f"Draft post: {words}.")
+        topic = next((str(m.content) for m in messages if isinstance(m, HumanMessage)), "")
+        calls = [{"name": "fetch_url_data", "args": {"url": url}} for url in URL_PATTERN.findall(topic)]
+        text = URL_PATTERN.sub(" ", topic).strip()
+        if self.search and text:
+            calls.append({"name": "web_search", "args": {"topic": text[:200]}})
+        for i, call in enumerate(calls):
+            call["id"] = f"call_{self._usage['calls']}_{i}"
+        return AIMessage(content="", tool_calls=calls)
+
+
+class StubDDGS:
+    """
+    Drop-in for `ddgs.DDGS` returning deterministic results after `latency` seconds.
+    """
+
+    latency = 0.3
+    words = "agent graph model token latency cache search post engineer pipeline data insight".split()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def text(self, query: str, max_results: int = 5) -> list:
+        time.sleep(self.latency)
+        rng = random.Random(query)
+        return [
+            {
+                "title": f"{query[:40]} result {i}",
+                "href": f"https://example.com/{i}",
+                "body": " ".join(rng.choice(self.words) for _ in range(60)),
+            }
+            for i in range(max_results)
+        ]
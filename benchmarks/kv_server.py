@@ -0,0 +1,178 @@
+"""
+Local stand-in for a Redis-compatible key-value server.
+
+Speaks RESP2 and implements only the commands `backend/kv.py` sends (strings,
+hashes and sorted sets, plus PING, SELECT, KEYS and FLUSHDB), keeping
+everything in memory. Good enough to run several API workers against
+`CHECKPOINTER_BACKEND=kv` without installing Redis.
+
+    python benchmarks/kv_server.py --port 6379
+"""
+import argparse
+import asyncio
+import fnmatch
+import threading
+import time
+
+
+class KVServer:
+    def __init__(self):
+        self.data = {}
+        self.commands = 0
+
+    def _hash(self, key: bytes) -> dict:
+        return self.data.setdefault(key, {})
+
+    def _zset(self, key: bytes) -> dict:
+        return self.data.setdefault(key, {})
+
+    def _ranked(self, key: bytes) -> list:
+        return sorted(self.data.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+
+    def _drop_if_empty(self, key: bytes) -> None:
+        if key in self.data and not self.data[key]:
+            del self.data[key]
+
+    @staticmethod
+    def _range(items: list, start: int, stop: int) -> list:
+        stop = len(items) if stop == -1 else stop + 1
+        return items[start:stop]
+
+    def handle(self, command: list):
+        """
+        Runs one command and returns its reply: str for a status, Exception for an error.
+        """
+        self.commands += 1
+        name, args = command[0].upper(), command[1:]
+        if name == b"PING":
+            return "PONG"
+        if name in (b"SELECT", b"AUTH"):
+            return "OK"
+        if name == b"FLUSHDB":
+            self.data.clear()
+            return "OK"
+        if name == b"GET":
+            value = self.data.get(args[0])
+            return value if isinstance(value, bytes) else None
+        if name == b"SET":
+            self.data[args[0]] = args[1]
+            return "OK"
+        if name == b"DEL":
+            return sum(self.data.pop(key, None) is not None for key in args)
+        if name == b"KEYS":
+            pattern = args[0].decode()
+            return [key for key in self.data if fnmatch.fnmatchcase(key.decode(), pattern)]
+        if name == b"HSET":
+            fields = self._hash(args[0])
+            pairs = list(zip(args[1::2], args[2::2]))
+            added = sum(field not in fields for field, _ in pairs)
+            fields.update(pairs)
+            return added
+        if name == b"HSETNX":
+            fields = self._hash(args[0])
+            if args[1] in fields:
+                return 0
+            fields[args[1]] = args[2]
+            return 1
+        if name == b"HGET":
+            return self.data.get(args[0], {}).get(args[1])
+        if name == b"HGETALL":
+            return [part for pair in self.data.get(args[0], {}).items() for part in pair]
+        if name == b"HKEYS":
+            return list(self.data.get(args[0], {}))
+        if name == b"HDEL":
+            fields = self.data.get(args[0], {})
+            removed = sum(fields.pop(field, None) is not None for field in args[1:])
+            self._drop_if_empty(args[0])
+            return removed
+        if name == b"ZADD":
+            members = self._zset(args[0])
+            pairs = list(zip(args[1::2], args[2::2]))
+            added = sum(member not in members for _, member in pairs)
+            members.update((member, float(score)) for score, member in pairs)
+            return added
+        if name == b"ZREM":
+            members = self.data.get(args[0], {})
+            removed = sum(members.pop(member, None) is not None for member in args[1:])
+            self._drop_if_empty(args[0])
+            return removed
+        if name == b"ZSCORE":
+            score = self.data.get(args[0], {}).get(args[1])
+            return None if score is None else repr(score).encode()
+        if name == b"ZCARD":
+            return len(self.data.get(args[0], {}))
+        if name == b"ZRANGE":
+            return [member for member, _ in self._range(self._ranked(args[0]), int(args[1]), int(args[2]))]
+        if name == b"ZRANGEBYSCORE":
+            low, high = float(args[1].lstrip(b"(")), float(args[2].lstrip(b"("))
+            return [member for member, score in self._ranked(args[0]) if low <= score <= high]
+        return Exception(f"ERR unknown command '{name.decode()}'")
+
+    @staticmethod
+    def encode(reply) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, Exception):
+            return b"-%s\r\n" % str(reply).encode()
+        if isinstance(reply, str):
+            return b"+%s\r\n" % reply.encode()
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, bytes):
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+        return b"*%d\r\n" % len(reply) + b"".join(KVServer.encode(item) for item in reply)
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                command = []
+                for _ in range(int(header[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    command.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self.encode(self.handle(command)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def serve(self, port: int = 0) -> int:
+        """
+        Starts the server on a background thread and returns the bound port.
+        """
+        started = threading.Event()
+        bound = []
+
+        async def run():
+            server = await asyncio.start_server(self._client, "127.0.0.1", port)
+            bound.append(server.sockets[0].getsockname()[1])
+            started.set()
+            async with server:
+                await server.serve_forever()
+
+        threading.Thread(target=asyncio.run, args=(run(),), daemon=True).start()
+        started.wait()
+        return bound[0]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    server = KVServer()
+    port = server.serve(args.port)
+    print(f"Key-value stand-in on redis://127.0.0.1:{port}/0")
+    try:
+        while True:
+            time.sleep(5)
+            print({"keys": len(server.data), "commands": server.commands})
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,90 @@
+"""
+Posting throughput of the LinkedIn clients against the fake LinkedIn server.
+
+Compares a fresh `requests.post` per call (how `create_linkedin_post` used to
+post) with the pooled `LinkedInClient`, sequentially and from a thread pool,
+and with `AsyncLinkedInClient` under asyncio. The fake server runs locally
+without TLS, so the gain from reused connections is a lower bound of what
+it is against api.linkedin.com.
+
+    python benchmarks/linkedin_clients.py --posts 500 --concurrency 16 --latency 0.01
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "backend"))
+sys.path.insert(0, BENCH_DIR)
+
+import requests
+
+from fake_linkedin import FakeLinkedIn
+from linkedin_client import AsyncLinkedInClient, LinkedInClient
+
+
+def unpooled_post(client: LinkedInClient, content: str) -> dict:
+    response = requests.post(client.api_url, headers=client.headers, json=client.post_data(content, "PUBLIC"))
+    return {"success": response.ok}
+
+
+def run_sequential(post, posts: int) -> list:
+    return [post(f"Benchmark post {i}") for i in range(posts)]
+
+
+def run_threads(post, posts: int, concurrency: int) -> list:
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(post, (f"Benchmark post {i}" for i in range(posts))))
+
+
+async def run_async(client: AsyncLinkedInClient, posts: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> dict:
+        async with semaphore:
+            return await client.create_post(f"Benchmark post {i}")
+
+    results = await asyncio.gather(*(one(i) for i in range(posts)))
+    await client.aclose()
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.01, help="fake API seconds per request")
+    args = parser.parse_args()
+
+    fake = FakeLinkedIn(latency=args.latency)
+    server = fake.serve()
+    api_url = f"http://127.0.0.1:{server.server_port}/rest/posts"
+    credentials = ("urn:li:person:benchmark", "offline-benchmark")
+    client = LinkedInClient(*credentials, api_url=api_url, pool_size=args.concurrency)
+
+    modes = [
+        ("unpooled", lambda: run_sequential(lambda c: unpooled_post(client, c), args.posts)),
+        ("pooled", lambda: run_sequential(client.create_post, args.posts)),
+        ("unpooled threads", lambda: run_threads(lambda c: unpooled_post(client, c), args.posts, args.concurrency)),
+        ("pooled threads", lambda: run_threads(client.create_post, args.posts, args.concurrency)),
+        ("async", lambda: asyncio.run(run_async(
+            AsyncLinkedInClient(*credentials, api_url=api_url, pool_size=args.concurrency),
+            args.posts,
+            args.concurrency,
+        ))),
+    ]
+    print(f"{'mode':<18}{'seconds':>9}{'posts/s':>10}{'ms/post':>9}{'ok':>6}")
+    for name, run in modes:
+        start = time.perf_counter()
+        results = run()
+        elapsed = time.perf_counter() - start
+        ok = sum(r["success"] for r in results)
+        print(f"{name:<18}{elapsed:>9.2f}{args.posts / elapsed:>10.1f}{elapsed / args.posts * 1000:>9.2f}{ok:>6}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,85 @@
+"""
+Latency and token cost of single-call vs map-reduce summarization.
+
+Uses `LatencyFakeChatModel` in place of gpt-4o-mini, so the numbers follow
+its latency model rather than the live API.
+
+    python benchmarks/map_reduce.py --sizes 4000 20000 80000 200000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "backend"))
+sys.path.insert(0, BENCH_DIR)
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+import main
+from Prompt import summarize_text_query
+from context import count_tokens
+from fakes import LatencyFakeChatModel
+
+# gpt-4o-mini list prices in USD per million tokens
+INPUT_PRICE = 0.15
+OUTPUT_PRICE = 0.60
+WORDS = "agent graph model token latency cache search post engineer pipeline data insight".split()
+
+
+def make_document(tokens: int) -> str:
+    rng = random.Random(tokens)
+    paragraphs = []
+    while count_tokens("\n\n".join(paragraphs)) < tokens:
+        paragraphs.append(". ".join(" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(20)) + ".")
+    return "\n\n".join(paragraphs)
+
+
+async def single_call(text: str, llm) -> str:
+    summary = await llm.ainvoke(summarize_text_query.format(text=text))
+    return summary.content
+
+
+async def measure(summarize, text: str, llm: LatencyFakeChatModel) -> dict:
+    llm.reset_usage()
+    start = time.perf_counter()
+    try:
+        await summarize(text, llm)
+        error = None
+    except ValueError as e:
+        error = str(e).split(",")[0]
+    elapsed = time.perf_counter() - start
+    usage = dict(llm.usage)
+    cost = (usage["input_tokens"] * INPUT_PRICE + usage["output_tokens"] * OUTPUT_PRICE) / 1e6
+    return {"seconds": elapsed, "cost": cost, "error": error, **usage}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4000, 20000, 80000, 200000])
+    parser.add_argument("--context-window", type=int, default=128_000)
+    parser.add_argument("--input-latency", type=float, default=0.05, help="seconds per 1k prompt tokens")
+    parser.add_argument("--output-latency", type=float, default=0.01, help="seconds per generated token")
+    parser.add_argument("--concurrency", type=int, default=main.MAP_REDUCE_MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    main.MAP_REDUCE_MAX_CONCURRENCY = args.concurrency
+    llm = LatencyFakeChatModel(
+        context_window=args.context_window,
+        input_latency_per_1k=args.input_latency,
+        output_latency_per_token=args.output_latency,
+    )
+
+    print(f"{'tokens':>8} {'mode':<11}{'seconds':>9}{'calls':>7}{'in tok':>9}{'cost $':>10}  note")
+    for size in args.sizes:
+        text = make_document(size)
+        for mode, summarize in (("single", single_call), ("map-reduce", main.map_reduce_summary)):
+            r = asyncio.run(measure(summarize, text, llm))
+            print(f"{size:>8} {mode:<11}{r['seconds']:>9.2f}{r['calls']:>7}{r['input_tokens']:>9}"
+                  f"{r['cost']:>10.5f}  {r['error'] or ''}")
+
+
+if __name__ == "__main__":
+    main_cli()
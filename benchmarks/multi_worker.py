@@ -0,0 +1,288 @@
+"""
+Multi-worker check for `backend/api.py`.
+
+Starts the API as a separate server with `python api.py --workers N` for each
+N in --workers, on a shared session backend: SQLite files in WAL mode, or with
+--backend kv the key-value stand-in from `kv_server.py`. The chat models are
+`fake_openai.py`, LinkedIn is `fake_linkedin.py`, and every other store lives
+in a fresh temp directory per run.
+
+Each session sends /generate, one /edit and an approving /post on a new
+connection per request, so the kernel spreads them over the workers. The
+`X-Worker-Id` header tells which worker served each request. A session passes
+when every request succeeds and its post is published exactly once; sessions
+whose requests were served by more than one worker show the shared state at
+work. Throughput is compared with the single-worker run; it can only scale
+as far as there are free cores, which the report lists.
+
+Exits non-zero unless every run reached all its workers, settled every
+session with a published post, and created no LinkedIn post twice.
+
+    python benchmarks/multi_worker.py --workers 1 2 4 --sessions 64 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCH_DIR, "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from outbox import FINAL_STATUSES
+
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "multi_worker.json")
+
+
+def summarize(seconds: list) -> dict:
+    ms = sorted(s * 1000 for s in seconds) or [0.0]
+    return {
+        "count": len(seconds),
+        "mean_ms": statistics.fmean(ms),
+        "p50_ms": ms[len(ms) // 2],
+        "p95_ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+        "max_ms": ms[-1],
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(client, workers: int, timeout: float = 120) -> set:
+    """
+    Waits until the server answers, and until requests have reached `workers` distinct workers.
+    """
+    seen = set()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/sessions/stats")
+            seen.add(response.headers["X-Worker-Id"])
+            if len(seen) >= workers:
+                return seen
+        except Exception:
+            await asyncio.sleep(0.5)
+    return seen
+
+
+async def run_session(client, i: int, article_url: str, results: dict) -> None:
+    workers = []
+    start = time.perf_counter()
+    try:
+        response = await client.post("/generate", json={"query": f"ai agents in production, part {i}", "url": article_url})
+        workers.append(response.headers.get("X-Worker-Id"))
+        response.raise_for_status()
+        session_id = response.json()["session_id"]
+
+        response = await client.post("/edit", json={"session_id": session_id, "user_feedback": "make it shorter"})
+        workers.append(response.headers.get("X-Worker-Id"))
+        response.raise_for_status()
+        if not response.json().get("generated_post"):
+            raise ValueError("empty revision")
+
+        response = await client.post("/post", json={"session_id": session_id, "user_feedback": "approve"})
+        workers.append(response.headers.get("X-Worker-Id"))
+        response.raise_for_status()
+        outbox_id = response.json().get("outbox_id")
+        if outbox_id is None:
+            raise ValueError(f"post not queued: {response.json()}")
+    except Exception as e:
+        results["failures"].append(f"session {i}: {e!r}")
+        return
+    results["latency"].append(time.perf_counter() - start)
+    results["outbox_ids"].append(outbox_id)
+    if len(set(workers)) > 1:
+        results["crossed"] += 1
+    results["workers"].update(workers)
+
+
+async def wait_published(client, outbox_ids: list, timeout: float = 60) -> dict:
+    statuses = {}
+    deadline = time.monotonic() + timeout
+    pending = list(outbox_ids)
+    while pending and time.monotonic() < deadline:
+        for outbox_id in list(pending):
+            status = (await client.get(f"/outbox/{outbox_id}")).json()["status"]
+            if status in FINAL_STATUSES:
+                statuses[outbox_id] = status
+                pending.remove(outbox_id)
+        if pending:
+            await asyncio.sleep(0.5)
+    return {
+        "published": sum(s == "published" for s in statuses.values()),
+        "failed": sum(s == "failed" for s in statuses.values()),
+        "needs_check": sum(s == "needs_check" for s in statuses.values()),
+        "unsettled": len(pending),
+    }
+
+
+async def drive(base_url: str, workers: int, args, article_base: str) -> dict:
+    import httpx
+
+    # No keep-alive: every request opens a connection, which any worker may accept
+    limits = httpx.Limits(max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=base_url, timeout=httpx.Timeout(120), limits=limits) as client:
+        ready = await wait_ready(client, workers)
+        results = {"latency": [], "failures": [], "outbox_ids": [], "crossed": 0, "workers": set()}
+        limit = asyncio.Semaphore(args.concurrency)
+
+        async def one(i):
+            async with limit:
+                await run_session(client, i, f"{article_base}/articles/{i % 50}", results)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.sessions)))
+        elapsed = time.perf_counter() - start
+        outbox = await wait_published(client, results["outbox_ids"])
+    return {
+        "workers": workers,
+        "workers_ready": len(ready),
+        "workers_used": len(results["workers"]),
+        "wall_seconds": elapsed,
+        "sessions_per_second": (args.sessions - len(results["failures"])) / elapsed,
+        "sessions": summarize(results["latency"]),
+        "crossed_sessions": results["crossed"],
+        "failed_sessions": len(results["failures"]),
+        "failure_samples": results["failures"][:3],
+        "outbox": outbox,
+    }
+
+
+def check(run: dict, sessions: int) -> list:
+    """
+    The invariants a run broke, as messages.
+    """
+    failures = []
+    if run["workers_ready"] < run["workers"]:
+        failures.append(f"only {run['workers_ready']} of {run['workers']} workers answered")
+    if run["failed_sessions"]:
+        failures.append(f"{run['failed_sessions']} sessions failed")
+    outbox = run["outbox"]
+    if outbox["published"] != sessions:
+        failures.append(
+            f"{outbox['published']} of {sessions} posts published "
+            f"({outbox['failed']} failed, {outbox['needs_check']} need checking, {outbox['unsettled']} unsettled)"
+        )
+    if run["duplicate_posts"]:
+        failures.append(f"{run['duplicate_posts']} posts were created more than once")
+    if run["linkedin_created"] != outbox["published"]:
+        failures.append(f"{run['linkedin_created']} LinkedIn posts for {outbox['published']} published entries")
+    return failures
+
+
+def run_workers(workers: int, args, env: dict, article_base: str) -> dict:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "api.py", "--workers", str(workers), "--port", str(port)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    try:
+        return asyncio.run(drive(f"http://127.0.0.1:{port}", workers, args, article_base))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--backend", choices=("sqlite", "kv"), default="sqlite")
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake chat completion")
+    parser.add_argument("--linkedin-latency", type=float, default=0.01)
+    parser.add_argument("--verbose", action="store_true", help="show the server logs")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BENCH_DIR)
+    from fake_linkedin import FakeLinkedIn
+    from fake_openai import FakeOpenAI
+    from kv_server import KVServer
+
+    fake_openai = FakeOpenAI(latency=args.llm_latency)
+    openai_server = fake_openai.serve()
+    linkedin = FakeLinkedIn(latency=args.linkedin_latency)
+    linkedin_server = linkedin.serve()
+
+    runs = []
+    for workers in args.workers:
+        # Every run starts from empty stores
+        state_dir = tempfile.mkdtemp(prefix="multi-worker-")
+        env = dict(
+            os.environ,
+            CHECKPOINTER_BACKEND=args.backend,
+            CHECKPOINTER_PATH=os.path.join(state_dir, "checkpoints.sqlite"),
+            SESSIONS_PATH=os.path.join(state_dir, "sessions.sqlite"),
+            OPENAI_BASE_URL=f"{fake_openai.base_url}/v1",
+            OPENAI_API_KEY="offline-benchmark",
+            LINKEDIN_API_URL=f"http://127.0.0.1:{linkedin_server.server_port}/rest/posts",
+            USER_URN="urn:li:person:benchmark",
+            LINKEDIN_ACCESS_TOKEN="offline-benchmark",
+            OUTBOX_RATE="1000",
+            OUTBOX_BURST="1000",
+            OUTBOX_POLL_INTERVAL="0.5",
+            PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(dir=state_dir),
+            LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"),
+        )
+        for name in ("SEARCH_CACHE", "PAGE_STORE", "LLM_CACHE", "OUTBOX", "SCHEDULER"):
+            env[f"{name}_PATH"] = os.path.join(state_dir, f"{name.lower()}.sqlite")
+        if args.backend == "kv":
+            env["KV_URL"] = f"redis://127.0.0.1:{KVServer().serve()}/0"
+        created_before = linkedin.counts["created"]
+        deduplicated_before = linkedin.counts["deduplicated"]
+
+        run = run_workers(workers, args, env, fake_openai.base_url)
+        run["linkedin_created"] = linkedin.counts["created"] - created_before
+        # Sessions can write the same draft, so repeats are told by the idempotency key: the fake
+        # drops them, the real API would have posted them again
+        run["duplicate_posts"] = linkedin.counts["deduplicated"] - deduplicated_before
+        run["failures"] = check(run, args.sessions)
+        runs.append(run)
+        print(f"{workers} workers: {run['sessions_per_second']:.2f} sessions/s, "
+              f"p50 {run['sessions']['p50_ms']:.0f} ms, {run['crossed_sessions']} sessions crossed workers, "
+              f"{run['failed_sessions']} failed, {run['outbox']['published']} published "
+              f"({run['linkedin_created']} LinkedIn posts)")
+        for sample in run["failure_samples"]:
+            print(f"  {sample}")
+        for failure in run["failures"]:
+            print(f"  FAIL: {failure}")
+
+    baseline = runs[0]["sessions_per_second"] / runs[0]["workers"]
+    for run in runs:
+        run["speedup"] = run["sessions_per_second"] / runs[0]["sessions_per_second"]
+        run["scaling_efficiency"] = run["sessions_per_second"] / (baseline * run["workers"])
+    openai_server.shutdown()
+    linkedin_server.shutdown()
+
+    report = {"config": vars(args), "cpu_count": os.cpu_count(), "runs": runs, "fake_openai": fake_openai.counts}
+    print(f"{'workers':>8}{'sessions/s':>12}{'speedup':>9}{'efficiency':>12}{'crossed':>9}{'failed':>8}")
+    for run in runs:
+        print(f"{run['workers']:>8}{run['sessions_per_second']:>12.2f}{run['speedup']:>9.2f}"
+              f"{run['scaling_efficiency']:>12.0%}{run['crossed_sessions']:>9}{run['failed_sessions']:>8}")
+    if os.cpu_count() < max(args.workers):
+        print(f"only {os.cpu_count()} CPU cores: runs with more workers than cores cannot scale")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results saved to {args.output}")
+    if any(run["failures"] for run in runs):
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,102 @@
+"""
+Throughput and failure handling of the publish outbox.
+
+Drains a fresh outbox against the fake LinkedIn server and reports how many
+posts were published, how many requests it took, and whether any post was
+created twice. Posts whose attempt failed after the server may have created
+them (--failure-after-create, 5xx) end up `needs_check` and are not retried
+blindly, since the real API does not deduplicate on the idempotency key; they
+are reconciled against the server's post list after --check-after seconds.
+
+    python benchmarks/outbox_throughput.py --posts 200 --workers 4 --rate 50 --failure-rate 0.2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "backend"))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_linkedin import FakeLinkedIn
+
+
+async def drain(publisher, outbox, posts: int) -> float:
+    await publisher.start()
+    start = time.perf_counter()
+    entries = [outbox.enqueue(f"Benchmark post {i}", f"bench:{i}") for i in range(posts)]
+    # Enqueueing the same posts again must not add anything
+    for i in range(posts):
+        outbox.enqueue(f"Benchmark post {i}", f"bench:{i}")
+    for entry in entries:
+        await publisher.wait(entry["id"])
+    # Entries that needed a check are settled by the reconcile step
+    while any(outbox.stats()[status] for status in ("pending", "in_flight", "sending", "needs_check")):
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    await publisher.stop()
+    return elapsed
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=50, help="client-side posts per second")
+    parser.add_argument("--burst", type=float, default=10)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake API seconds per request")
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--failure-after-create", type=float, default=0.05)
+    parser.add_argument("--server-rate-limit", type=float, default=None)
+    parser.add_argument("--max-attempts", type=int, default=8)
+    parser.add_argument("--check-after", type=float, default=0.2, help="seconds before a needs_check post is looked up")
+    args = parser.parse_args()
+
+    fake = FakeLinkedIn(args.latency, args.failure_rate, args.failure_after_create, args.server_rate_limit)
+    server = fake.serve()
+    os.environ["LINKEDIN_API_URL"] = f"http://127.0.0.1:{server.server_port}/rest/posts"
+    os.environ.setdefault("USER_URN", "urn:li:person:benchmark")
+    os.environ.setdefault("LINKEDIN_ACCESS_TOKEN", "offline-benchmark")
+    os.environ["OUTBOX_PATH"] = os.path.join(tempfile.mkdtemp(), "outbox.sqlite")
+
+    from outbox import OutboxWorkers, find_post, outbox, publish_post
+
+    publisher = OutboxWorkers(
+        outbox,
+        publish_post,
+        workers=args.workers,
+        rate=args.rate,
+        burst=args.burst,
+        max_attempts=args.max_attempts,
+        backoff_initial=0.05,
+        backoff_max=1,
+        poll_interval=0.1,
+        find=find_post,
+        check_after=args.check_after,
+    )
+    elapsed = asyncio.run(drain(publisher, outbox, args.posts))
+    server.shutdown()
+
+    stats = publisher.stats()
+    print(f"posts:       {args.posts} in {elapsed:.2f}s ({args.posts / elapsed:.1f} posts/s)")
+    print(f"published:   {stats['published']}  failed: {stats['failed']}  needs check: {stats['needs_check']}  "
+          f"retries: {stats['retries']}")
+    print(f"reconciled:  {stats['reconciled']} found on the server, {stats['requeued']} sent again")
+    print(f"outbox:      {outbox.stats()}")
+    print(f"server:      {fake.counts}")
+    print(f"created:     {fake.counts['created']} posts on the server, "
+          f"{fake.counts['deduplicated']} retries recognised by idempotency key")
+    # The fake deduplicates on the idempotency key, the real API would have created those posts again
+    duplicates = sum(n - 1 for n in Counter(post["commentary"] for post in fake.feed).values())
+    duplicates += fake.counts["deduplicated"]
+    print(f"duplicates:  {duplicates}")
+    if duplicates or stats["queue_needs_check"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,279 @@
+"""
+Offline end-to-end benchmark of the LangGraph pipeline.
+
+Builds the real graph from `backend/main.py` on fake models and runs whole
+sessions through it: generate, revise once, approve and publish. Nothing
+leaves the machine:
+
+- the draft model is a `ScriptedChatModel` that calls `fetch_url_data` and
+  `web_search` first and then drafts, the helper models are latency fakes
+- `ddgs.DDGS` is replaced by `StubDDGS`
+- URLs point at a local server that serves saved HTML pages, so the real
+  fetcher, page store and extractor run
+- approved posts go through the outbox to the fake LinkedIn server
+
+Reports wall time per graph node and tool, latency per flow, peak RSS and
+checkpoint size, and saves everything as JSON.
+
+    python benchmarks/pipeline.py --sessions 20 --concurrency 5 --output results.json
+"""
+import argparse
+import asyncio
+import functools
+import glob
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+from collections import defaultdict
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "backend"))
+sys.path.insert(0, BENCH_DIR)
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+DEFAULT_CORPUS = os.path.join(BENCH_DIR, "corpus", "pipeline")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "pipeline.json")
+
+
+class NodeTimer(BaseCallbackHandler):
+    """
+    Records the wall time of every graph node and tool run.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.started = {}
+        self.durations = defaultdict(list)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        if metadata and name == metadata.get("langgraph_node"):
+            self.started[run_id] = (f"node:{name}", time.perf_counter())
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self.started[run_id] = (f"tool:{kwargs.get('name') or serialized.get('name')}", time.perf_counter())
+
+    def _end(self, run_id) -> None:
+        if run_id in self.started:
+            name, start = self.started.pop(run_id)
+            self.durations[name].append(time.perf_counter() - start)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+
+def summarize(seconds: list) -> dict:
+    ms = sorted(s * 1000 for s in seconds)
+    return {
+        "count": len(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p50_ms": ms[len(ms) // 2],
+        "p95_ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+        "max_ms": ms[-1],
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if platform.system() == "Darwin" else 1024)
+
+
+def serve_pages(directory: str, latency: float) -> ThreadingHTTPServer:
+    class Handler(SimpleHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=directory))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def checkpoint_size(graph, thread_id: str) -> dict:
+    checkpointer = graph.checkpointer
+    sizes = [
+        len(checkpointer.serde.dumps_typed(c.checkpoint)[1])
+        async for c in checkpointer.alist({"configurable": {"thread_id": thread_id}})
+    ]
+    return {"checkpoints": len(sizes), "latest_bytes": sizes[0] if sizes else 0, "total_bytes": sum(sizes)}
+
+
+async def run_session(main, graph, timer: NodeTimer, topic: str, thread_id: str) -> dict:
+    config = {"configurable": {"thread_id": thread_id}, "callbacks": [timer]}
+    timings = {}
+
+    start = time.perf_counter()
+    await graph.ainvoke(
+        {
+            "messages": [main.HumanMessage(content=f"Initial topic: {topic}")],
+            "topic": topic,
+            "feedback": "No feedback yet.",
+            "tool_results": "No tools result",
+        },
+        config=config,
+    )
+    timings["generate"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await graph.aupdate_state(config, {"feedback": "Make it shorter and add a question at the end."})
+    await graph.ainvoke(None, config=config)
+    timings["revise"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await graph.aupdate_state(config, {"feedback": "approve", "ready_to_post": True})
+    result = await graph.ainvoke(None, config=config)
+    entry = await main.get_publisher().wait(result["outbox_id"])
+    timings["approve"] = time.perf_counter() - start
+
+    return {"timings": timings, "published": entry["status"] == "published",
+            "checkpoint": await checkpoint_size(graph, thread_id)}
+
+
+async def run_all(main, graph, timer: NodeTimer, topics: list, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int, topic: str) -> dict:
+        async with semaphore:
+            return await run_session(main, graph, timer, topic, f"bench-{i}")
+
+    await main.get_publisher().start()
+    try:
+        return await asyncio.gather(*(one(i, topic) for i, topic in enumerate(topics)))
+    finally:
+        await main.get_publisher().stop()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--url-share", type=float, default=0.5, help="share of topics that carry a URL")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="directory of saved *.html pages")
+    parser.add_argument("--pages", type=int, default=10, help="synthetic pages written when the corpus is empty")
+    parser.add_argument("--paragraphs", type=int, default=300, help="paragraphs per synthetic page")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="base seconds per draft model call")
+    parser.add_argument("--helper-latency", type=float, default=0.2, help="base seconds per helper model call")
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--fetch-latency", type=float, default=0.1)
+    parser.add_argument("--linkedin-latency", type=float, default=0.1)
+    parser.add_argument("--llm-cache", action="store_true", help="keep the helper LLM response caches on")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    from extractors import write_synthetic_corpus
+    from fake_linkedin import FakeLinkedIn
+    from fakes import LatencyFakeChatModel, ScriptedChatModel, StubDDGS
+
+    if not glob.glob(os.path.join(args.corpus, "*.html")):
+        write_synthetic_corpus(args.corpus, args.pages, args.paragraphs)
+    pages = sorted(os.path.basename(path) for path in glob.glob(os.path.join(args.corpus, "*.html")))
+    page_server = serve_pages(args.corpus, args.fetch_latency)
+    linkedin = FakeLinkedIn(latency=args.linkedin_latency)
+    linkedin_server = linkedin.serve()
+
+    # Every store starts empty, and nothing is written next to the real ones
+    state_dir = tempfile.mkdtemp(prefix="pipeline-bench-")
+    for name in ("SEARCH_CACHE", "PAGE_STORE", "LLM_CACHE", "OUTBOX", "SCHEDULER"):
+        os.environ[f"{name}_PATH"] = os.path.join(state_dir, f"{name.lower()}.sqlite")
+    if not args.llm_cache:
+        os.environ["LLM_CACHE_IMPROVE_INPUT"] = os.environ["LLM_CACHE_SUMMARIZE"] = "0"
+    os.environ.update(
+        LINKEDIN_API_URL=f"http://127.0.0.1:{linkedin_server.server_port}/rest/posts",
+        USER_URN="urn:li:person:benchmark",
+        LINKEDIN_ACCESS_TOKEN="offline-benchmark",
+        OUTBOX_RATE="1000",
+        OUTBOX_BURST="1000",
+    )
+    StubDDGS.latency = args.search_latency
+    stub_ddgs = types.ModuleType("ddgs")
+    stub_ddgs.DDGS = StubDDGS
+    sys.modules["ddgs"] = stub_ddgs
+
+    import main
+
+    models = main.Models(
+        main_llm=ScriptedChatModel(base_latency=args.llm_latency),
+        small_llm=LatencyFakeChatModel(base_latency=args.helper_latency),
+        improve_llm=LatencyFakeChatModel(base_latency=args.helper_latency, output_tokens=12, reply="engineering"),
+    )
+    graph = main.get_graph(models=models)
+    rss_before = peak_rss_mb()
+
+    base_url = f"http://127.0.0.1:{page_server.server_port}"
+    topics = []
+    for i in range(args.sessions):
+        topic = f"lessons learned running ai agents in production, part {i}"
+        if i < round(args.sessions * args.url_share):
+            topic = f"{base_url}/{pages[i % len(pages)]} {topic}"
+        topics.append(topic)
+
+    timer = NodeTimer()
+    start = time.perf_counter()
+    sessions = asyncio.run(run_all(main, graph, timer, topics, args.concurrency))
+    elapsed = time.perf_counter() - start
+    page_server.shutdown()
+    linkedin_server.shutdown()
+
+    results = {
+        "config": vars(args),
+        "wall_seconds": elapsed,
+        "sessions_per_second": args.sessions / elapsed,
+        "published": sum(s["published"] for s in sessions),
+        "flows": {
+            flow: summarize([s["timings"][flow] for s in sessions]) for flow in ("generate", "revise", "approve")
+        },
+        "nodes": {name: summarize(durations) for name, durations in sorted(timer.durations.items())},
+        "checkpoints": {
+            key: statistics.fmean(s["checkpoint"][key] for s in sessions)
+            for key in ("checkpoints", "latest_bytes", "total_bytes")
+        },
+        "rss_mb": {"after_import": rss_before, "peak": peak_rss_mb()},
+        "llm_usage": {"draft": dict(models.main_llm.usage), "summarize": dict(models.small_llm.usage),
+                      "improve_input": dict(models.improve_llm.usage)},
+    }
+
+    print(f"{args.sessions} sessions in {elapsed:.2f}s, {results['published']} published")
+    print(f"{'':<28}{'count':>6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for section in ("flows", "nodes"):
+        for name, s in results[section].items():
+            print(f"{name:<28}{s['count']:>6}{s['mean_ms']:>10.1f}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}"
+                  f"{s['max_ms']:>10.1f}")
+    checkpoints = results["checkpoints"]
+    print(f"checkpoints per session {checkpoints['checkpoints']:.1f}, latest {checkpoints['latest_bytes'] / 1024:.1f} KiB, "
+          f"total {checkpoints['total_bytes'] / 1024:.1f} KiB")
+    print(f"peak RSS {results['rss_mb']['peak']:.0f} MB ({results['rss_mb']['after_import']:.0f} MB after import)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
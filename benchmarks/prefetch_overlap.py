@@ -0,0 +1,115 @@
+"""
+Checks that the URL prefetch overlaps the LLM refinement of the topic.
+
+Builds the real graph from `backend/main.py` with a `fetch_url_data` tool
+and an improve model that each take --latency seconds, and a topic that needs
+refinement. Records when the `prefetch` and `improve_input` nodes start and
+end. They pass when their runs overlap and the input stage takes about one
+latency instead of two; exits non-zero otherwise.
+
+    python benchmarks/prefetch_overlap.py --latency 1
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "backend"))
+sys.path.insert(0, BENCH_DIR)
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+
+import main
+from fakes import LatencyFakeChatModel, ScriptedChatModel
+
+
+class NodeSpans(BaseCallbackHandler):
+    """
+    Records the start and end time of every graph node run.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.running = {}
+        self.spans = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        if metadata and name == metadata.get("langgraph_node"):
+            self.running[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self.running:
+            name, start = self.running.pop(run_id)
+            self.spans[name] = (start, time.perf_counter())
+
+
+async def run(latency: float) -> dict:
+    @tool
+    async def fetch_url_data(url: str) -> str:
+        """Fetches the page at the url."""
+        await asyncio.sleep(latency)
+        return f"Text of {url}: agents plan, call tools and check their own work."
+
+    models = main.Models(
+        main_llm=ScriptedChatModel(base_latency=0.01, output_tokens=20, output_latency_per_token=0, search=False),
+        improve_llm=LatencyFakeChatModel(
+            base_latency=latency, input_latency_per_1k=0, output_tokens=10, output_latency_per_token=0,
+            reply="Refined",
+        ),
+        tools=[fetch_url_data],
+    )
+    graph = main.compile_graph(MemorySaver(), models)
+    spans = NodeSpans()
+    config = {"configurable": {"thread_id": "overlap"}, "callbacks": [spans]}
+    start = time.perf_counter()
+    await graph.ainvoke(
+        {
+            "messages": [],
+            "topic": "ai agents in production pls",
+            "url": "https://example.com/agents",
+            "feedback": "No feedback yet.",
+            "tool_results": "No tools result",
+        },
+        config=config,
+    )
+    return {name: (s - start, e - start) for name, (s, e) in spans.spans.items()}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds of the fetch and of the refinement")
+    args = parser.parse_args()
+
+    spans = asyncio.run(run(args.latency))
+    for name in ("improve_input", "prefetch", "agent"):
+        if name in spans:
+            print(f"{name:<14}{spans[name][0]:>7.2f} -> {spans[name][1]:.2f} s")
+
+    failures = []
+    if "improve_input" not in spans or "prefetch" not in spans:
+        failures.append(f"missing node runs: {sorted(spans)}")
+    else:
+        (improve_start, improve_end), (fetch_start, fetch_end) = spans["improve_input"], spans["prefetch"]
+        overlap = min(improve_end, fetch_end) - max(improve_start, fetch_start)
+        input_stage = max(improve_end, fetch_end) - min(improve_start, fetch_start)
+        print(f"overlap {overlap:.2f} s, input stage {input_stage:.2f} s (serial would be {2 * args.latency:.2f} s)")
+        if overlap < 0.8 * args.latency:
+            failures.append(f"prefetch and improve_input overlap only {overlap:.2f} s")
+        if input_stage > 1.5 * args.latency:
+            failures.append(f"input stage took {input_stage:.2f} s")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    main_cli()
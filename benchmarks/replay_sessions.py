@@ -0,0 +1,205 @@
+"""
+Replays recorded API sessions against `backend/api.py`, offline.
+
+Record real traffic first, with the API started as
+
+    CASSETTE_MODE=record CASSETTE_PATH=cassettes/monday uvicorn api:app
+
+Every API request, chat model call, web search, page fetch and LinkedIn post
+then lands in zstd-compressed cassette files; recording skips the search,
+page and LLM caches, so no call is hidden behind a cache hit. This script
+sends the recorded API requests again, each session in its recorded order and
+at its recorded offset from the first request (scaled by --time-scale), to an
+in-process API running with CASSETTE_MODE=replay. Model, search, page and LinkedIn calls are
+answered from the same cassettes after their recorded latency (scaled by
+--latency-scale), so the run needs no network and no API keys, and can be
+profiled like production (e.g. under py-spy). With --base-url the requests go
+to an already running server instead, started in replay mode by hand.
+
+Reports latency and errors per endpoint, cassette misses and throughput, and
+saves everything as JSON.
+
+    python benchmarks/replay_sessions.py --cassettes cassettes/monday --time-scale 0.01
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "backend"))
+
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "replay_sessions.json")
+
+
+def summarize(seconds: list) -> dict:
+    ms = sorted(s * 1000 for s in seconds)
+    return {
+        "count": len(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p50_ms": ms[len(ms) // 2],
+        "p95_ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+        "max_ms": ms[-1],
+    }
+
+
+def recorded_sessions(path: str) -> list:
+    """
+    The recorded API requests grouped by session, each session in arrival order.
+    """
+    from cassettes import read_cassettes
+
+    sessions = defaultdict(list)
+    for entry in read_cassettes(path):
+        if entry["kind"] == "request":
+            sessions[entry["response"]["session_id"]].append(entry)
+    return sorted((sorted(s, key=lambda e: e["t"]) for s in sessions.values()), key=lambda s: s[0]["t"])
+
+
+async def send(client, endpoint: str, body: dict) -> tuple[int, dict]:
+    """
+    Sends one request and returns its status and the JSON answer, or for the
+    streaming endpoints the data of the last server-sent event.
+    """
+    if not endpoint.endswith("/stream"):
+        response = await client.post(endpoint, json=body)
+        return response.status_code, response.json()
+    data = {}
+    async with client.stream("POST", endpoint, json=body) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                data = {**data, **json.loads(line[len("data: "):])}
+        return response.status_code, data
+
+
+async def replay_session(client, requests: list, t0: float, start: float, time_scale: float, results: dict) -> None:
+    session_id = None
+    for entry in requests:
+        # Keep the recorded arrival time, but never overtake the previous request of the session
+        await asyncio.sleep(max(0.0, start + (entry["t"] - t0) * time_scale - time.perf_counter()))
+        endpoint = entry["key"]
+        body = dict(entry["response"]["body"])
+        if "session_id" in body:
+            if session_id is None:
+                results["skipped"] += 1
+                return
+            body["session_id"] = session_id
+        sent = time.perf_counter()
+        try:
+            status, data = await send(client, endpoint, body)
+        except Exception as e:
+            results["errors"][endpoint].append(str(e))
+            return
+        results["latency"][endpoint].append(time.perf_counter() - sent)
+        if status >= 400:
+            results["errors"][endpoint].append(f"HTTP {status}: {data}")
+            return
+        session_id = data.get("session_id", session_id)
+        if data.get("outbox_id"):
+            results["outbox_ids"].append(data["outbox_id"])
+
+
+async def replay(sessions: list, args) -> dict:
+    import httpx
+
+    results = {"latency": defaultdict(list), "errors": defaultdict(list), "outbox_ids": [], "skipped": 0}
+    t0 = sessions[0][0]["t"]
+    timeout = httpx.Timeout(None)
+
+    async def run(client):
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(replay_session(client, s, t0, start, args.time_scale, results) for s in sessions)
+        )
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout) as client:
+            await run(client)
+        return results
+
+    import api
+    from outbox import get_publisher
+
+    async with api.lifespan(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=timeout) as client:
+            await run(client)
+            # Approved posts are published in the background, wait for the outbox to settle
+            for outbox_id in results["outbox_ids"]:
+                await asyncio.wait_for(get_publisher().wait(outbox_id), timeout=60)
+            results["metrics"] = (await client.get("/metrics")).text
+        results["cassette"] = api.cassette.stats()
+        results["outbox"] = get_publisher().stats()
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassettes", required=True, help="directory of recorded *.jsonl.zst cassettes")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiplier on the recorded arrival times")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier on the recorded call latencies")
+    parser.add_argument("--base-url", help="replay against this running server instead of in-process")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    # The in-process API serves every external call from the cassettes and keeps
+    # its stores apart from the real ones, empty like at the start of a recording
+    state_dir = tempfile.mkdtemp(prefix="replay-")
+    for name in ("SEARCH_CACHE", "PAGE_STORE", "LLM_CACHE", "OUTBOX", "SCHEDULER"):
+        os.environ[f"{name}_PATH"] = os.path.join(state_dir, f"{name.lower()}.sqlite")
+    os.environ.update(
+        CASSETTE_MODE="replay",
+        CASSETTE_PATH=args.cassettes,
+        CASSETTE_LATENCY_SCALE=str(args.latency_scale),
+        LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"),
+    )
+
+    sessions = recorded_sessions(args.cassettes)
+    if not sessions:
+        sys.exit(f"No recorded API requests in {args.cassettes}")
+    requests = sum(len(s) for s in sessions)
+
+    start = time.perf_counter()
+    results = asyncio.run(replay(sessions, args))
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "config": vars(args),
+        "sessions": len(sessions),
+        "requests": requests,
+        "skipped_sessions": results["skipped"],
+        "wall_seconds": elapsed,
+        "requests_per_second": requests / elapsed,
+        "endpoints": {endpoint: summarize(v) for endpoint, v in sorted(results["latency"].items())},
+        "errors": {endpoint: len(v) for endpoint, v in results["errors"].items()},
+        "error_samples": {endpoint: v[:3] for endpoint, v in results["errors"].items()},
+        "cassette": results.get("cassette"),
+        "outbox": results.get("outbox"),
+    }
+
+    print(f"{len(sessions)} sessions, {requests} requests replayed in {elapsed:.2f}s")
+    print(f"{'':<20}{'count':>6}{'errors':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for endpoint, s in report["endpoints"].items():
+        print(f"{endpoint:<20}{s['count']:>6}{report['errors'].get(endpoint, 0):>8}{s['mean_ms']:>10.1f}"
+              f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['max_ms']:>10.1f}")
+    if report["cassette"]:
+        print(f"cassette: {report['cassette']['replayed']} calls replayed, {report['cassette']['misses']} misses")
+    for endpoint, samples in report["error_samples"].items():
+        print(f"{endpoint} error: {samples[0]}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    if "metrics" in results:
+        with open(os.path.splitext(args.output)[0] + ".prom", "w") as f:
+            f.write(results["metrics"])
+    print(f"results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
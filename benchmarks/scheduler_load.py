@@ -0,0 +1,76 @@
+"""
+Scheduling cost, restart time and dispatch lag of the post scheduler.
+
+Schedules many posts spread over the next few seconds, reloads the scheduler
+from disk as a restart would, then lets it dispatch everything and reports
+how late each post reached the outbox. A recording outbox stands in for the
+real one so only the scheduler is measured.
+
+    python benchmarks/scheduler_load.py --posts 50000 --spread 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+os.environ.setdefault("OUTBOX_PATH", os.path.join(tempfile.mkdtemp(), "outbox.sqlite"))
+
+from scheduler import PostScheduler
+
+
+class RecordingOutbox:
+    def __init__(self):
+        self.enqueued = {}
+
+    def enqueue(self, content: str, idempotency_key: str, visibility: str = "PUBLIC", account: str | None = None) -> dict:
+        self.enqueued.setdefault(idempotency_key, time.time())
+        return {"id": len(self.enqueued)}
+
+
+async def dispatch_all(scheduler: PostScheduler, outbox: RecordingOutbox, posts: int) -> None:
+    await scheduler.start()
+    while len(outbox.enqueued) < posts:
+        await asyncio.sleep(0.05)
+    await scheduler.stop()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--spread", type=float, default=10, help="seconds over which posts fall due")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "scheduled.sqlite")
+    outbox = RecordingOutbox()
+    scheduler = PostScheduler(path, outbox)
+    rng = random.Random(0)
+    # Leave time for the scheduling and the restart before the first post is due
+    start_at = time.time() + 3 + args.posts / 20000
+    due = {f"bench:{i}": start_at + rng.random() * args.spread for i in range(args.posts)}
+
+    start = time.perf_counter()
+    for key, publish_at in due.items():
+        scheduler.schedule(f"Post {key}", key, publish_at)
+    schedule_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scheduler = PostScheduler(path, outbox)
+    restart_seconds = time.perf_counter() - start
+
+    asyncio.run(dispatch_all(scheduler, outbox, args.posts))
+    lags = sorted((outbox.enqueued[key] - due[key]) * 1000 for key in due)
+
+    print(f"posts:     {args.posts}")
+    print(f"schedule:  {schedule_seconds:.2f}s ({args.posts / schedule_seconds:.0f} posts/s)")
+    print(f"restart:   {restart_seconds * 1000:.0f}ms to rebuild the heap")
+    print(f"lag ms:    p50 {statistics.median(lags):.1f}  p99 {lags[int(len(lags) * 0.99)]:.1f}  max {lags[-1]:.1f}")
+    print(f"early:     {sum(lag < 0 for lag in lags)} posts dispatched before their time")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,10 +1,35 @@
 import streamlit as st
+import json
 import time
 import requests
 
-BACKEND_INPUT_URL="http://localhost:8000/generate"
-BACKEND_EDIT_URL="http://localhost:8000/edit"
 BACKEND_POST_URL="http://localhost:8000/post"
+BACKEND_INPUT_STREAM_URL="http://localhost:8000/generate/stream"
+BACKEND_EDIT_STREAM_URL="http://localhost:8000/edit/stream"
+
+NODE_LOGS = {
+    ("improve_input", "start"): "🔍 Analyzing input query...",
+    ("improve_input", "end"): "✅ Query refined",
+    ("prefetch", "start"): "🌐 Fetching the provided URL...",
+    ("agent", "start"): "✍️ Drafting LinkedIn post...",
+    ("revise", "start"): "✏️ Applying your changes...",
+    ("tools", "start"): "🌐 Gathering information (web search / URL)...",
+    ("tools", "end"): "✅ Information gathered",
+}
+
+def stream_events(url, payload):
+    """
+    Posts the payload to a streaming endpoint and yields (event, data) pairs
+    from the server-sent events response.
+    """
+    with requests.post(url, json=payload, stream=True) as response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                yield event, json.loads(line[len("data:"):])
 
 # ----------------------------
 # Streamlit Page Config
@@ -25,6 +50,8 @@ if "step" not in st.session_state:
 if st.session_state.step == "input":
     st.title("🤖 LinkedIn Post Automator")
     st.write("Automate your LinkedIn posts with AI 🚀")
+    if st.session_state.get("stream_error"):
+        st.error(st.session_state.pop("stream_error"))
 
     query = st.text_area("Enter your post idea or query:")
     url = st.text_input("Enter URL (optional):")
@@ -34,23 +61,19 @@ if st.session_state.step == "input":
         if not query.strip():
             st.error("Please provide a query to generate the post.")
         else:
-            # Call backend API
-            
-            response = requests.post(BACKEND_INPUT_URL, json={
+            # The processing page streams the generation from the backend
+            st.session_state.query = query
+            st.session_state.url = url
+            st.session_state.temperature = temperature
+            st.session_state.stream_url = BACKEND_INPUT_STREAM_URL
+            st.session_state.stream_step = "input"
+            st.session_state.stream_payload = {
                 "query": query,
                 "url": url,
                 "temperature": temperature
-            })
-
-            if response.status_code == 200:
-                data = response.json()
-                st.session_state.session_id = data["session_id"]
-                st.session_state.logs = data["logs"]
-                st.session_state.generated_post = data["generated_post"]
-                st.session_state.step = "result"
-                st.rerun()
-            else:
-                st.error("Error connecting to backend API")
+            }
+            st.session_state.step = "processing"
+            st.rerun()
 
 # ----------------------------
 # Step 2: Processing Page
@@ -58,34 +81,52 @@ if st.session_state.step == "input":
 elif st.session_state.step == "processing":
     st.title("⚙️ Processing... Please wait")
 
-    logs = st.empty()
-
-    fake_logs = [
-        "🔍 Analyzing input query...",
-        f"🌐 Processing URL: {st.session_state.url}" if st.session_state.url else "🌐 No URL provided, skipping...",
-        f"⚙️ Running LLM with temperature {st.session_state.temperature}...",
-        "✍️ Drafting LinkedIn post...",
-        "✅ Post generated successfully!"
-    ]
-
-    for log in fake_logs:
-        logs.write(log)
-        time.sleep(1)
-
-    # Simulated LLM output
-    st.session_state.generated_post = f"""
-    🚀 **Your LinkedIn Post Draft** 🚀  
+    log_placeholder = st.empty()
+    draft_placeholder = st.empty()
+    logs = []
+    draft = ""
+    error = None
 
-    {st.session_state.query}  
-
-    {"🔗 Source: " + st.session_state.url if st.session_state.url else ""}
-    """
-    st.session_state.step = "result"
+    try:
+        for event, data in stream_events(st.session_state.stream_url, st.session_state.stream_payload):
+            if event == "session":
+                st.session_state.session_id = data["session_id"]
+            elif event == "node":
+                log = NODE_LOGS.get((data["node"], data["status"]))
+                if log:
+                    logs.append(log)
+                    log_placeholder.write("\n\n".join(logs))
+                if data["node"] in ("agent", "revise") and data["status"] == "start":
+                    draft = ""
+            elif event == "token":
+                draft += data["text"]
+                draft_placeholder.info(draft)
+            elif event == "done":
+                logs.append("✅ Post generated successfully!")
+                st.session_state.logs = logs
+                st.session_state.generated_post = data["generated_post"]
+                break
+            elif event == "error":
+                error = f"Post generation failed: {data['detail']}"
+                break
+        else:
+            error = "The backend closed the stream before the post was ready"
+    except requests.exceptions.RequestException:
+        error = "Error connecting to backend API"
+
+    if error:
+        # Back to the page the request came from, which shows the error
+        st.session_state.stream_error = error
+        st.session_state.step = st.session_state.get("stream_step", "input")
+    else:
+        st.session_state.step = "result"
     st.rerun()
 
 elif st.session_state.step == "edit":
     st.title("🤖 Suggest the changes")
     st.write("Automate your LinkedIn posts with AI 🚀")
+    if st.session_state.get("stream_error"):
+        st.error(st.session_state.pop("stream_error"))
 
     user_feedback = st.text_area("Enter your post idea or query:")
 
@@ -93,24 +134,15 @@ elif st.session_state.step == "edit":
         if not user_feedback.strip():
             st.error("Please provide a query to generate the post.")
         else:
-            # Call backend API
-            # if user_feedback.lower() == "exit":
-            #     print("Exiting workflow.")
-            #     st.session_state.step = "exit"
-            #     st.rerun()
-            response = requests.post(BACKEND_EDIT_URL, json={
+            # The processing page streams the revision from the backend
+            st.session_state.stream_url = BACKEND_EDIT_STREAM_URL
+            st.session_state.stream_step = "edit"
+            st.session_state.stream_payload = {
                     "user_feedback": user_feedback,
                     "session_id": st.session_state.session_id,
-                })
-            data = response.json()
-            if data["state"] == "Posted to linkedin":
-                st.success("✅ The post has been posted to LinkedIn")
-                st.session_state.state = "exit"
-                st.rerun()
-            elif data["state"] == "result":
-                st.session_state.step = "result"
-                st.session_state.generated_post = data["generated_post"]
-                st.rerun()
+                }
+            st.session_state.step = "processing"
+            st.rerun()
 
 
 elif st.session_state.step == "post":
@@ -124,8 +156,8 @@ elif st.session_state.step == "post":
     if response.status_code == 200:
         data = response.json()
         st.write(data)
-        if data["state"] == "Posted":
-            st.success("✅ The post has been posted to LinkedIn")
+        if data["state"] == "Queued":
+            st.success("✅ The post has been queued for LinkedIn")
             st.session_state.step = "exit"
             st.rerun()
 
@@ -159,7 +191,8 @@ elif st.session_state.step == "result":
 
 elif st.session_state.step == "exit":
     # Clear all workflow-related session state
-    keys_to_clear = ["generated_post", "logs", "query", "url", "temperature", "session_id"]
+    keys_to_clear = ["generated_post", "logs", "query", "url", "temperature", "session_id",
+                     "stream_url", "stream_payload"]
     for key in keys_to_clear:
         if key in st.session_state:
             del st.session_state[key]